@@ -0,0 +1,107 @@
+"""
+GoogleSheetsManager uchun async qobiq - bloklovchi Sheets so'rovlari cheklangan thread pool'da bajariladi
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config import get_sheets_io_workers, get_sheets_call_timeout
+from google_sheets import GoogleSheetsManager, sheets_manager
+
+logger = logging.getLogger(__name__)
+
+# run(..., timeout=NO_TIMEOUT) - chaqiruv tugaguncha kutiladi (yarim yozilgan holatda qoldirmaslik uchun)
+NO_TIMEOUT = object()
+
+
+class AsyncSheetsManager:
+    """Event loop'ni to'xtatmasdan Sheets'dan o'qish va yozish (har bir chaqiruvga timeout bilan)"""
+
+    def __init__(self, manager: GoogleSheetsManager, max_workers: int = 8, timeout: Optional[float] = 30.0):
+        self.manager = manager
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets-io")
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Bloklovchi funksiyani pool'da bajarish - timeout yoki bekor qilishda kutish to'xtatiladi"""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        if timeout is NO_TIMEOUT:
+            return await future
+        try:
+            return await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            # Thread ichidagi so'rov tugaguncha ishlaydi, lekin handler uni kutmaydi
+            logger.warning(f"Sheets so'rovi vaqti tugadi: {getattr(func, '__name__', func)}")
+            raise
+
+    def shutdown(self, wait: bool = False):
+        """Pool'ni yopish (bot to'xtaganda)"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # O'qish
+    async def get_users_snapshot(self):
+        return await self.run(self.manager.get_users_snapshot)
+
+    async def get_container_snapshot(self):
+        return await self.run(self.manager.get_container_snapshot)
+
+    async def find_user_by_phone(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.manager.find_user_by_phone, phone_number)
+
+    async def find_user_by_code(self, code: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.manager.find_user_by_code, code)
+
+    async def resolve_user_codes(self, codes) -> Optional[Dict[str, Any]]:
+        return await self.run(self.manager.resolve_user_codes, codes)
+
+    async def find_user_balance(self, phone_number: str) -> Optional[Dict[str, Any]]:
+        return await self.run(self.manager.find_user_balance, phone_number)
+
+    async def find_user_container_data(self, user_kod):
+        return await self.run(self.manager.find_user_container_data, user_kod)
+
+    async def get_positive_balances_over_amount(self, min_balance_amount=5.0) -> List[Dict[str, Any]]:
+        return await self.run(self.manager.get_positive_balances_over_amount, min_balance_amount)
+
+    async def get_debtors_over_amount(self, min_debt_amount=5.0) -> List[Dict[str, Any]]:
+        return await self.run(self.manager.get_debtors_over_amount, min_debt_amount)
+
+    async def get_container_data(self) -> List[Dict[str, Any]]:
+        return await self.run(self.manager.get_container_data)
+
+    async def get_investor_profit_data(self, year, month, investor_id=None):
+        return await self.run(self.manager.get_investor_profit_data, year, month, investor_id)
+
+    # Yozish
+    async def write_to_list_sheet(self, list_nomi, data):
+        return await self.run(self.manager.write_to_list_sheet, list_nomi, data)
+
+    async def write_rows_to_list_sheets(self, grouped_rows):
+        return await self.run(self.manager.write_rows_to_list_sheets, grouped_rows)
+
+    def _write_list_and_record(self, list_nomi, rows, on_written):
+        try:
+            result = self.manager.write_rows_to_list_sheets({list_nomi: rows})[list_nomi]
+        except Exception as e:
+            result = {'success': False, 'rows': 0, 'error': str(e)}
+        if result['success'] and on_written is not None:
+            on_written(list_nomi)
+        return result
+
+    def write_list_rows(self, list_nomi, rows, on_written: Optional[Callable[[str], Any]] = None) -> asyncio.Future:
+        """Bitta list'ga yozish va muvaffaqiyatli bo'lsa on_written(list_nomi) - ikkalasi bitta thread chaqiruvida.
+
+        Timeout yo'q va natija Future sifatida qaytadi: uni asyncio.shield bilan kutish kerak, shunda
+        bekor qilingan handler yozilgan, lekin reestrga kiritilmagan list qoldirmaydi.
+        """
+        return asyncio.ensure_future(
+            self.run(self._write_list_and_record, list_nomi, rows, on_written, timeout=NO_TIMEOUT)
+        )
+
+
+# Global instance
+async_sheets = AsyncSheetsManager(sheets_manager, max_workers=get_sheets_io_workers(),
+                                  timeout=get_sheets_call_timeout())
@@ -0,0 +1,86 @@
+"""
+Users jadvalining ustunli (columnar) ko'rinishi - manager hisobotlari uchun
+"""
+import heapq
+import sys
+from typing import List, Optional
+
+from money import Money, to_cents
+from sheet_records import UserRecord
+
+# NumPy ixtiyoriy - bo'lmasa oddiy Python ro'yxatlari ishlatiladi
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class BalanceColumns:
+    """Summalar massivi (butun sentlarda) va intern qilingan kod/telefon ustunlari"""
+
+    def __init__(self, users: List[UserRecord]):
+        self.users = users
+        self.codes = [sys.intern(user.kod) for user in users]
+        self.phones = [sys.intern(user.telefon) for user in users]
+
+        if np is not None:
+            self.amounts = np.fromiter((user.summa.cents for user in users), dtype=np.int64, count=len(users))
+        else:
+            self.amounts = [user.summa.cents for user in users]
+
+    def __len__(self):
+        return len(self.users)
+
+    def total(self) -> Money:
+        """Barcha balanslar yig'indisi (aniq, sentlarda)"""
+        if np is not None:
+            return Money(int(self.amounts.sum()))
+        return Money(sum(self.amounts))
+
+    def _sorted_desc(self, indices, keys) -> List[int]:
+        """Indekslarni kalit bo'yicha kamayish tartibida (barqaror) saralash (NumPy massivlari)"""
+        order = np.argsort(-keys, kind="stable")
+        return indices[order].tolist()
+
+    def positive_over(self, min_amount: float) -> List[int]:
+        """min_amount dan katta yoki teng musbat balanslar indekslari (kamayish tartibida)"""
+        amounts = self.amounts
+        min_amount = to_cents(min_amount)
+        if np is not None:
+            indices = np.flatnonzero((amounts > 0) & (amounts >= min_amount))
+            return self._sorted_desc(indices, amounts[indices])
+
+        # reverse=True ham barqaror: teng balanslar sheet tartibida qoladi
+        indices = [i for i, summa in enumerate(amounts) if summa > 0 and summa >= min_amount]
+        return sorted(indices, key=amounts.__getitem__, reverse=True)
+
+    def debtors_over(self, min_debt: float) -> List[int]:
+        """Qarzi min_debt dan katta yoki teng qarzdorlar indekslari (qarz kamayish tartibida)"""
+        amounts = self.amounts
+        min_debt = to_cents(min_debt)
+        if np is not None:
+            indices = np.flatnonzero((amounts < 0) & (-amounts >= min_debt))
+            return self._sorted_desc(indices, -amounts[indices])
+
+        indices = [i for i, summa in enumerate(amounts) if summa < 0 and -summa >= min_debt]
+        return sorted(indices, key=amounts.__getitem__)
+
+    def sorted_all(self, limit: Optional[int] = None) -> List[int]:
+        """Barcha balanslar indekslari kamayish tartibida (limit berilsa - faqat top-N)"""
+        amounts = self.amounts
+        if np is not None:
+            count = len(amounts)
+            if limit is not None and limit < count:
+                if limit <= 0:
+                    return []
+                # Avval N-chi eng katta qiymatni topish, keyin faqat undan katta/tenglarni saralash
+                kth = -np.partition(-amounts, limit - 1)[limit - 1]
+                indices = np.flatnonzero(amounts >= kth)
+                return self._sorted_desc(indices, amounts[indices])[:limit]
+            indices = np.arange(count)
+            return self._sorted_desc(indices, amounts)
+
+        if limit is None:
+            return sorted(range(len(amounts)), key=amounts.__getitem__, reverse=True)
+        # nlargest natijasi sorted(..., reverse=True)[:limit] bilan bir xil
+        return heapq.nlargest(max(limit, 0), range(len(amounts)), key=amounts.__getitem__)
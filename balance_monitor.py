@@ -5,95 +5,140 @@ import asyncio
 import logging
 from typing import Dict, Set
 from datetime import datetime, timezone, timedelta
-from google_sheets import sheets_manager, previous_balances
-from config import AUTHENTICATED_USERS
+from google_sheets import sheets_manager
+from async_sheets import async_sheets
+from config import (AUTHENTICATED_USERS, find_authenticated_user_by_phone, find_authenticated_user_by_kod,
+                    get_monitor_state_path)
+from change_tracker import ChangeTracker, load_tracker_states, save_tracker_states
+from money import Money, ZERO
+from notification_dispatcher import NotificationDispatcher
+from poll_scheduler import poll_scheduler
+from subscriptions import subscription_engine, format_subscription_alert
 
 logger = logging.getLogger(__name__)
 
-# Container balanslarini saqlash uchun
-previous_container_balances = {}
+# Oldingi Air balanslarini saqlash uchun (tozalangan telefon -> summa)
+# Summalar sentlarda taqqoslanadi - float yaxlitlash shovqini yolg'on xabar bermaydi
+air_tracker = ChangeTracker(key_fn=lambda user: user.clean_phone, value_fn=lambda user: user.summa,
+                            encode_value=str, decode_value=Money.of)
+# Container balanslarini saqlash uchun (kod -> summa)
+container_tracker = ChangeTracker(key_fn=lambda item: item.kod, value_fn=lambda item: item.summa,
+                                  encode_value=str, decode_value=Money.of)
+
+# Qayta ishga tushganda oxirgi ko'rilgan holatdan davom etish uchun diskka saqlanadi
+TRACKERS = {"air": air_tracker, "container": container_tracker}
+
+
+def _air_records(snapshot):
+    """Kuzatiladigan Air yozuvlari - jadval faqat kerak bo'lganda quriladi"""
+    for user in sheets_manager.users_table_of(snapshot).users:
+        if len(user.clean_phone) >= 9:
+            yield user
+
+
+def _container_records(snapshot):
+    """Kuzatiladigan Container yozuvlari - jadval faqat kerak bo'lganda quriladi"""
+    yield from sheets_manager.container_table_of(snapshot).items
 
 class BalanceMonitor:
     def __init__(self, bot_application):
         self.app = bot_application
         self.is_running = False
+        # Xabarlar polling siklini to'xtatmasdan, navbat orqali yuboriladi
+        self.dispatcher = None
+        # Har bir sheet o'z tezligida tekshiriladi
+        self.scheduler = poll_scheduler
+        self.checks = {
+            "air": self.check_air_changes,
+            "container": self.check_container_changes,
+        }
         
     async def start_monitoring(self):
         """Balans kuzatishni boshlash"""
         self.is_running = True
+        if self.dispatcher is None:
+            self.dispatcher = NotificationDispatcher(self.app.bot)
+        self.dispatcher.start()
+        await self.load_baselines()
         logger.info("🔍 Balans avtomatik kuzatish boshlandi")
         
-        while self.is_running:
-            try:
-                await self.check_balance_changes()
-                await asyncio.sleep(7)  # 7 soniya kutish
-                
-            except Exception as e:
-                logger.error(f"Balans kuzatishda xatolik: {e}")
-                await asyncio.sleep(10)  # Xatolik bo'lsa 10 soniya kutish
+        try:
+            while self.is_running:
+                # Faqat vaqti kelgan sheet'lar tekshiriladi
+                for name in self.scheduler.due():
+                    await self.poll_sheet(name)
+
+                # Yangi holatni keyingi ishga tushish uchun saqlash
+                await self.save_baselines()
+                await self.scheduler.wait()
+        finally:
+            # To'xtatilganda navbatdagi xabarlarni yuborib bo'lish, bekor qilinganda esa yo'q
+            await self.dispatcher.stop(drain=not self.is_running)
     
+    async def load_baselines(self):
+        """Oldingi ishga tushishdagi balanslarni yuklash - to'xtab turgan vaqtdagi o'zgarishlar ham xabar qilinadi"""
+        try:
+            if await async_sheets.run(load_tracker_states, get_monitor_state_path(), TRACKERS):
+                logger.info(f"💾 Monitor holati tiklandi: Air {len(air_tracker.state)}, "
+                            f"Container {len(container_tracker.state)}")
+        except Exception as e:
+            logger.error(f"Monitor holatini yuklashda xatolik: {e}")
+
+    async def save_baselines(self):
+        """O'zgargan bo'lsa, tracker holatini diskka saqlash"""
+        if not any(tracker.dirty for tracker in TRACKERS.values()):
+            return
+        try:
+            await async_sheets.run(save_tracker_states, get_monitor_state_path(), TRACKERS)
+        except Exception as e:
+            logger.error(f"Monitor holatini saqlashda xatolik: {e}")
+
     def stop_monitoring(self):
         """Balans kuzatishni to'xtatish"""
         self.is_running = False
+        # Kutayotgan siklni uyg'otish
+        self.scheduler.poke()
         logger.info("⏹️ Balans avtomatik kuzatish to'xtatildi")
     
-    async def check_balance_changes(self):
-        """Balans o'zgarishlarini tekshirish va xabar yuborish"""
-        global previous_balances, previous_container_balances
-        
+    async def poll_sheet(self, name: str):
+        """Bitta sheet'ni tekshirish va natijaga qarab keyingi poll vaqtini belgilash"""
+        cadence = self.scheduler.cadences[name]
         try:
-            # Air balanslarni tekshirish
-            current_balances = sheets_manager.get_all_users_balances()
-            
-            if current_balances:
-                # Har bir foydalanuvchi uchun Air balans o'zgarishini tekshirish
-                for phone, current_data in current_balances.items():
-                    current_balance = current_data.get("balance", "0")
-                    current_name = current_data.get("ism", "")
-                    
-                    # Oldingi balans bor yoki yo'qligini tekshirish
-                    if phone in previous_balances:
-                        old_balance = previous_balances[phone].get("balance", "0")
-                        new_balance = current_data.get("balance", "0")
-                        
-                        # Balans o'zgargan bo'lsa
-                        if old_balance != new_balance:
-                            print(f"💰 Air {current_name}: {old_balance} → {new_balance}")
-                            await self.send_balance_notification(phone, current_data, old_balance, new_balance)
-                    
-                    # Hozirgi balansni saqlash
-                    previous_balances[phone] = current_data.copy()
-            
-            # Container balanslarni tekshirish
-            await self.check_container_changes()
-        
+            changes_count = await self.checks[name]()
+            cadence.on_success(changes_count > 0)
         except Exception as e:
-            logger.error(f"Balans o'zgarishlarini tekshirishda xatolik: {e}")
-    
-    async def send_balance_notification(self, phone: str, user_data: Dict, old_balance: str, new_balance: str):
+            logger.error(f"{name} o'zgarishlarini tekshirishda xatolik: {e}")
+            cadence.on_error(e)
+
+    async def check_balance_changes(self):
+        """Balans o'zgarishlarini tekshirish va xabar yuborish (ikkala sheet, jadvalsiz)"""
+        for name in self.checks:
+            await self.poll_sheet(name)
+        await self.save_baselines()
+
+    async def check_air_changes(self) -> int:
+        """Air balans o'zgarishlarini tekshirish - o'zgarishlar sonini qaytaradi"""
+        # Eksport o'zgarmagan bo'lsa qatorlar ko'rilmaydi
+        snapshot = await async_sheets.get_users_snapshot()
+        changes = await async_sheets.run(air_tracker.update, _air_records(snapshot), snapshot.version, snapshot.digest)
+
+        # Faqat balansi o'zgargan foydalanuvchilar uchun
+        for change in changes:
+            old_balance = change.old_value
+            new_balance = change.new_value
+            print(f"💰 Air {change.new.ism}: {old_balance} → {new_balance}")
+            await self.send_balance_notification(change.key, change.new.to_balance_info(), old_balance, new_balance)
+
+        self.notify_subscribers("air", changes, kod_of=lambda change: change.new.kod)
+        return len(changes)
+
+    async def send_balance_notification(self, phone: str, user_data: Dict, old_balance: Money, new_balance: Money):
         """Balans o'zgarishi haqida xabar yuborish"""
         try:
-            print(f"📨 DEBUG: Xabar yuborish uchun user_id qidirmoqda...")
-            print(f"📞 DEBUG: Qidirilayotgan telefon: {phone}")
-            
-            # Avtentifikatsiya qilingan foydalanuvchini topish
-            user_id = None
-            user_phone = None
-            
-            print(f"👥 DEBUG: {len(AUTHENTICATED_USERS)} ta autentifikatsiya qilingan foydalanuvchi")
-            
-            for uid, auth_data in AUTHENTICATED_USERS.items():
-                auth_phone = auth_data.get('telefon', '')
-                clean_auth_phone = ''.join(filter(str.isdigit, auth_phone))
-                
-                print(f"🔍 DEBUG: User {uid}: {auth_phone} → clean: {clean_auth_phone}")
-                
-                if clean_auth_phone == phone:
-                    user_id = uid
-                    user_phone = auth_phone
-                    print(f"✅ DEBUG: TOPILDI! User ID: {user_id}")
-                    break
-            
+            # Avtentifikatsiya qilingan foydalanuvchini teskari indeks orqali topish
+            user_id = find_authenticated_user_by_phone(phone)
+            user_phone = AUTHENTICATED_USERS[user_id].get('telefon', '') if user_id else None
+
             if user_id:
                 # Xabar matnini tayyorlash
                 ism = user_data.get('ism', 'Nomalum')
@@ -101,23 +146,14 @@ class BalanceMonitor:
                 
                 # O'zgarish miqdorini hisoblash
                 try:
-                    # Balanslarni float'ga aylantirishdan oldin vergul va bo'shliqlarni tozalash
-                    # Avval string'ga aylantirish
-                    old_str = str(old_balance) if old_balance else "0"
-                    new_str = str(new_balance) if new_balance else "0"
-                    
-                    old_clean = old_str.replace(' ', '').replace(',', '.')
-                    new_clean = new_str.replace(' ', '').replace(',', '.')
-                    
-                    old_amount = float(old_clean)
-                    new_amount = float(new_clean)
-                    difference = new_amount - old_amount
+                    # Aniq ayirish (sentlarda) - matn/float aylantirishsiz
+                    difference = Money.of(new_balance) - Money.of(old_balance)
                     
                     # O'zgarish belgilarini qo'shish
-                    if difference > 0:
+                    if difference > ZERO:
                         change_text = f"📈 O'zgarish: +{difference:,.2f} $"
                         change_emoji = "📈"
-                    elif difference < 0:
+                    elif difference < ZERO:
                         change_text = f"📉 O'zgarish: {difference:,.2f} $"
                         change_emoji = "📉"
                     else:
@@ -148,24 +184,15 @@ class BalanceMonitor:
 
 🕐 {formatted_date} - {formatted_time}"""
                 
-                print(f"📤 DEBUG: Xabar yuborilmoqda user {user_id} ga...")
-                
-                # Foydalanuvchiga xabar yuborish
-                await self.app.bot.send_message(
-                    chat_id=user_id,
-                    text=message
-                )
-                
-                # Avtoxabardan keyin balans tugmasini qaytarish (xabarsiz)
+                # Foydalanuvchiga xabar yuborish, keyin balans tugmasini qaytarish (xabarsiz)
                 from keyboards import BotKeyboards
-                await self.app.bot.send_message(
-                    chat_id=user_id,
-                    text="💰",  # Faqat bitta emoji
-                    reply_markup=BotKeyboards.persistent_mijoz_keyboard()
+                self.dispatcher.enqueue(
+                    user_id,
+                    message,
+                    follow_up=("💰", BotKeyboards.persistent_mijoz_keyboard())  # Faqat bitta emoji
                 )
-                
-                print(f"✅ DEBUG: Xabar muvaffaqiyatli yuborildi!")
-                logger.info(f"💌 Balans o'zgarishi xabari yuborildi: {user_phone} ({old_balance} → {new_balance})")
+
+                logger.info(f"💌 Balans o'zgarishi xabari navbatga qo'yildi: {user_phone} ({old_balance} → {new_balance})")
             else:
                 print(f"❌ DEBUG: User ID topilmadi telefon {phone} uchun")
         
@@ -173,63 +200,43 @@ class BalanceMonitor:
             logger.error(f"Balans xabarini yuborishda xatolik: {e}")
             print(f"💥 DEBUG: Xabar yuborishda xatolik: {e}")
 
-    async def check_container_changes(self):
-        """Container balans o'zgarishlarini tekshirish"""
-        global previous_container_balances
-        
-        try:
-            # Hozirgi Container ma'lumotlarini olish
-            current_container_data = sheets_manager.get_container_data()
-            
-            if not current_container_data:
-                return
-            
-            # Container ma'lumotlarini kod bo'yicha index qilish
-            current_container_dict = {}
-            for item in current_container_data:
-                kod = item['kod']
-                current_container_dict[kod] = item
-            
-            # Har bir kod uchun o'zgarishni tekshirish
-            for kod, current_data in current_container_dict.items():
-                current_summa = current_data.get('summa', 0)
-                current_ism = current_data.get('ism', '')
-                
-                # Oldingi ma'lumot bor yoki yo'qligini tekshirish
-                if kod in previous_container_balances:
-                    old_summa = previous_container_balances[kod].get('summa', 0)
-                    
-                    # Summa o'zgargan bo'lsa
-                    if old_summa != current_summa:
-                        print(f"📦 Container {current_ism} ({kod}): {old_summa} → {current_summa}")
-                        await self.send_container_notification(kod, current_data, old_summa, current_summa)
-                
-                # Hozirgi ma'lumotni saqlash
-                previous_container_balances[kod] = current_data.copy()
-        
-        except Exception as e:
-            logger.error(f"Container o'zgarishlarini tekshirishda xatolik: {e}")
+    async def check_container_changes(self) -> int:
+        """Container balans o'zgarishlarini tekshirish - o'zgarishlar sonini qaytaradi"""
+        # Hozirgi Container snapshot'i
+        snapshot = await async_sheets.get_container_snapshot()
+        changes = await async_sheets.run(container_tracker.update, _container_records(snapshot), snapshot.version, snapshot.digest)
+
+        # Faqat summasi o'zgargan kodlar uchun
+        for change in changes:
+            old_summa = change.old_value
+            current_summa = change.new_value
+            print(f"📦 Container {change.new.ism} ({change.key}): {old_summa} → {current_summa}")
+            await self.send_container_notification(change.key, change.new.to_dict(), old_summa, current_summa)
 
-    async def send_container_notification(self, kod: str, container_data: Dict, old_summa: float, new_summa: float):
+        self.notify_subscribers("container", changes, kod_of=lambda change: change.key)
+        return len(changes)
+
+    def notify_subscribers(self, sheet: str, changes, kod_of):
+        """O'zgarishlarni obuna bo'lgan manager/super user'larga yuborish (indeks bo'yicha, qatorlar qayta ko'rilmaydi)"""
+        if not changes or not subscription_engine.has_rules():
+            return
+        for change in changes:
+            try:
+                kod = str(kod_of(change))
+                for user_id, fired in subscription_engine.match(sheet, kod, change.old_value, change.new_value).items():
+                    message = format_subscription_alert(sheet, change.new.ism, kod, change.old_value,
+                                                        change.new_value, fired)
+                    self.dispatcher.enqueue(user_id, message)
+            except Exception as e:
+                logger.error(f"Obuna xabarini tayyorlashda xatolik ({sheet} {change.key}): {e}")
+
+    async def send_container_notification(self, kod: str, container_data: Dict, old_summa: Money, new_summa: Money):
         """Container balans o'zgarishi haqida xabar yuborish"""
         try:
-            print(f"📦 DEBUG: Container kod {kod} uchun user_id qidirmoqda...")
-            
-            # Avtentifikatsiya qilingan foydalanuvchini kod orqali topish
-            user_id = None
-            user_phone = None
-            
-            for uid, auth_data in AUTHENTICATED_USERS.items():
-                auth_kod = auth_data.get('kod', '')
-                
-                print(f"🔍 DEBUG: User {uid}: kod {auth_kod}")
-                
-                if auth_kod == kod:
-                    user_id = uid
-                    user_phone = auth_data.get('telefon', '')
-                    print(f"✅ DEBUG: Container kod TOPILDI! User ID: {user_id}")
-                    break
-            
+            # Avtentifikatsiya qilingan foydalanuvchini kod bo'yicha teskari indeks orqali topish
+            user_id = find_authenticated_user_by_kod(kod)
+            user_phone = AUTHENTICATED_USERS[user_id].get('telefon', '') if user_id else None
+
             if user_id:
                 # Xabar matnini tayyorlash
                 ism = container_data.get('ism', 'Nomalum')
@@ -239,10 +246,10 @@ class BalanceMonitor:
                     difference = new_summa - old_summa
                     
                     # O'zgarish belgilarini qo'shish
-                    if difference > 0:
+                    if difference > ZERO:
                         change_text = f"📈 O'zgarish: +{difference:.2f} $"
                         change_emoji = "📈"
-                    elif difference < 0:
+                    elif difference < ZERO:
                         change_text = f"📉 O'zgarish: {difference:.2f} $"
                         change_emoji = "📉"
                     else:
@@ -271,24 +278,15 @@ class BalanceMonitor:
 
 🕐 {formatted_date} - {formatted_time}"""
                 
-                print(f"📤 DEBUG: Container xabar yuborilmoqda user {user_id} ga...")
-                
-                # Foydalanuvchiga xabar yuborish
-                await self.app.bot.send_message(
-                    chat_id=user_id,
-                    text=message
-                )
-                
-                # Avtoxabardan keyin tugmalarni qaytarish (xabarsiz)
+                # Foydalanuvchiga xabar yuborish, keyin tugmalarni qaytarish (xabarsiz)
                 from keyboards import BotKeyboards
-                await self.app.bot.send_message(
-                    chat_id=user_id,
-                    text="💰📦",  # Emoji'lar
-                    reply_markup=BotKeyboards.persistent_mijoz_keyboard()
+                self.dispatcher.enqueue(
+                    user_id,
+                    message,
+                    follow_up=("💰📦", BotKeyboards.persistent_mijoz_keyboard())  # Emoji'lar
                 )
-                
-                print(f"✅ DEBUG: Container xabar muvaffaqiyatli yuborildi!")
-                logger.info(f"📦 Container o'zgarishi xabari yuborildi: {kod} ({old_summa} → {new_summa})")
+
+                logger.info(f"📦 Container o'zgarishi xabari navbatga qo'yildi: {kod} ({old_summa} → {new_summa})")
             else:
                 print(f"❌ DEBUG: User ID topilmadi kod {kod} uchun")
         
@@ -0,0 +1,116 @@
+"""
+BalanceColumns filtrlari va top-N saralashini o'lchash (10k / 100k / 1M qator).
+
+Ishga tushirish (repo ildizidan):
+    python bench/bench_balance_columns.py [--sizes 10000 100000 1000000] [--repeat 5] [--no-numpy]
+
+Taqqoslash uchun eski usul ham o'lchanadi: UserRecord ro'yxatini har so'rovda filtrlash va saralash.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import balance_columns  # noqa: E402
+from balance_columns import BalanceColumns  # noqa: E402
+from money import Money  # noqa: E402
+from sheet_records import UserRecord  # noqa: E402
+
+MIN_POSITIVE = 100
+MIN_DEBT = 100
+TOP_N = 50
+
+
+def make_users(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    users = []
+    for i in range(count):
+        # Taxminan uchdan biri qarzdor, ko'pchilik balanslar kichik
+        cents = int(rng.gauss(0, 1) * 40000) if rng.random() < 0.9 else rng.randint(-5_000_000, 5_000_000)
+        users.append(UserRecord(
+            telefon=f"998{rng.randint(100000000, 999999999)}",
+            ism=f"User {i}",
+            list_nomi="A",
+            kod=str(1000 + i),
+            summa=Money(cents),
+            row_number=i + 2,
+        ))
+    return users
+
+
+def best_of(repeat: int, func):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def legacy_positive(users):
+    threshold = Money(MIN_POSITIVE * 100)
+    found = [user for user in users if user.summa.cents > 0 and user.summa >= threshold]
+    return sorted(found, key=lambda user: user.summa.cents, reverse=True)
+
+
+def legacy_debtors(users):
+    found = [user for user in users if user.summa.cents < 0 and -user.summa.cents >= MIN_DEBT * 100]
+    return sorted(found, key=lambda user: -user.summa.cents, reverse=True)
+
+
+def legacy_top(users):
+    return sorted(users, key=lambda user: user.summa.cents, reverse=True)[:TOP_N]
+
+
+def run(sizes, repeat):
+    backend = "numpy" if balance_columns.np is not None else "python"
+    print(f"backend: {backend}, repeat: {repeat} (eng yaxshi natija, ms)")
+    header = f"{'qatorlar':>9} {'qurish':>9} {'musbat':>9} {'qarzdor':>9} {f'top-{TOP_N}':>9} {'jami':>9}" \
+             f" | {'eski musbat':>11} {'eski qarz':>10} {f'eski top':>9}"
+    print(header)
+    print("─" * len(header))
+
+    for size in sizes:
+        users = make_users(size)
+        build = best_of(repeat, lambda: BalanceColumns(users))
+        columns = BalanceColumns(users)
+
+        # Natijalar eski usul bilan bir xil bo'lishi kerak
+        assert [users[i].row_number for i in columns.sorted_all(TOP_N)] == \
+               [user.row_number for user in legacy_top(users)]
+        assert len(columns.positive_over(MIN_POSITIVE)) == len(legacy_positive(users))
+        assert len(columns.debtors_over(MIN_DEBT)) == len(legacy_debtors(users))
+
+        timings = [
+            build,
+            best_of(repeat, lambda: columns.positive_over(MIN_POSITIVE)),
+            best_of(repeat, lambda: columns.debtors_over(MIN_DEBT)),
+            best_of(repeat, lambda: columns.sorted_all(TOP_N)),
+            best_of(repeat, columns.total),
+        ]
+        legacy = [
+            best_of(repeat, lambda: legacy_positive(users)),
+            best_of(repeat, lambda: legacy_debtors(users)),
+            best_of(repeat, lambda: legacy_top(users)),
+        ]
+        print(f"{size:>9} " + " ".join(f"{t * 1000:>9.2f}" for t in timings)
+              + f" | {legacy[0] * 1000:>11.2f} {legacy[1] * 1000:>10.2f} {legacy[2] * 1000:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-numpy", action="store_true", help="oddiy Python ro'yxatlari bilan o'lchash")
+    args = parser.parse_args()
+
+    if args.no_numpy:
+        balance_columns.np = None
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
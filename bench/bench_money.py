@@ -0,0 +1,96 @@
+"""
+parse_money tezligini o'lchash: sovuq kesh (har matn birinchi marta) va issiq kesh (poll'lar orasida
+o'zgarmagan katakchalar), eski float clean_amount bilan taqqoslab.
+
+Ishga tushirish (repo ildizidan):
+    python bench/bench_money.py [--count 100000] [--repeat 9]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import money  # noqa: E402
+from money import clear_amount_cache, parse_money, parse_money_uncached  # noqa: E402
+from tests.test_money import legacy_clean_amount  # noqa: E402
+
+
+def make_amounts(count: int, seed: int = 1):
+    """Users sheet'dagiga o'xshash summa katakchalari ("1 234,50", "-500", "Â 12,5 $" ...)"""
+    rng = random.Random(seed)
+    amounts = []
+    for _ in range(count):
+        cents = int(rng.gauss(0, 1) * 40000)
+        whole, fraction = divmod(abs(cents), 100)
+        sign = "-" if cents < 0 else ""
+        grouped = f"{whole:,}".replace(",", rng.choice([" ", "\xa0"]))
+        style = rng.randrange(4)
+        if style == 0:
+            amounts.append(f"{sign}{grouped},{fraction:02d}")
+        elif style == 1:
+            amounts.append(f"{sign}{whole}.{fraction:02d}")
+        elif style == 2:
+            amounts.append(f"{sign}{whole}")
+        else:
+            amounts.append(f"Â{sign}{grouped},{fraction:02d} $")
+    return amounts
+
+
+def timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def run(count: int, repeat: int):
+    amounts = make_amounts(count)
+    # Sovuq yo'l: har bir noyob matn bir marta, bo'sh keshdan (faqat miss'lar)
+    unique = list(dict.fromkeys(amounts))
+
+    def cold_all():
+        for text in unique:
+            parse_money(text)
+
+    def uncached_all():
+        for text in unique:
+            parse_money_uncached(text)
+
+    def legacy_unique():
+        for text in unique:
+            legacy_clean_amount(text)
+
+    def warm_all():
+        for text in amounts:
+            parse_money(text)
+
+    # Variantlar navbatma-navbat o'lchanadi - protsessor chastotasi o'zgarishi hammasiga bir xil ta'sir qiladi
+    variants = (("cold", cold_all), ("uncached", uncached_all), ("legacy", legacy_unique), ("warm", warm_all))
+    best = dict.fromkeys((name for name, _ in variants), float("inf"))
+    for _ in range(repeat):
+        clear_amount_cache()
+        for name, func in variants:
+            best[name] = min(best[name], timed(func))
+    cold, uncached, legacy, warm = best["cold"], best["uncached"], best["legacy"], best["warm"]
+
+    print(f"{count} ta katakcha ({len(unique)} ta noyob), eng yaxshi natija {repeat} ta urinishdan")
+    for name, seconds, cells in (("parse_money, sovuq kesh", cold, len(unique)),
+                                 ("parse_money, keshsiz", uncached, len(unique)),
+                                 ("eski clean_amount", legacy, len(unique)),
+                                 ("parse_money, issiq kesh", warm, count)):
+        print(f"  {name:<25} {seconds * 1000:9.2f} ms  {seconds / cells * 1e6:7.3f} µs/katak")
+    print(f"  kesh: {len(money._amount_cache)} ta yozuv (maksimal {money.AMOUNT_CACHE_SIZE})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=9)
+    args = parser.parse_args()
+    run(args.count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
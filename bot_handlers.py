@@ -1,16 +1,25 @@
+import asyncio
 import logging
 from telegram import Update
 from telegram.ext import ContextTypes
-import pandas as pd
-import os
+import tempfile
 from datetime import datetime
 
 from keyboards import BotKeyboards
 from user_roles import UserRoleManager
 from config import (ROLES, get_predefined_role, save_user_phone, get_user_phone, 
                     set_authenticated_user, is_user_authenticated, AUTHENTICATED_USERS,
-                    set_pending_verification, get_pending_verification, remove_pending_verification)
+                    set_pending_verification, get_pending_verification, remove_pending_verification,
+                    get_upload_spool_size)
 from google_sheets import sheets_manager
+from async_sheets import async_sheets
+from manifest_parser import parse_manifest, summarize_rejections
+from import_jobs import import_jobs
+from poll_scheduler import poll_scheduler
+from subscriptions import subscription_engine, parse_rule, describe_rule, USAGE as SUBSCRIPTION_USAGE
+from report_sessions import report_sessions, parse_page_callback, REPORT_AIR, REPORT_CONTAINER
+from message_render import stamp_page
+from import_ledger import import_ledger, hash_stream, manifest_fingerprint, number_occurrences
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +126,15 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         elif data.startswith("investor_"):
             await handle_investor_actions(query, data)
 
+        # Hisobot sahifalarini varaqlash
+        elif data.startswith("report_"):
+            await handle_report_page(query, data)
+
+        # Import vazifasini bekor qilish
+        elif data.startswith("import_cancel_"):
+            if can_import_excel(user_id) and import_jobs.cancel(_parse_job_id(data.split("_")[-1]), owner_id=user_id):
+                logger.info(f"Foydalanuvchi {user_id} importni bekor qildi: {data}")
+
         # Orqaga qaytish
         elif data == "back_to_manager":
             await show_manager_menu(query)
@@ -220,7 +238,7 @@ async def handle_mijoz_actions(query, data):
             try:
                 # Google Sheets'dan balans ma'lumotini olish
                 logger.info(f"📊 DEBUG: Google Sheets'dan ma'lumot so'ramoqda...")
-                balance_info = sheets_manager.find_user_balance(phone_number)
+                balance_info = await async_sheets.find_user_balance(phone_number)
                 logger.info(f"📋 DEBUG: Olingan ma'lumot: {balance_info}")
 
                 if balance_info:
@@ -267,49 +285,86 @@ async def handle_manager_actions(query, data):
         print("✈️ Manager Air: Musbat balanslar yuklanmoqda...")
         # Loading xabari
         await query.edit_message_text("⏳ Musbat balanslar ro'yxati yuklanmoqda...")
+        await show_manager_report(query, REPORT_AIR)
 
-        try:
-            # Faqat 5$ dan ko'p musbat balansga ega mijozlarni olish
-            positive_users = sheets_manager.get_positive_balances_over_amount(5.0)
-            print(f"✅ Air musbat balanslar: {len(positive_users)} ta mijoz (5$+)")
+    elif data == "manager_container":
+        print("📦 Manager Container: Ma'lumotlar yuklanmoqda...")
+        # Loading xabari
+        await query.edit_message_text("⏳ Container ma'lumotlari yuklanmoqda...")
+        await show_manager_report(query, REPORT_CONTAINER)
+
+async def open_manager_report(kind, owner_id):
+    """Hisobot sessiyasini ochish - shu snapshot versiyasi uchun saralangan sahifalar keshdan olinadi"""
+    page_rows = report_sessions.page_rows
+    if kind == REPORT_AIR:
+        snapshot = await async_sheets.get_users_snapshot()
+        build = lambda: sheets_manager.format_positive_balances_message(
+            sheets_manager.get_positive_balances_over_amount(5.0, snapshot=snapshot), page_rows=page_rows,
+            stamped=False)
+    else:
+        snapshot = await async_sheets.get_container_snapshot()
+        build = lambda: sheets_manager.format_container_message(
+            sheets_manager.get_container_data(snapshot=snapshot), page_rows=page_rows, stamped=False)
 
-            # Musbat balanslar ro'yxatini formatlash (Markdown formatida)
-            text = sheets_manager.format_positive_balances_message(positive_users)
+    # Saralash va formatlash thread pool'da, faqat yangi snapshot uchun (sahifalarda vaqt yo'q - u 304 javoblarda
+    # versiya o'zgarmagani uchun eskirib qolardi, shuning uchun yuborishda stamp_page bilan qo'shiladi)
+    pages = await async_sheets.run(report_sessions.pages_for, kind, snapshot.version, build)
+    return report_sessions.open(owner_id, kind, snapshot.version, pages)
 
-        except Exception as e:
-            print(f"❌ Air musbat balanslar xatolik: {e}")
-            logger.error(f"Musbat balanslar ro'yxatini olishda xatolik: {e}")
-            text = "❌ Musbat balanslar ro'yxatini olishda xatolik yuz berdi."
+def report_keyboard(session):
+    return BotKeyboards.report_pages_keyboard(session.id, session.page, session.total,
+                                              back_callback="manager_qarzdorlar")
 
+async def show_manager_report(query, kind):
+    """Hisobotning birinchi sahifasini xabarni tahrirlab ko'rsatish"""
+    try:
+        session = await open_manager_report(kind, query.from_user.id)
+    except Exception as e:
+        logger.error(f"Hisobotni ochishda xatolik ({kind}): {e}")
         await query.edit_message_text(
-            text,
-            reply_markup=BotKeyboards.manager_qarzdorlar_keyboard(),
-            parse_mode="Markdown"
+            "❌ Ma'lumotlarni olishda xatolik yuz berdi.",
+            reply_markup=BotKeyboards.back_keyboard("manager_qarzdorlar")
         )
+        return
 
-    elif data == "manager_container":
-        print("📦 Manager Container: Ma'lumotlar yuklanmoqda...")
-        # Loading xabari
-        await query.edit_message_text("⏳ Container ma'lumotlari yuklanmoqda...")
+    await query.edit_message_text(stamp_page(session.pages[0]), reply_markup=report_keyboard(session),
+                                  parse_mode="Markdown")
 
-        try:
-            # Container sheet'dan 5$ dan yuqori summalarni olish
-            container_data = sheets_manager.get_container_data()
-
-            # Container ma'lumotlarini formatlash
-            text = sheets_manager.format_container_message(container_data)
+async def handle_report_page(query, data):
+    """⬅️/➡️ - sessiyadagi tayyor sahifani shu xabar ichida ko'rsatish (Sheets'ga so'rov yo'q)"""
+    session_id, page = parse_page_callback(data)
+    session = report_sessions.get(session_id)
+    if session is None or session.owner_id != query.from_user.id:
+        await query.message.reply_text("⌛ Hisobot eskirgan - uni qaytadan oching.")
+        return
 
-        except Exception as e:
-            print(f"❌ Container ma'lumotlarini olishda xatolik: {e}")
-            logger.error(f"Container ma'lumotlarini olishda xatolik: {e}")
-            text = "❌ Container ma'lumotlarini olishda xatolik yuz berdi."
+    # Joriy sahifa tugmasi yoki noto'g'ri raqam - xabar o'zgarmaydi
+    if page is None or page == session.page or not 0 <= page < session.total:
+        return
 
-        await query.edit_message_text(
-            text,
-            reply_markup=BotKeyboards.back_keyboard("manager_qarzdorlar"),
-            parse_mode="Markdown"
+    session.page = page
+    await query.edit_message_text(stamp_page(session.pages[page]), reply_markup=report_keyboard(session),
+                                  parse_mode="Markdown")
+
+async def reply_pages(message, pages, parse_mode=None, reply_markup=None):
+    """Hisobot sahifalarini ketma-ket yuborish - tugmalar oxirgi sahifaga qo'shiladi"""
+    for number, page in enumerate(pages, 1):
+        await message.reply_text(
+            page,
+            parse_mode=parse_mode,
+            reply_markup=reply_markup if number == len(pages) else None
         )
 
+async def edit_pages(query, pages, parse_mode=None, reply_markup=None):
+    """Birinchi sahifa bilan xabarni tahrirlash, qolganlarini yangi xabar sifatida yuborish"""
+    await query.edit_message_text(
+        pages[0],
+        parse_mode=parse_mode,
+        reply_markup=reply_markup if len(pages) == 1 else None
+    )
+    if len(pages) > 1:
+        await reply_pages(query.message, pages[1:], parse_mode=parse_mode, reply_markup=reply_markup)
+
 async def handle_investor_actions(query, data):
     """Investor tugmalarini qayta ishlash"""
     if data == "investor_foyda":
@@ -346,14 +401,15 @@ async def handle_investor_actions(query, data):
         try:
             # Google Sheets'dan foyda ma'lumotlarini olish (investor ID'si bilan)
             investor_id = query.from_user.id
-            profit_data = sheets_manager.get_investor_profit_data(year, month, investor_id)
-            text = sheets_manager.format_investor_profit_message(profit_data, year, month)
+            profit_data = await async_sheets.get_investor_profit_data(year, month, investor_id)
+            pages = sheets_manager.format_investor_profit_message(profit_data, year, month)
         except Exception as e:
             logger.error(f"Investor foyda ma'lumotini olishda xatolik: {e}")
-            text = f"❌ {year} yil {month_name} oyi foyda ma'lumotlarini olishda xatolik yuz berdi."
+            pages = [f"❌ {year} yil {month_name} oyi foyda ma'lumotlarini olishda xatolik yuz berdi."]
         
-        await query.edit_message_text(
-            text,
+        await edit_pages(
+            query,
+            pages,
             reply_markup=BotKeyboards.investor_months_keyboard(year),
             parse_mode="Markdown"
         )
@@ -385,7 +441,7 @@ async def contact_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             try:
                 # Google Sheets'dan foydalanuvchi ma'lumotini olish
-                user_info = sheets_manager.find_user_by_phone(phone_number)
+                user_info = await async_sheets.find_user_by_phone(phone_number)
 
                 if user_info and user_info.get('kod'):
                     # Foydalanuvchi topilsa, kod so'rash
@@ -472,19 +528,19 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Kod verification uchun
     await code_verification_handler(update, context)
 
+def can_import_excel(user_id):
+    """Excel import qilish huquqi (manager yoki super user)"""
+    # Super user'lar manager funksiyalarini ishlatishi mumkin
+    if get_predefined_role(user_id) == "SUPER_USER":
+        return True
+    return UserRoleManager.get_role(user_id) == ROLES["MANAGER"]
+
 async def document_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Excel fayl yuklash handler'i (faqat manager uchun)"""
     user_id = update.effective_user.id
 
     # Faqat manager foydalanishi mumkin
-    current_role = UserRoleManager.get_role(user_id)
-    predefined_role = get_predefined_role(user_id)
-    
-    # Super user bo'lsa, manager rolida ishlash imkoniyatini berish
-    if predefined_role == "SUPER_USER":
-        # Super user'lar manager funksiyalarini ishlatishi mumkin
-        pass
-    elif current_role != ROLES["MANAGER"]:
+    if not can_import_excel(user_id):
         await update.message.reply_text("❌ Siz Excel fayl yuklash huquqiga ega emassiz.")
         return
 
@@ -501,154 +557,242 @@ async def document_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ Faqat Excel fayllar (.xlsx, .xls) qabul qilinadi.")
             return
 
-        await update.message.reply_text("📁 Excel fayl yuklanmoqda...")
+        # Importni fon vazifasi sifatida boshlash - handler darhol qaytadi
+        file_id = document.file_id
+        await import_jobs.submit(
+            context.bot,
+            update.effective_chat.id,
+            user_id,
+            file_name,
+            lambda job: run_import_job(job, context.bot, file_id),
+            reply_markup=BotKeyboards.import_job_keyboard
+        )
 
-        # Faylni yuklab olish
-        file = await context.bot.get_file(document.file_id)
-        file_path = f"temp_{user_id}_{file_name}"
-        await file.download_to_drive(file_path)
+    except Exception as e:
+        logger.error(f"Excel fayl yuklashda xatolik: {e}")
+        await update.message.reply_text("❌ Excel fayl yuklashda xatolik yuz berdi.")
+
+        # Exception holatida ham manager tugmalarini ko'rsatish
+        await update.message.reply_text(
+            "🔄 Qaytadan urinish yoki boshqa amal tanlang:",
+            reply_markup=BotKeyboards.manager_persistent_keyboard()
+        )
+
+async def run_import_job(job, bot, file_id):
+    """Fon vazifasi: faylni xotiraga yuklab olish, qayta ishlash va natijani yuborish"""
+    job.update(stage="📁 Excel fayl yuklanmoqda...")
+
+    # Faylni xotiraga yuklab olish (katta fayllar avtomatik noyob vaqtinchalik faylga o'tadi)
+    file = await bot.get_file(file_id)
+    with tempfile.SpooledTemporaryFile(max_size=get_upload_spool_size()) as buffer:
+        await file.download_to_memory(out=buffer)
 
-        await update.message.reply_text("📊 Excel fayl tahlil qilinyapti...")
+        job.update(stage="📊 Excel fayl tahlil qilinyapti...")
 
         # Excel faylni o'qish va qayta ishlash
-        result = await process_excel_file(file_path, file_name)
+        result = await process_excel_file(buffer, job.file_name, progress=job.update)
+
+    await send_import_report(bot, job.chat_id, result)
+    return result
+
+async def send_import_report(bot, chat_id, result):
+    """Import natijasini manager'ga yuborish"""
+    if result["success"] and result['already_imported']:
+        # Qayta yuklangan manifest - hech narsa yozilmadi
+        await bot.send_message(
+            chat_id=chat_id,
+            text=f"♻️ Bu manifest allaqachon import qilingan - hech narsa yozilmadi.\n\n"
+                 f"⏭️ Avval yozilgan yozuvlar: {result['skipped_records']}"
+        )
+        await bot.send_message(
+            chat_id=chat_id,
+            text="🔄 Keyingi amal uchun tanlang:",
+            reply_markup=BotKeyboards.manager_persistent_keyboard()
+        )
+        return
 
-        # Vaqtinchalik faylni o'chirish
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    if result["success"]:
+        # Muvaffaqiyatli natijani ko'rsatish
+        await bot.send_message(
+            chat_id=chat_id,
+            text=f"✅ Excel fayl muvaffaqiyatli qayta ishlandi!\n\n"
+                 f"📊 Kodlar: {result['codes_count']} ta\n"
+                 f"📋 Topilgan kodlar: {result['found_codes']}\n"
+                 f"💰 Umumiy summa: {result['total_amount']}\n"
+                 f"📝 Yangilangan yozuvlar: {result['updated_records']}\n"
+                 f"⏭️ Avval yozilgan (o'tkazib yuborildi): {result['skipped_records']}\n"
+                 f"❌ Topilmagan kodlar: {result['not_found_codes']}"
+        )
 
-        if result["success"]:
-            # Muvaffaqiyatli natijani ko'rsatish
-            await update.message.reply_text(
-                f"✅ Excel fayl muvaffaqiyatli qayta ishlandi!\n\n"
-                f"📊 Kodlar: {result['codes_count']} ta\n"
-                f"📋 Topilgan kodlar: {result['found_codes']}\n"
-                f"💰 Umumiy summa: {result['total_amount']}\n"
-                f"📝 Yangilangan yozuvlar: {result['updated_records']}\n"
-                f"❌ Topilmagan kodlar: {result['not_found_codes']}"
-            )
+        # Avval boshqa narx yoki list bilan yozilgan kodlar - qayta yozilmaydi
+        conflicts = format_ledger_conflicts(result['conflicts'])
+        if conflicts:
+            await bot.send_message(chat_id=chat_id, text=conflicts)
 
-            # Manager tugmalarini qaytadan ko'rsatish
-            await update.message.reply_text(
-                "🔄 Keyingi amal uchun tanlang:",
-                reply_markup=BotKeyboards.manager_persistent_keyboard()
+        # Har bir list bo'yicha natija
+        if result['list_results']:
+            await bot.send_message(
+                chat_id=chat_id,
+                text="📑 Listlar bo'yicha:\n" + format_list_results(result['list_results'])
             )
-        else:
-            # Xatolik holati
-            await update.message.reply_text(f"❌ Xatolik: {result['error']}")
 
-            # Xatolik bo'lsa ham manager tugmalarini ko'rsatish
-            await update.message.reply_text(
-                "🔄 Qaytadan urinish yoki boshqa amal tanlang:",
-                reply_markup=BotKeyboards.manager_persistent_keyboard()
-            )
+        # Qabul qilinmagan qatorlar sabab bo'yicha
+        rejections = summarize_rejections(result['rejected_rows'])
+        if rejections:
+            await bot.send_message(chat_id=chat_id, text="🚫 Qabul qilinmagan qatorlar:\n" + rejections)
 
-    except Exception as e:
-        logger.error(f"Excel fayl yuklashda xatolik: {e}")
-        await update.message.reply_text("❌ Excel fayl yuklashda xatolik yuz berdi.")
+        # Takrorlangan va bir nechta listga tegishli kodlar haqida ogohlantirish
+        warnings = format_code_warnings(result['duplicate_codes'], result['multi_list_codes'])
+        if warnings:
+            await bot.send_message(chat_id=chat_id, text=warnings)
 
-        # Exception holatida ham manager tugmalarini ko'rsatish
-        await update.message.reply_text(
-            "🔄 Qaytadan urinish yoki boshqa amal tanlang:",
+        # Manager tugmalarini qaytadan ko'rsatish
+        await bot.send_message(
+            chat_id=chat_id,
+            text="🔄 Keyingi amal uchun tanlang:",
+            reply_markup=BotKeyboards.manager_persistent_keyboard()
+        )
+    else:
+        # Xatolik holati
+        await bot.send_message(chat_id=chat_id, text=f"❌ Xatolik: {result['error']}")
+
+        # Xatolik bo'lsa ham manager tugmalarini ko'rsatish
+        await bot.send_message(
+            chat_id=chat_id,
+            text="🔄 Qaytadan urinish yoki boshqa amal tanlang:",
             reply_markup=BotKeyboards.manager_persistent_keyboard()
         )
 
-        # Vaqtinchalik faylni tozalash
-        try:
-            file_path = f"temp_{user_id}_{update.message.document.file_name if update.message.document else 'unknown'}"
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except:
-            pass
-
-async def process_excel_file(file_path, file_name):
-    """Excel faylni qayta ishlash va Google Sheets'ga yozish"""
+async def import_status_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/import_status [id] - import vazifalari holati"""
+    if not can_import_excel(update.effective_user.id):
+        return
+
+    if context.args:
+        job = import_jobs.get(_parse_job_id(context.args[0]))
+        text = job.progress_text() if job else "❌ Bunday import topilmadi."
+    else:
+        jobs = import_jobs.recent_jobs()
+        if jobs:
+            text = "📥 Oxirgi importlar:\n\n" + "\n\n".join(job.progress_text() for job in jobs)
+        else:
+            text = "📥 Importlar yo'q."
+
+    await update.message.reply_text(text)
+
+async def import_cancel_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/import_cancel <id> - o'zi boshlagan import vazifasini bekor qilish"""
+    user_id = update.effective_user.id
+    if not can_import_excel(user_id):
+        return
+
+    if not context.args:
+        await update.message.reply_text("ℹ️ Foydalanish: /import_cancel <id>")
+        return
+
+    job_id = _parse_job_id(context.args[0])
+    if import_jobs.cancel(job_id, owner_id=user_id):
+        await update.message.reply_text(f"🚫 Import #{job_id} bekor qilinmoqda...")
+    else:
+        await update.message.reply_text("❌ Bekor qilinadigan import topilmadi.")
+
+def can_subscribe(user_id):
+    """Balans o'zgarishlariga obuna bo'lish huquqi (manager yoki super user)"""
+    return can_import_excel(user_id)
+
+async def subscribe_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/subscribe qarz -500 [air|container] yoki /subscribe kod 12345 [air|container]"""
+    user_id = update.effective_user.id
+    if not can_subscribe(user_id):
+        return
+
+    rule, error = parse_rule(context.args or [])
+    if rule is None:
+        await update.message.reply_text(error)
+        return
+
+    error = subscription_engine.subscribe(user_id, rule)
+    if error:
+        await update.message.reply_text(error)
+    else:
+        await update.message.reply_text(f"🔔 Obuna qo'shildi:\n{describe_rule(rule)}")
+
+async def subscriptions_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/subscriptions - foydalanuvchi obunalari ro'yxati"""
+    user_id = update.effective_user.id
+    if not can_subscribe(user_id):
+        return
+
+    rules = subscription_engine.rules_of(user_id)
+    if rules:
+        lines = [f"{number}. {describe_rule(rule)}" for number, rule in enumerate(rules, 1)]
+        text = "🔔 Obunalaringiz:\n\n" + "\n".join(lines)
+    else:
+        text = "🔕 Obunalar yo'q.\n\n" + SUBSCRIPTION_USAGE
+    await update.message.reply_text(text)
+
+async def unsubscribe_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/unsubscribe <raqam> yoki /unsubscribe all"""
+    user_id = update.effective_user.id
+    if not can_subscribe(user_id):
+        return
+
+    if not context.args:
+        await update.message.reply_text(SUBSCRIPTION_USAGE)
+        return
+
+    if context.args[0].lower() == "all":
+        removed = subscription_engine.unsubscribe(user_id)
+    else:
+        number = _parse_job_id(context.args[0])
+        removed = subscription_engine.unsubscribe(user_id, number) if number is not None else []
+
+    if removed:
+        await update.message.reply_text(f"🔕 {len(removed)} ta obuna bekor qilindi.")
+    else:
+        await update.message.reply_text("❌ Bunday obuna topilmadi. Ro'yxat: /subscriptions")
+
+def _parse_job_id(value):
+    try:
+        return int(str(value).lstrip('#'))
+    except ValueError:
+        return None
+
+async def process_excel_file(source, file_name, progress=None):
+    """Excel faylni (xotiradagi bufer) qayta ishlash va Google Sheets'ga yozish.
+
+    progress(stage=..., done=..., total=...) - fon vazifasi holatini yangilash uchun (ixtiyoriy).
+    """
+    if progress is None:
+        progress = lambda **kwargs: None
+
+    # Bir reysni bir vaqtda ikki marta import qilmaslik (masalan, Telegram update'ni qayta yuborganda)
+    if not import_ledger.begin(file_name):
+        return {"success": False, "error": f"'{file_name}' reysi hozir import qilinmoqda"}
+
     try:
         print(f"📁 Excel fayl o'qilmoqda: {file_name}")
 
-        # Excel faylni o'qish
-        df = pd.read_excel(file_path)
-
-        print(f"📊 Excel tuzilishi:")
-        print(f"   📏 Qatorlar: {len(df)}")
-        print(f"   📐 Ustunlar: {len(df.columns)}")
-        print(f"   📋 Ustun nomlari: {list(df.columns)}")
-
-        # MARK ustunini topish
-        mark_column = None
-        for col in df.columns:
-            col_name = str(col).lower().strip()
-            if col_name == 'mark' or col_name.startswith('mark'):
-                mark_column = col
-                break
-
-        if mark_column is None:
-            print("❌ MARK ustuni topilmadi! Mavjud ustunlar:")
-            for col in df.columns:
-                print(f"   - {col}")
-            return {"success": False, "error": "MARK ustuni topilmadi"}
-
-        print(f"📋 MARK ustuni topildi: '{mark_column}'")
-
-        # TOTAL PRICE yoki TOTAL PIRCE ustunini topish
-        total_price_column = None
-        print(f"🔍 TOTAL PRICE ustunini qidirmoqda...")
-
-        for col in df.columns:
-            col_name = str(col).lower()
-            print(f"   🔎 Tekshirilmoqda: '{col}' -> '{col_name}'")
-            # TOTAL PRICE yoki TOTAL PIRCE ni qidirish
-            if 'total' in col_name and ('price' in col_name or 'pirce' in col_name):
-                total_price_column = col
-                print(f"   ✅ TOTAL PRICE ustuni topildi: '{col}'")
-                break
-
-        if total_price_column is None:
-            print("❌ TOTAL PRICE ustuni topilmadi! Mavjud ustunlar:")
-            for col in df.columns:
-                print(f"   - {col}")
-            return {"success": False, "error": "TOTAL PRICE yoki TOTAL PIRCE ustuni topilmadi"}
-
-        # MARK va TOTAL PRICE ma'lumotlarini birga olish
-        codes_with_prices = []
-
-        print(f"📊 MARK ustunidagi barcha qiymatlar: {df[mark_column].dropna().tolist()}")
-
-        for index, row in df.iterrows():
-            try:
-                mark_value = row[mark_column]
-                price_value = row[total_price_column]
-
-                # Mark qiymatini tekshirish
-                if pd.isna(mark_value):
-                    continue
-
-                # Mark kodini tozalash
-                if isinstance(mark_value, (int, float)):
-                    if pd.isna(mark_value):
-                        continue
-                    clean_code = str(int(mark_value))
-                else:
-                    clean_code = str(mark_value).strip()
-                    if not clean_code or not clean_code.isdigit():
-                        continue
+        # Manifest izi: tarkib xeshi + reys nomi
+        content_hash = await async_sheets.run(hash_stream, source)
+        fingerprint = manifest_fingerprint(content_hash, file_name)
+        seen_before = import_ledger.register_manifest(fingerprint, file_name, content_hash)
+        if seen_before:
+            print(f"♻️ Bu manifest avval yuklangan: {file_name}")
 
-                # Price qiymatini tozalash
-                if pd.isna(price_value):
-                    clean_price = 0.0
-                else:
-                    clean_price = float(price_value)
+        # Excel faylni o'qish - faqat MARK va TOTAL PRICE ustunlari (event loop'ni to'xtatmaslik uchun pool'da)
+        parsed = await async_sheets.run(parse_manifest, source, file_name)
 
-                codes_with_prices.append({
-                    'code': clean_code,
-                    'price': clean_price
-                })
+        if not parsed["success"]:
+            print(f"❌ {parsed['error']}! Mavjud ustunlar: {parsed.get('columns')}")
+            return {"success": False, "error": parsed["error"]}
 
-                print(f"✅ Qo'shildi: Kod {clean_code} → ${clean_price}")
+        print(f"📋 MARK ustuni: '{parsed['mark_column']}', TOTAL PRICE ustuni: '{parsed['price_column']}'")
+        print(f"📊 Qatorlar: {parsed['rows_total']}, qabul qilindi: {len(parsed['items'])}, "
+              f"rad etildi: {len(parsed['rejected'])}")
 
-            except Exception as e:
-                print(f"⚠️ Qatorni qayta ishlashda xatolik: {e}")
-                continue
+        # MARK va TOTAL PRICE ma'lumotlari
+        codes_with_prices = parsed["items"]
 
         if not codes_with_prices:
             return {"success": False, "error": "Kodlar topilmadi"}
@@ -661,39 +805,67 @@ async def process_excel_file(file_path, file_name):
         # Bugungi sana
         today = datetime.now().strftime("%d.%m.%Y")
 
-        # Google Sheets'ga yozish
+        # Topilgan kodlar (takrorlanganlar tartib raqami bilan)
         found_codes = []
         not_found_codes = []
-        updated_records = 0
+        found_entries = []
+
+        # Barcha kodlarni bitta users snapshot'idan aniqlash
+        progress(stage="🔎 Kodlar aniqlanmoqda...")
+        resolution = await async_sheets.resolve_user_codes([item['code'] for item in codes_with_prices])
+        if resolution is None:
+            return {"success": False, "error": "Users sheet'ni o'qib bo'lmadi"}
 
-        # Har bir kod va uning narxi uchun Google Sheets'da qidirish va update qilish
-        for item in codes_with_prices:
+        for code, count in resolution['duplicates'].items():
+            print(f"⚠️ Takrorlangan kod: {code} ({count} marta)")
+        for code, list_names in resolution['multi_list'].items():
+            print(f"⚠️ Kod bir nechta listda: {code} → {', '.join(list_names)}")
+
+        # Har bir kod va uning narxi uchun yozuv tayyorlash
+        for item in number_occurrences(codes_with_prices):
             code = item['code']
-            individual_price = item['price']
-            # Sheets'dan kod qidirish
-            user_info = sheets_manager.find_user_by_code(code)
+            user_info = resolution['found'].get(code)
             if user_info:
                 found_codes.append(code)
                 list_nomi = user_info.get('list_nomi', 'N/A')
-                print(f"✅ Kod topildi: {code} - List: {list_nomi}")
-
-                # Google Sheets'ga yozish - har bir kodning o'z narxi bilan
-                result = await update_list_sheet(list_nomi, {
-                    'sana': today,
-                    'reys': file_name,
-                    'tavsif': 'Yuk keldi',
-                    'summa': individual_price
-                })
-
-                if result:
-                    updated_records += 1
-                    print(f"📝 {list_nomi} list'iga yozildi")
-                else:
-                    print(f"❌ {list_nomi} list'iga yozishda xatolik")
+                found_entries.append(dict(item, list_nomi=list_nomi))
             else:
                 not_found_codes.append(code)
                 print(f"❌ Kod topilmadi: {code}")
 
+        # Reestr bo'yicha avval yozilgan qatorlarni ajratish - faqat yangilari yoziladi
+        plan = import_ledger.plan(file_name, found_entries)
+        print(f"📒 Reestr: yangi {len(plan['new'])}, avval yozilgan {len(plan['applied'])}, "
+              f"ziddiyatli {len(plan['conflicts'])}")
+
+        # Yangi yozuvlarni list nomi bo'yicha guruhlash - har bir kodning o'z narxi bilan qator
+        grouped_entries = {}
+        for entry in plan['new']:
+            grouped_entries.setdefault(entry['list_nomi'], []).append(entry)
+        grouped_rows = {
+            list_nomi: [{
+                'sana': today,
+                'reys': file_name,
+                'tavsif': 'Yuk keldi',
+                'summa': entry['price']
+            } for entry in entries]
+            for list_nomi, entries in grouped_entries.items()
+        }
+
+        def on_list_written(list_nomi):
+            # List yozuvi bilan bitta thread chaqiruvida reestrga qo'shiladi - qayta urinishda ikki marta yozilmaydi
+            import_ledger.record_applied(fingerprint, file_name, grouped_entries[list_nomi])
+
+        # Google Sheets'ga yozish - har bir list uchun bitta so'rov
+        progress(stage="📝 Google Sheets'ga yozilmoqda...", done=0,
+                 total=sum(len(rows) for rows in grouped_rows.values()))
+        list_results = await update_list_sheets(grouped_rows, progress, on_list_written)
+        updated_records = sum(result['rows'] for result in list_results.values() if result['success'])
+
+        # Users sheet summalari o'zgardi - monitor Air'ni darhol va tez rejimda tekshiradi
+        if updated_records:
+            poll_scheduler.poke("air")
+
         # Umumiy summa hisoblash
         total_amount = sum([item['price'] for item in codes_with_prices])
 
@@ -705,35 +877,105 @@ async def process_excel_file(file_path, file_name):
             "updated_records": updated_records,
             "codes_found": found_codes,
             "codes_not_found": not_found_codes,
-            "codes_count": len(codes_with_prices)
+            "codes_count": len(codes_with_prices),
+            "list_results": list_results,
+            "rejected_rows": parsed["rejected"],
+            "duplicate_codes": resolution['duplicates'],
+            "multi_list_codes": resolution['multi_list'],
+            "already_imported": seen_before and not plan['new'],
+            "skipped_records": len(plan['applied']),
+            "conflicts": plan['conflicts']
         }
 
     except Exception as e:
         print(f"❌ Excel qayta ishlashda xatolik: {e}")
         return {"success": False, "error": str(e)}
+    finally:
+        import_ledger.end(file_name)
 
-async def update_list_sheet(list_nomi, data):
-    """Belgilangan list'ga ma'lumot yozish (haqiqiy Google Sheets)"""
-    try:
-        print(f"🔄 '{list_nomi}' list'iga yozilmoqda:")
-        print(f"   📅 Sana: {data['sana']}")
-        print(f"   ✈️ Reys: {data['reys']}")
-        print(f"   📦 Tavsif: {data['tavsif']}")
-        print(f"   💰 Summa: {data['summa']}")
+async def _await_list_write(write):
+    """Boshlangan list yozuvini oxirigacha kutish - (natija, bekor qilish so'ralganmi).
 
-        # Haqiqiy Google Sheets'ga yozish
-        success = sheets_manager.write_to_list_sheet(list_nomi, data)
+    Bekor qilish so'rovi yozuvni to'xtatmaydi: list yozilib, reestrga kiritilgandan keyin chaqiruvchi to'xtaydi.
+    """
+    cancel_requested = False
+    while True:
+        try:
+            return await asyncio.shield(write), cancel_requested
+        except asyncio.CancelledError:
+            if write.cancelled():
+                raise
+            cancel_requested = True
+
+async def update_list_sheets(grouped_rows, progress=None, on_list_written=None):
+    """List nomi bo'yicha guruhlangan qatorlarni yozish (haqiqiy Google Sheets).
+
+    Har bir list yozuvi va on_list_written bitta thread chaqiruvida bajariladi, timeout va bekor qilish
+    faqat listlar orasida ta'sir qiladi.
+    """
+    results = {}
+    written = 0
+    for list_nomi, rows in grouped_rows.items():
+        print(f"🔄 '{list_nomi}' list'iga {len(rows)} ta qator yozilmoqda")
+        # Haqiqiy Google Sheets'ga yozish - har bir list uchun bitta append_rows
+        result, cancel_requested = await _await_list_write(
+            async_sheets.write_list_rows(list_nomi, rows, on_list_written)
+        )
 
-        if success:
+        results[list_nomi] = result
+        if result['success']:
+            written += result['rows']
             print(f"✅ '{list_nomi}' list'iga haqiqatan yozildi!")
-            return True
         else:
-            print(f"❌ '{list_nomi}' list'iga yozishda xatolik")
-            return False
+            print(f"❌ '{list_nomi}' list'iga yozishda xatolik: {result['error']}")
 
-    except Exception as e:
-        print(f"❌ List update'da xatolik: {e}")
-        return False
+        if progress is not None:
+            progress(done=written)
+
+        if cancel_requested:
+            print(f"🚫 Import '{list_nomi}' list'idan keyin to'xtatildi")
+            raise asyncio.CancelledError()
+
+    return results
+
+def format_list_results(list_results, limit=40):
+    """List bo'yicha yozish natijalarini qisqa matnga aylantirish"""
+    lines = []
+    for list_nomi, result in list(list_results.items())[:limit]:
+        if result['success']:
+            lines.append(f"   ✅ {list_nomi}: {result['rows']} ta")
+        else:
+            lines.append(f"   ❌ {list_nomi}: {result['error']}")
+    if len(list_results) > limit:
+        lines.append(f"   ... va yana {len(list_results) - limit} ta list")
+    return "\n".join(lines)
+
+def format_ledger_conflicts(conflicts, limit=30):
+    """Reestrdagi yozuvdan farq qiladigan kodlar haqida qisqa matn"""
+    if not conflicts:
+        return ""
+    lines = [f"⚠️ Avval boshqa qiymat bilan yozilgan kodlar (yozilmadi): {len(conflicts)} ta"]
+    for item in conflicts[:limit]:
+        lines.append(
+            f"   🔁 {item['code']}: {item['old_price']:.2f} $ ({item['old_list_nomi']}) → "
+            f"{item['price']:.2f} $ ({item['list_nomi']})"
+        )
+    if len(conflicts) > limit:
+        lines.append(f"   ... va yana {len(conflicts) - limit} ta")
+    return "\n".join(lines)
+
+def format_code_warnings(duplicate_codes, multi_list_codes, limit=30):
+    """Takrorlangan va bir nechta listdagi kodlar haqida qisqa matn"""
+    lines = []
+    if duplicate_codes:
+        lines.append(f"⚠️ Faylda takrorlangan kodlar: {len(duplicate_codes)} ta")
+        for code, count in list(duplicate_codes.items())[:limit]:
+            lines.append(f"   🔁 {code}: {count} marta")
+    if multi_list_codes:
+        lines.append(f"⚠️ Bir nechta listda uchragan kodlar: {len(multi_list_codes)} ta")
+        for code, list_names in list(multi_list_codes.items())[:limit]:
+            lines.append(f"   📑 {code}: {', '.join(list_names)} (yozildi: {list_names[0]})")
+    return "\n".join(lines)
 
 async def code_verification_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Kod tasdiqlash handler'i"""
@@ -778,7 +1020,7 @@ async def handle_balance_request(update, phone_number, user_id):
 
     try:
         # Google Sheets'dan balans ma'lumotini olish
-        balance_info = sheets_manager.find_user_balance(phone_number)
+        balance_info = await async_sheets.find_user_balance(phone_number)
 
         if balance_info:
             text = sheets_manager.format_balance_message(balance_info)
@@ -812,14 +1054,14 @@ async def handle_container_request(update, phone_number, user_id):
 
     try:
         # Google Sheets'dan foydalanuvchi ma'lumotini olish
-        user_info = sheets_manager.find_user_by_phone(phone_number)
+        user_info = await async_sheets.find_user_by_phone(phone_number)
 
         if not user_info or not user_info.get('kod'):
             text = "❌ Sizning kodingiz tizimda topilmadi."
         else:
             user_kod = user_info.get('kod')
             # Container ma'lumotini olish
-            container_info = sheets_manager.find_user_container_data(user_kod)
+            container_info = await async_sheets.find_user_container_data(user_kod)
 
             if container_info:
                 text = sheets_manager.format_user_container_message(container_info)
@@ -853,14 +1095,14 @@ async def handle_total_balance_request(update, phone_number, user_id):
 
     try:
         # Air balansini olish
-        air_balance_info = sheets_manager.find_user_balance(phone_number)
+        air_balance_info = await async_sheets.find_user_balance(phone_number)
 
         # Container balansini olish
         container_info = None
-        user_info = sheets_manager.find_user_by_phone(phone_number)
+        user_info = await async_sheets.find_user_by_phone(phone_number)
         if user_info and user_info.get('kod'):
             user_kod = user_info.get('kod')
-            container_info = sheets_manager.find_user_container_data(user_kod)
+            container_info = await async_sheets.find_user_container_data(user_kod)
 
         # Umumiy balans xabarini formatlash
         text = sheets_manager.format_total_balance_message(air_balance_info, container_info)
@@ -891,47 +1133,26 @@ async def handle_manager_air_keyboard(update):
     print("✈️ Manager Air: Musbat balanslar yuklanmoqda...")
     # Loading xabari
     await update.message.reply_text("⏳ Musbat balanslar ro'yxati yuklanmoqda...")
-
-    try:
-        # Faqat 5$ dan ko'p musbat balansga ega mijozlarni olish
-        positive_users = sheets_manager.get_positive_balances_over_amount(5.0)
-        print(f"✅ Air musbat balanslar: {len(positive_users)} ta mijoz (5$+)")
-
-        # Musbat balanslar ro'yxatini formatlash (Markdown formatida)
-        text = sheets_manager.format_positive_balances_message(positive_users)
-
-    except Exception as e:
-        print(f"❌ Air musbat balanslar xatolik: {e}")
-        logger.error(f"Musbat balanslar ro'yxatini olishda xatolik: {e}")
-        text = "❌ Musbat balanslar ro'yxatini olishda xatolik yuz berdi."
-
-    await update.message.reply_text(
-        text,
-        parse_mode="Markdown"
-    )
+    await send_manager_report(update, REPORT_AIR)
 
 async def handle_manager_container_keyboard(update):
     """Manager Container tugmasi uchun handler"""
     print("📦 Manager Container: Ma'lumotlar yuklanmoqda...")
     # Loading xabari
     await update.message.reply_text("⏳ Container ma'lumotlari yuklanmoqda...")
+    await send_manager_report(update, REPORT_CONTAINER)
 
+async def send_manager_report(update, kind):
+    """Hisobotning birinchi sahifasini yangi xabar sifatida yuborish (varaqlash tugmalari bilan)"""
     try:
-        # Container sheet'dan 5$ dan yuqori summalarni olish
-        container_data = sheets_manager.get_container_data()
-
-        # Container ma'lumotlarini formatlash
-        text = sheets_manager.format_container_message(container_data)
-
+        session = await open_manager_report(kind, update.effective_user.id)
     except Exception as e:
-        print(f"❌ Container ma'lumotlarini olishda xatolik: {e}")
-        logger.error(f"Container ma'lumotlarini olishda xatolik: {e}")
-        text = "❌ Container ma'lumotlarini olishda xatolik yuz berdi."
+        logger.error(f"Hisobotni ochishda xatolik ({kind}): {e}")
+        await update.message.reply_text("❌ Ma'lumotlarni olishda xatolik yuz berdi.")
+        return
 
-    await update.message.reply_text(
-        text,
-        parse_mode="Markdown"
-    )
+    await update.message.reply_text(stamp_page(session.pages[0]), reply_markup=report_keyboard(session),
+                                    parse_mode="Markdown")
 
 async def handle_investor_foyda_keyboard(update):
     """Investor Foyda tugmasi uchun handler"""
@@ -0,0 +1,130 @@
+"""
+Sheet snapshot'lari orasidagi o'zgarishlarni aniqlash (avval butun tana xeshi, keyin qatorlar)
+"""
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, List, NamedTuple, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class Change(NamedTuple):
+    """Bitta kalit bo'yicha o'zgarish (old - diskdan tiklangan holatda None bo'lishi mumkin)"""
+    key: Hashable
+    old: Any
+    new: Any
+    old_value: Any
+    new_value: Any
+
+
+class ChangeTracker(Generic[T]):
+    """Oxirgi ko'rilgan holatni saqlaydi va faqat o'zgargan kalitlarni qaytaradi"""
+
+    def __init__(self, key_fn: Callable[[T], Hashable], value_fn: Callable[[T], Any],
+                 encode_value: Callable[[Any], Any] = None, decode_value: Callable[[Any], Any] = None):
+        self.key_fn = key_fn
+        self.value_fn = value_fn
+        # Qiymatlarni JSON'ga yozish va o'qish uchun (masalan, Money <-> "1234.50")
+        self.encode_value = encode_value or (lambda value: value)
+        self.decode_value = decode_value or (lambda value: value)
+        # kalit -> (qiymat, yozuv)
+        self.state: Dict[Hashable, Tuple[Any, T]] = {}
+        self.version: Optional[int] = None
+        self.digest: Optional[str] = None
+        # Oxirgi saqlashdan keyin holat o'zgarganmi
+        self.dirty = False
+
+    def is_unchanged(self, version: Optional[int], digest: Optional[str]) -> bool:
+        """Snapshot oldingisi bilan bir xilmi (versiya yoki tana xeshi bo'yicha)"""
+        if version is not None and version == self.version:
+            return True
+        return digest is not None and digest == self.digest
+
+    def update(self, records: Iterable[T], version: Optional[int] = None,
+               digest: Optional[str] = None) -> List[Change]:
+        """Yangi snapshot'ni qabul qilish va o'zgargan kalitlar ro'yxatini qaytarish"""
+        if self.is_unchanged(version, digest):
+            self.version = version
+            return []
+
+        # Bir kalit bir necha marta kelsa, oxirgisi hisobga olinadi
+        latest: Dict[Hashable, T] = {}
+        key_fn = self.key_fn
+        for record in records:
+            latest[key_fn(record)] = record
+
+        changes: List[Change] = []
+        state = self.state
+        value_fn = self.value_fn
+        for key, record in latest.items():
+            value = value_fn(record)
+            previous = state.get(key)
+            if previous is None:
+                # Birinchi marta ko'rilgan kalit - faqat boshlang'ich qiymat sifatida saqlash
+                state[key] = (value, record)
+                self.dirty = True
+            elif previous[0] != value:
+                changes.append(Change(key, previous[1], record, previous[0], value))
+                state[key] = (value, record)
+                self.dirty = True
+            elif previous[1] is None:
+                state[key] = (value, record)
+
+        if digest != self.digest:
+            self.dirty = True
+        self.version = version
+        self.digest = digest
+        return changes
+
+    def dump(self) -> Dict[str, Any]:
+        """Saqlash uchun ixcham holat: tana xeshi va kalit -> qiymat"""
+        encode = self.encode_value
+        return {"digest": self.digest, "values": {str(key): encode(value) for key, (value, _) in self.state.items()}}
+
+    def restore(self, data: Dict[str, Any]):
+        """Diskdan o'qilgan holatni tiklash - yozuvlar keyingi snapshot'da to'ldiriladi"""
+        decode = self.decode_value
+        self.state = {key: (decode(value), None) for key, value in data.get("values", {}).items()}
+        self.digest = data.get("digest")
+        self.version = None
+        self.dirty = False
+
+
+def save_tracker_states(path: str, trackers: Dict[str, ChangeTracker]):
+    """Tracker'lar holatini faylga atomik yozish (vaqtinchalik fayl + os.replace)"""
+    payload = {name: tracker.dump() for name, tracker in trackers.items()}
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".monitor_state.", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    for tracker in trackers.values():
+        tracker.dirty = False
+
+
+def load_tracker_states(path: str, trackers: Dict[str, ChangeTracker]) -> bool:
+    """Saqlangan holatni tracker'larga yuklash (fayl yo'q yoki buzilgan bo'lsa False)"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as e:
+        logger.warning(f"Monitor holatini o'qib bo'lmadi ({path}): {e}")
+        return False
+
+    for name, tracker in trackers.items():
+        if name in payload:
+            tracker.restore(payload[name])
+    return True
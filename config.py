@@ -1,9 +1,102 @@
+import atexit
 import os
 
+from money import Money
+from state_store import create_state_store
+
 def get_bot_token():
     """Bot tokenini muhit o'zgaruvchisidan olish"""
     return os.getenv("BOT_TOKEN", "")
 
+def get_sheet_cache_ttl():
+    """Sheet snapshot keshining amal qilish muddati (soniya)"""
+    try:
+        return float(os.getenv("SHEET_CACHE_TTL", "5"))
+    except ValueError:
+        return 5.0
+
+def get_sheets_io_workers():
+    """Sheets so'rovlari uchun thread pool hajmi"""
+    try:
+        return max(1, int(os.getenv("SHEETS_IO_WORKERS", "8")))
+    except ValueError:
+        return 8
+
+def get_sheets_call_timeout():
+    """Bitta Sheets chaqiruvi uchun maksimal kutish vaqti (soniya)"""
+    try:
+        return float(os.getenv("SHEETS_CALL_TIMEOUT", "30"))
+    except ValueError:
+        return 30.0
+
+def get_http_timeouts():
+    """Sheet eksportlari uchun (ulanish, o'qish) timeout'lari (soniya)"""
+    try:
+        return (float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+                float(os.getenv("HTTP_READ_TIMEOUT", "20")))
+    except ValueError:
+        return (5.0, 20.0)
+
+def get_upload_spool_size():
+    """Yuklangan fayl shu hajmdan (bayt) oshsa, xotira o'rniga vaqtinchalik faylga o'tkaziladi"""
+    try:
+        return int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+    except ValueError:
+        return 8 * 1024 * 1024
+
+def get_import_max_concurrent():
+    """Bir vaqtda bajariladigan Excel importlari soni"""
+    try:
+        return max(1, int(os.getenv("IMPORT_MAX_CONCURRENT", "2")))
+    except ValueError:
+        return 2
+
+def get_import_progress_interval():
+    """Import progress xabarini tahrirlash oralig'i (soniya)"""
+    try:
+        return float(os.getenv("IMPORT_PROGRESS_INTERVAL", "3"))
+    except ValueError:
+        return 3.0
+
+def get_import_ledger_path():
+    """Qo'llangan importlar reestri (SQLite) fayli"""
+    return os.getenv("IMPORT_LEDGER_PATH", "import_ledger.db")
+
+def get_monitor_state_path():
+    """Balans monitori oxirgi ko'rgan holat saqlanadigan fayl"""
+    return os.getenv("MONITOR_STATE_PATH", "monitor_state.json")
+
+def get_monitor_intervals():
+    """Monitor polling oraliqlari (soniya): (tez, Air sekin, Container sekin)"""
+    try:
+        return (float(os.getenv("MONITOR_FAST_INTERVAL", "5")),
+                float(os.getenv("MONITOR_AIR_SLOW_INTERVAL", "30")),
+                float(os.getenv("MONITOR_CONTAINER_SLOW_INTERVAL", "60")))
+    except ValueError:
+        return (5.0, 30.0, 60.0)
+
+def get_monitor_max_backoff():
+    """Kvota/server xatoliklarida maksimal kutish (soniya)"""
+    try:
+        return float(os.getenv("MONITOR_MAX_BACKOFF", "300"))
+    except ValueError:
+        return 300.0
+
+def get_report_page_rows():
+    """Manager hisobotlarida bir sahifadagi qatorlar soni"""
+    try:
+        return max(1, int(os.getenv("REPORT_PAGE_ROWS", "30")))
+    except ValueError:
+        return 30
+
+def get_state_backend():
+    """Holat ombori turi: sqlite (standart) yoki memory"""
+    return os.getenv("STATE_BACKEND", "sqlite").lower()
+
+def get_state_db_path():
+    """Foydalanuvchi holati saqlanadigan SQLite fayli"""
+    return os.getenv("STATE_DB_PATH", "bot_state.db")
+
 # Rol identifikatorlari
 ROLES = {
     "MIJOZ": "mijoz",
@@ -23,6 +116,101 @@ AUTHENTICATED_USERS = {}
 # Kod kutayotgan foydalanuvchilar
 PENDING_CODE_VERIFICATION = {}
 
+# Manager/super user obunalari - user_id -> qoidalar ro'yxati
+USER_SUBSCRIPTIONS = {}
+
+# Teskari indekslar - bildirishnomalar uchun O(1) qidiruv
+AUTH_PHONE_INDEX = {}  # tozalangan telefon -> user_id
+AUTH_KOD_INDEX = {}  # kod -> user_id
+
+# Diskka saqlanadigan dict'lar (namespace -> dict) - dict'larning o'zi xotiradagi kesh
+_PERSISTED_STATE = {
+    "roles": USER_ROLES,
+    "phones": USER_PHONE_NUMBERS,
+    "auth": AUTHENTICATED_USERS,
+    "pending": PENDING_CODE_VERIFICATION,
+    "subscriptions": USER_SUBSCRIPTIONS,
+}
+
+# Holat ombori (birinchi ishlatilganda ochiladi)
+_state_store = None
+
+def get_state_store():
+    """Holat omborini olish"""
+    global _state_store
+    if _state_store is None:
+        _state_store = create_state_store(get_state_backend(), get_state_db_path())
+        # Oddiy chiqishda ham bufer yozib qo'yiladi
+        atexit.register(close_state)
+    return _state_store
+
+def _persist(namespace, user_id, value):
+    """O'zgarishni saqlash uchun buferga qo'yish (xatolik bot ishini to'xtatmaydi)"""
+    try:
+        get_state_store().put(namespace, user_id, value)
+    except Exception as e:
+        print(f"❌ Holatni saqlashda xatolik ({namespace}): {e}")
+
+def _forget(namespace, user_id):
+    try:
+        get_state_store().delete(namespace, user_id)
+    except Exception as e:
+        print(f"❌ Holatni o'chirishda xatolik ({namespace}): {e}")
+
+def _restore_key(key):
+    # Telegram user_id'lar int sifatida ishlatiladi
+    try:
+        return int(key)
+    except ValueError:
+        return key
+
+# Sessiya dict'laridagi Money maydonlari - diskda "1234.50" matni bo'lib saqlanadi
+_MONEY_FIELDS = {"auth": ("summa",), "pending": ("summa",)}
+
+def _restore_value(namespace, value):
+    # Matnga aylangan summalarni yana Money qilish (aks holda Money bilan solishtirish TypeError beradi)
+    fields = _MONEY_FIELDS.get(namespace)
+    if not fields or not isinstance(value, dict):
+        return value
+    for field in fields:
+        if value.get(field) is not None:
+            try:
+                value[field] = Money.of(value[field])
+            except (TypeError, ValueError):
+                print(f"⚠️ Saqlangan summa o'qilmadi ({namespace}/{field}): {value[field]!r}")
+    return value
+
+def restore_state():
+    """Saqlangan rollar, telefonlar va sessiyalarni xotiraga tiklash (ishga tushishda)"""
+    try:
+        saved = get_state_store().load()
+    except Exception as e:
+        print(f"❌ Saqlangan holatni o'qishda xatolik: {e}")
+        return {}
+
+    counts = {}
+    for namespace, target in _PERSISTED_STATE.items():
+        items = saved.get(namespace, {})
+        for key, value in items.items():
+            target[_restore_key(key)] = _restore_value(namespace, value)
+        counts[namespace] = len(items)
+
+    # Teskari indekslarni qayta qurish (birinchisi saqlanadi)
+    for user_id, user_data in AUTHENTICATED_USERS.items():
+        phone, kod = _auth_index_keys(user_data)
+        if phone:
+            AUTH_PHONE_INDEX.setdefault(phone, user_id)
+        if kod:
+            AUTH_KOD_INDEX.setdefault(kod, user_id)
+    return counts
+
+def close_state():
+    """Buferdagi o'zgarishlarni yozib, omborni yopish (to'xtashda)"""
+    global _state_store
+    if _state_store is not None:
+        _state_store.close()
+        _state_store = None
+
 # Belgilangan foydalanuvchilar - ID'lari asosida avtomatik rol berish
 PREDEFINED_USERS = {
     # Mijozlar ID'lari - bo'sh, chunki boshqa ID'lar avtomatik mijoz bo'ladi
@@ -59,7 +247,9 @@ def get_user_role(user_id):
 def set_user_role(user_id, role):
     """Foydalanuvchi rolini o'rnatish"""
     if role in ROLES.values():
-        USER_ROLES[user_id] = role
+        if USER_ROLES.get(user_id) != role:
+            USER_ROLES[user_id] = role
+            _persist("roles", user_id, role)
         return True
     return False
 
@@ -78,14 +268,64 @@ def get_predefined_role(user_id):
 def save_user_phone(user_id, phone_number):
     """Foydalanuvchi telefon raqamini saqlash"""
     USER_PHONE_NUMBERS[user_id] = phone_number
+    _persist("phones", user_id, phone_number)
 
 def get_user_phone(user_id):
     """Foydalanuvchi telefon raqamini olish"""
     return USER_PHONE_NUMBERS.get(user_id)
 
+def _auth_index_keys(user_data):
+    """Autentifikatsiya ma'lumotidan teskari indeks kalitlarini olish"""
+    phone = ''.join(filter(str.isdigit, str(user_data.get('telefon', '') or '')))
+    kod = str(user_data.get('kod', '') or '')
+    return phone, kod
+
+def _unlink_auth_index(index, key, user_id, field):
+    """Indeksdan user_id ni olib tashlash - shu kalitli boshqa foydalanuvchi bo'lsa, unga o'tkazish"""
+    if not key or index.get(key) != user_id:
+        return
+    del index[key]
+    for uid, data in AUTHENTICATED_USERS.items():
+        if uid != user_id and _auth_index_keys(data)[field] == key:
+            index[key] = uid
+            break
+
 def set_authenticated_user(user_id, user_data):
     """Foydalanuvchini autentifikatsiya qilingan deb belgilash"""
+    # Qayta autentifikatsiyada eski telefon/kod indekslarini tozalash
+    old_data = AUTHENTICATED_USERS.get(user_id)
+    if old_data is not None:
+        old_phone, old_kod = _auth_index_keys(old_data)
+        _unlink_auth_index(AUTH_PHONE_INDEX, old_phone, user_id, 0)
+        _unlink_auth_index(AUTH_KOD_INDEX, old_kod, user_id, 1)
+
     AUTHENTICATED_USERS[user_id] = user_data
+    _persist("auth", user_id, user_data)
+
+    # Bir xil telefon/kod bilan bir necha foydalanuvchi bo'lsa, birinchisi saqlanadi
+    phone, kod = _auth_index_keys(user_data)
+    if phone:
+        AUTH_PHONE_INDEX.setdefault(phone, user_id)
+    if kod:
+        AUTH_KOD_INDEX.setdefault(kod, user_id)
+
+def remove_authenticated_user(user_id):
+    """Foydalanuvchi autentifikatsiyasini bekor qilish"""
+    user_data = AUTHENTICATED_USERS.pop(user_id, None)
+    if user_data is None:
+        return
+    _forget("auth", user_id)
+    phone, kod = _auth_index_keys(user_data)
+    _unlink_auth_index(AUTH_PHONE_INDEX, phone, user_id, 0)
+    _unlink_auth_index(AUTH_KOD_INDEX, kod, user_id, 1)
+
+def find_authenticated_user_by_phone(clean_phone):
+    """Tozalangan telefon raqam bo'yicha autentifikatsiya qilingan user_id ni topish"""
+    return AUTH_PHONE_INDEX.get(clean_phone)
+
+def find_authenticated_user_by_kod(kod):
+    """Kod bo'yicha autentifikatsiya qilingan user_id ni topish"""
+    return AUTH_KOD_INDEX.get(kod)
 
 def is_user_authenticated(user_id):
     """Foydalanuvchi autentifikatsiya qilinganligini tekshirish"""
@@ -94,6 +334,7 @@ def is_user_authenticated(user_id):
 def set_pending_verification(user_id, user_data):
     """Foydalanuvchini kod kutish holatiga qo'yish"""
     PENDING_CODE_VERIFICATION[user_id] = user_data
+    _persist("pending", user_id, user_data)
 
 def get_pending_verification(user_id):
     """Kod kutayotgan foydalanuvchi ma'lumotini olish"""
@@ -103,6 +344,20 @@ def remove_pending_verification(user_id):
     """Kod kutish holatini o'chirish"""
     if user_id in PENDING_CODE_VERIFICATION:
         del PENDING_CODE_VERIFICATION[user_id]
+        _forget("pending", user_id)
+
+def get_user_subscriptions(user_id):
+    """Foydalanuvchi obuna qoidalarini olish"""
+    return USER_SUBSCRIPTIONS.get(user_id, [])
+
+def set_user_subscriptions(user_id, rules):
+    """Foydalanuvchi obuna qoidalarini saqlash (bo'sh ro'yxat - obunalarni o'chirish)"""
+    if rules:
+        USER_SUBSCRIPTIONS[user_id] = rules
+        _persist("subscriptions", user_id, rules)
+    elif user_id in USER_SUBSCRIPTIONS:
+        del USER_SUBSCRIPTIONS[user_id]
+        _forget("subscriptions", user_id)
 
 # Har bir investor uchun alohida Google Sheets konfiguratsiyasi
 INVESTOR_SHEETS_CONFIG = {
@@ -1,16 +1,47 @@
 import gspread
-import requests
 import json
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone, timedelta
 from google.oauth2.service_account import Credentials
 
+from balance_columns import BalanceColumns
+from sheet_cache import sheet_cache
+from sheet_csv import export_csv_url, fetch_csv_rows
+from sheet_records import format_amount
+from money import Money, ZERO, parse_money
+from sheet_tables import ContainerTable, UsersTable
+from message_render import (MAX_MESSAGE_LENGTH, TIMESTAMP_RESERVE, Column, TableLayout, render_pages,
+                            timestamp_line)
+
+# Hisobot jadvallari maketlari (bir marta quriladi)
+POSITIVE_LAYOUT = TableLayout(Column('№', 3, clip=False), Column('Kod', 8, ellipsis=True),
+                              Column('Balans', 12, clip=False))
+DEBTORS_LAYOUT = TableLayout(Column('№', 3, clip=False), Column('Kod', 8), Column('Qarzdorlik', 12, clip=False))
+CONTAINER_LAYOUT = TableLayout(Column('№', 3, clip=False), Column('Ism', 12, ellipsis=True),
+                               Column('Kod', 8, ellipsis=True), Column('Balans', 12, clip=False))
+PROFIT_LAYOUT = TableLayout(Column('Tavsif', 20, ellipsis=True), Column('Summa', 12, clip=False))
+
+MONTH_NAMES = {
+    "01": "Yanvar", "02": "Fevral", "03": "Mart", "04": "Aprel",
+    "05": "May", "06": "Iyun", "07": "Iyul", "08": "Avgust",
+    "09": "Sentyabr", "10": "Oktyabr", "11": "Noyabr", "12": "Dekabr"
+}
+
 class GoogleSheetsManager:
+    USERS_GID = 1544289461  # users sheet ID
+    CONTAINER_SHEET_ID = "1k7RMqNH75kTmw88pFGUh7Yg-kgxswz4q1616vxo2HBE"
+    CONTAINER_GID = "267785141"  # U list gid
+
     def __init__(self):
         self.sheet_id = "18OUICCqjaN4QvpfxC2YHnwA4gHSoy51eGKyPszFhXSQ"
         self.client = None
         self.worksheet = None
         self.gc = None  # gspread client for write operations
+        # Yozish uchun ochilgan spreadsheet/worksheet handle'lari (har yozishda qayta ochilmaydi)
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._write_lock = threading.Lock()
 
     def connect_with_api_key(self, api_key: str):
         """Google API kaliti bilan ulanish"""
@@ -41,109 +72,57 @@ class GoogleSheetsManager:
             print(f"❌ Service account bilan ulanishda xatolik: {e}")
             return False
 
+    def _download_csv_rows(self, sheet_id, gid, previous=None):
+        """CSV eksportni yuklab olish va qatorlarga ajratish (o'zgarmagan bo'lsa None)"""
+        if previous is None:
+            return fetch_csv_rows(export_csv_url(sheet_id, gid))
+        return fetch_csv_rows(export_csv_url(sheet_id, gid),
+                              etag=previous.etag, last_modified=previous.last_modified)
+
+    def get_sheet_snapshot(self, sheet_id, gid):
+        """Sheet snapshot'ini umumiy keshdan olish (kerak bo'lsa yuklash)"""
+        return sheet_cache.get(sheet_id, gid, lambda previous: self._download_csv_rows(sheet_id, gid, previous))
+
     def get_public_sheet_data(self, gid=None):
         """Public sheet'dan ma'lumot olish (Google Sheets API orqali)"""
         try:
             # Agar gid berilmasa, users sheet (default)
             if gid is None:
-                gid = 1544289461  # users sheet ID
-
-            # CSV format'da olish (public sheets uchun)
-            url = f"https://docs.google.com/spreadsheets/d/{self.sheet_id}/export?format=csv&gid={gid}"
-            response = requests.get(url)
-            response.raise_for_status()
-
-            # CSV ma'lumotlarini parse qilish
-            lines = response.text.strip().split('\n')
-            data = []
-            for line in lines:
-                if line.strip():  # Bo'sh qatorlarni o'tkazib yuborish
-                    # Oddiy CSV parsing
-                    row = [cell.strip('"').strip() for cell in line.split(',')]
-                    data.append(row)
-
-            return data
+                gid = self.USERS_GID
+
+            return self.get_sheet_snapshot(self.sheet_id, gid).rows
         except Exception as e:
             print(f"Sheet'dan ma'lumot olishda xatolik: {e}")
             return None
 
+    def get_users_snapshot(self):
+        """Users sheet snapshot'i (xatolik bo'lsa exception ko'tariladi)"""
+        return self.get_sheet_snapshot(self.sheet_id, self.USERS_GID)
+
+    def users_table_of(self, snapshot) -> UsersTable:
+        """Berilgan snapshot uchun users jadvali (bir marta quriladi)"""
+        return snapshot.derived("users_table", lambda snap: UsersTable.from_rows(snap.rows, self.clean_amount))
+
+    def get_users_table(self) -> UsersTable:
+        """Users sheet'ning indekslangan jadvalini olish (har snapshot uchun bir marta quriladi)"""
+        return self.users_table_of(self.get_users_snapshot())
+
+    def balance_columns_of(self, snapshot) -> BalanceColumns:
+        """Berilgan snapshot balanslarining ustunli ko'rinishi (bir marta quriladi)"""
+        return snapshot.derived("balance_columns", lambda snap: BalanceColumns(self.users_table_of(snap).users))
+
+    def get_balance_columns(self) -> BalanceColumns:
+        """Users sheet balanslarining ustunli ko'rinishi (hisobotlar uchun)"""
+        return self.balance_columns_of(self.get_users_snapshot())
+
     def find_user_by_phone(self, phone_number: str) -> Optional[Dict[str, Any]]:
         """Telefon raqam bo'yicha foydalanuvchini topish"""
         try:
-            # Users sheet'dan ma'lumot olish
-            users_data = self.get_public_sheet_data()  # Default users sheet
-            if not users_data or len(users_data) <= 1:  # Header qatori mavjudligini tekshirish
+            user = self.get_users_table().find_by_phone(phone_number)
+            if user is None:
                 return None
 
-            # Telefon raqamini tozalash (faqat raqamlar)
-            clean_phone = ''.join(filter(str.isdigit, phone_number))
-
-            # Header qatorini o'tkazib yuborish
-            for i, row in enumerate(users_data[1:], start=2):
-                if not row or len(row) < 5:
-                    continue
-
-                try:
-                    # A ustuni: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa
-                    telefon = str(row[0]).strip()
-                    ism = row[1].strip() if len(row) > 1 else ""
-                    list_nomi = row[2].strip() if len(row) > 2 else ""
-                    kod = row[3].strip() if len(row) > 3 else ""
-
-                    # Summani E va F ustunidan birlashtirish (CSV vergul muammosi)
-                    raw_summa = row[4].strip() if len(row) > 4 else "0"
-
-                    # F ustunini tekshirish - onlik qism bo'lishi mumkin
-                    if len(row) > 5 and row[5].strip().isdigit():
-                        f_value = row[5].strip()
-                        # E va F ni vergul bilan birlashtirish
-                        full_summa = f"{raw_summa},{f_value}"
-                    else:
-                        full_summa = raw_summa
-
-                    summa = self.clean_amount(full_summa)
-
-                    # Telefon raqamlarni tozalash va taqqoslash
-                    clean_sheet_phone = ''.join(filter(str.isdigit, telefon))
-
-
-                    # Telefon raqam bo'yicha qidirish - turli formatlarni tekshirish
-                    match_found = False
-                    if clean_phone and clean_sheet_phone:
-                        # To'liq taqqoslash
-                        if clean_phone == clean_sheet_phone:
-                            match_found = True
-                        # 998 bilan boshlanuvchi raqamlarni 9 raqamli raqam bilan taqqoslash
-                        elif clean_phone.startswith('998') and len(clean_phone) >= 12:
-                            local_part = clean_phone[3:]  # 998 dan keyingi qism
-                            if local_part == clean_sheet_phone or clean_sheet_phone.endswith(local_part):
-                                match_found = True
-                        # 9 raqamli raqamni 998 bilan boshlanuvchi bilan taqqoslash  
-                        elif clean_sheet_phone.startswith('998') and len(clean_sheet_phone) >= 12:
-                            sheet_local_part = clean_sheet_phone[3:]  # 998 dan keyingi qism
-                            if clean_phone == sheet_local_part or clean_phone.endswith(sheet_local_part):
-                                match_found = True
-                        # Oxirgi 9 raqamni taqqoslash
-                        elif len(clean_phone) >= 9 and len(clean_sheet_phone) >= 9:
-                            if clean_phone[-9:] == clean_sheet_phone[-9:]:
-                                match_found = True
-
-                    if match_found:
-                        user_info = {
-                            "telefon": telefon,
-                            "ism": ism,
-                            "list_nomi": list_nomi,
-                            "kod": kod,
-                            "summa": summa,
-                            "row_number": i
-                        }
-                        return user_info
-
-                except (ValueError, IndexError) as e:
-                    print(f"Row {i} da xatolik: {e}")
-                    continue
-
-            return None
+            return user.to_user_info()
 
         except Exception as e:
             print(f"Foydalanuvchi topishda xatolik: {e}")
@@ -152,163 +131,127 @@ class GoogleSheetsManager:
     def find_user_by_code(self, code: str) -> Optional[Dict[str, Any]]:
         """Kod bo'yicha foydalanuvchini topish"""
         try:
-            # Users sheet'dan ma'lumot olish
-            users_data = self.get_public_sheet_data()  # Default users sheet
-            if not users_data or len(users_data) <= 1:
+            user = self.get_users_table().find_by_code(code)
+            if user is None:
                 return None
 
-            # Kodni tozalash
-            clean_code = str(code).strip()
-
-            # Header qatorini o'tkazib yuborish
-            for i, row in enumerate(users_data[1:], start=2):
-                if not row or len(row) < 4:
-                    continue
-
-                try:
-                    # A ustuni: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa
-                    telefon = str(row[0]).strip()
-                    ism = row[1].strip() if len(row) > 1 else ""
-                    list_nomi = row[2].strip() if len(row) > 2 else ""
-                    kod = str(row[3]).strip() if len(row) > 3 else ""
-
-                    # Summani E va F ustunidan birlashtirish
-                    raw_summa = row[4].strip() if len(row) > 4 else "0"
-
-                    # F ustunini tekshirish - onlik qism bo'lishi mumkin
-                    if len(row) > 5 and row[5].strip().isdigit():
-                        f_value = row[5].strip()
-                        full_summa = f"{raw_summa},{f_value}"
-                    else:
-                        full_summa = raw_summa
-
-                    summa = self.clean_amount(full_summa)
-
-                    # Kod bo'yicha qidirish - clean_code ni kod bilan solishtirish
-                    # Float qiymatlarni string'ga o'tkazish (1111.0 -> 1111)
-                    if '.' in clean_code and clean_code.endswith('.0'):
-                        clean_code = clean_code[:-2]
-
-                    if clean_code == kod or clean_code == str(int(float(kod))) if kod.replace('.','').isdigit() else False:
-                        user_info = {
-                            "telefon": telefon,
-                            "ism": ism,
-                            "list_nomi": list_nomi,
-                            "kod": kod,
-                            "summa": summa,
-                            "summa_formatted": f"{summa:,.2f} $".replace(',', ' '),
-                            "row_number": i
-                        }
-                        return user_info
-
-                except (ValueError, IndexError) as e:
-                    print(f"Row {i} da xatolik: {e}")
-                    continue
-
-            return None
+            user_info = user.to_user_info()
+            user_info["summa_formatted"] = user.summa_formatted
+            return user_info
 
         except Exception as e:
             print(f"Kod bo'yicha foydalanuvchi topishda xatolik: {e}")
             return None
 
-    def write_to_list_sheet(self, list_nomi, data):
-        """Belgilangan list sheet'ga ma'lumot yozish"""
+    def resolve_user_codes(self, codes):
+        """Manifest kodlarini bitta users snapshot'idan aniqlash (xatolik bo'lsa None)"""
         try:
-            if not self.gc:
-                # Service account bilan ulanish
-                if not self.connect_with_service_account():
-                    return False
+            resolution = self.get_users_table().resolve_codes(codes)
+            resolution["found"] = {code: user.to_user_info() for code, user in resolution["found"].items()}
+            return resolution
 
-            # Asosiy spreadsheet'ni ochish
-            spreadsheet = self.gc.open_by_key(self.sheet_id)
-
-            # List nomi bo'yicha worksheet topish
-            worksheet_name = str(list_nomi).strip()
+        except Exception as e:
+            print(f"Kodlarni aniqlashda xatolik: {e}")
+            return None
 
+    def _get_spreadsheet(self):
+        """Asosiy spreadsheet handle'i (bir marta ochiladi va qayta ishlatiladi)"""
+        if not self.gc:
+            # Service account bilan ulanish
+            if not self.connect_with_service_account():
+                return None
+        if self._spreadsheet is None:
+            self._spreadsheet = self.gc.open_by_key(self.sheet_id)
+        return self._spreadsheet
+
+    def _get_worksheet(self, worksheet_name):
+        """List nomi bo'yicha worksheet handle'i (keshlanadi, topilmasa None)"""
+        worksheet = self._worksheets.get(worksheet_name)
+        if worksheet is not None:
+            return worksheet
+
+        spreadsheet = self._get_spreadsheet()
+        if spreadsheet is None:
+            return None
+        try:
+            worksheet = spreadsheet.worksheet(worksheet_name)
+        except gspread.WorksheetNotFound:
+            print(f"❌ '{worksheet_name}' worksheet topilmadi")
+            return None
+        self._worksheets[worksheet_name] = worksheet
+        return worksheet
+
+    def _reset_write_handles(self):
+        """API xatoligidan keyin handle'larni qayta ochish uchun tozalash"""
+        self._spreadsheet = None
+        self._worksheets = {}
+
+    @staticmethod
+    def _list_sheet_row(data):
+        """List sheet'ga yoziladigan qator: sana, reys, tavsif, summa"""
+        return [
+            data.get('sana', ''),
+            data.get('reys', ''),
+            data.get('tavsif', ''),
+            data.get('summa', '')
+        ]
+
+    def _append_list_rows(self, list_nomi, items):
+        """Bitta list'ga bir nechta qatorni bitta append_rows so'rovi bilan yozish"""
+        worksheet_name = str(list_nomi).strip()
+        with self._write_lock:
+            if self._get_spreadsheet() is None:
+                return {'success': False, 'rows': 0, 'error': "Google Sheets'ga ulanib bo'lmadi"}
+            worksheet = self._get_worksheet(worksheet_name)
+            if worksheet is None:
+                return {'success': False, 'rows': 0, 'error': "worksheet topilmadi"}
+
+            rows = [self._list_sheet_row(data) for data in items]
             try:
-                worksheet = spreadsheet.worksheet(worksheet_name)
-            except gspread.WorksheetNotFound:
-                print(f"❌ '{worksheet_name}' worksheet topilmadi")
-                return False
-
-            # Ma'lumotlarni qo'shish
-            # Yangi qator qo'shish (worksheet oxiriga)
-            new_row = [
-                data.get('sana', ''),
-                data.get('reys', ''),
-                data.get('tavsif', ''),
-                data.get('summa', '')
-            ]
+                worksheet.append_rows(rows)
+            except gspread.exceptions.APIError:
+                # Handle eskirgan bo'lishi mumkin - keyingi yozishda qayta ochiladi
+                self._reset_write_handles()
+                raise
+
+        print(f"✅ '{worksheet_name}' sheet'ga {len(rows)} ta qator yozildi")
+        return {'success': True, 'rows': len(rows), 'error': None}
+
+    def write_rows_to_list_sheets(self, grouped_rows):
+        """List nomi bo'yicha guruhlangan qatorlarni yozish - har bir list uchun bitta so'rov.
+
+        Natija: {list_nomi: {'success': bool, 'rows': int, 'error': str|None}}
+        """
+        results = {}
+        for list_nomi, items in grouped_rows.items():
+            if not items:
+                continue
+            try:
+                results[list_nomi] = self._append_list_rows(list_nomi, items)
+            except Exception as e:
+                print(f"❌ '{list_nomi}' sheet'ga yozishda xatolik: {e}")
+                results[list_nomi] = {'success': False, 'rows': 0, 'error': str(e)}
 
-            worksheet.append_row(new_row)
-            print(f"✅ '{worksheet_name}' sheet'ga yozildi: {new_row}")
-            return True
+        if any(result['success'] for result in results.values()):
+            # Users sheet'dagi summalar o'zgargan bo'lishi mumkin - keshni bir marta tozalash
+            sheet_cache.invalidate(self.sheet_id, self.USERS_GID)
+        return results
 
+    def write_to_list_sheet(self, list_nomi, data):
+        """Belgilangan list sheet'ga bitta qator yozish"""
+        try:
+            result = self.write_rows_to_list_sheets({list_nomi: [data]}).get(list_nomi)
+            return bool(result and result['success'])
         except Exception as e:
             print(f"❌ Sheet'ga yozishda xatolik: {e}")
             return False
 
-    def clean_amount(self, amount_str: str) -> float:
-        """Summa qatorini tozalash va float qaytarish - manfiy qiymatlarni qo'llab-quvvatlaydi"""
+    def clean_amount(self, amount_str: str) -> Money:
+        """Summa qatorini tozalash va Money (butun sentlar) qaytarish - manfiy qiymatlarni qo'llab-quvvatlaydi"""
         if not amount_str:
-            return 0.0
-
-        import re
-
-        # String ga o'tkazish va manfiy belgini saqlab qolish
-        amount_str = str(amount_str).strip()
-        is_negative = '-' in amount_str
-
-        # Manfiy belgini vaqtincha olib tashlash
-        cleaned = amount_str.replace('-', '')
-
-        # Maxsus belgilarni olib tashlash
-        cleaned = cleaned.replace('Â', '').replace('\u00A0', ' ').replace('\xa0', ' ')
-        cleaned = re.sub(r'[^\d\.,\s]', '', cleaned)
-        cleaned = cleaned.strip()
-
-        if not cleaned:
-            return 0.0
-
-        # Vergul bor yoki yo'qligini tekshirish
-        if ',' in cleaned:
-            # Vergul bilan ajratilgan sonni float sifatida parse qilish
-            try:
-                # Bo'shliqlarni olib tashlash va vergulni nuqta bilan almashtirish
-                float_str = cleaned.replace(' ', '').replace(',', '.')
-                amount = float(float_str)
-
-                # Manfiy belgini qaytarish
-                if is_negative:
-                    amount = -amount
-
-                return amount
-
-            except (ValueError, TypeError):
-                # Float parse qila olmasa, integer usulini ishlatish
-                pass
-
-        # Vergul yo'q - integer sifatida ishlash
-        parts = re.findall(r'\d+', cleaned)
-
-        if not parts:
-            return 0.0
-
-        # Barcha raqam qismlarini birlashtirish
-        number_str = ''.join(parts)
-
-        try:
-            # Raqamni integer sifatida parse qilish
-            amount = int(number_str)
-
-            # Manfiy belgini qaytarish
-            if is_negative:
-                amount = -amount
-
-            return float(amount)
-
-        except (ValueError, TypeError):
-            return 0.0
+            return ZERO
+        # Natija xom matn bo'yicha keshlanadi (parse_money)
+        return parse_money(amount_str if isinstance(amount_str, str) else str(amount_str))
 
     def find_user_balance(self, phone_number: str) -> Optional[Dict[str, Any]]:
         """Telefon raqam bo'yicha foydalanuvchi balansini topish"""
@@ -378,52 +321,12 @@ class GoogleSheetsManager:
     def get_all_users_balances(self) -> Dict[str, Dict[str, Any]]:
         """Barcha foydalanuvchilar balansini olish - avtomatik kuzatish uchun"""
         try:
-            users_data = self.get_public_sheet_data()
-            if not users_data or len(users_data) < 2:
-                return {}
-
             all_balances = {}
 
-            for i, row in enumerate(users_data[1:], start=2):
-                if not row or len(row) < 5:
-                    continue
-
-                try:
-                    # A ustuni: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa
-                    telefon = str(row[0]).strip()
-                    ism = row[1].strip() if len(row) > 1 else ""
-                    list_nomi = row[2].strip() if len(row) > 2 else ""
-                    kod = row[3].strip() if len(row) > 3 else ""
-
-                    # Summani E va F ustunidan birlashtirish
-                    raw_summa = row[4].strip() if len(row) > 4 else "0"
-
-                    # F ustunini tekshirish - onlik qism bo'lishi mumkin
-                    if len(row) > 5 and row[5].strip().isdigit():
-                        f_value = row[5].strip()
-                        full_summa = f"{raw_summa},{f_value}"
-                    else:
-                        full_summa = raw_summa
-
-                    summa = self.clean_amount(full_summa)
-
-                    # Telefon raqamlarni tozalash
-                    clean_phone = ''.join(filter(str.isdigit, telefon))
-
-                    if len(clean_phone) >= 9:
-                        # Balans ma'lumotini saqlash
-                        all_balances[clean_phone] = {
-                            "telefon": telefon,
-                            "ism": ism,
-                            "list_nomi": list_nomi,
-                            "kod": kod,
-                            "balance": summa,
-                            "currency": "$"
-                        }
-
-                except Exception as e:
-                    print(f"Qator {i} da xatolik: {e}")
-                    continue
+            for user in self.get_users_table().users:
+                if len(user.clean_phone) >= 9:
+                    # Balans ma'lumotini saqlash
+                    all_balances[user.clean_phone] = user.to_balance_info()
 
             return all_balances
 
@@ -431,63 +334,22 @@ class GoogleSheetsManager:
             print(f"Barcha balanslarni olishda xatolik: {e}")
             return {}
 
-    def get_positive_balances_over_amount(self, min_balance_amount=5.0):
-        """Belgilangan miqdordan yuqori musbat balansga ega mijozlarni olish"""
+    def get_positive_balances_over_amount(self, min_balance_amount=5.0, snapshot=None):
+        """Belgilangan miqdordan yuqori musbat balansga ega mijozlarni olish (snapshot berilsa - undan)"""
         try:
-            # Users sheet'dan ma'lumot olish
-            users_data = self.get_public_sheet_data()  # Default users sheet
-            if not users_data or len(users_data) <= 1:
-                return []
+            columns = self.balance_columns_of(snapshot) if snapshot is not None else self.get_balance_columns()
 
+            # Filtrlash va saralash (eng yuqoridan pastga) ustunlar ustida bitta amal
             positive_users = []
-
-            # Header qatorini o'tkazib yuborish
-            for i, row in enumerate(users_data[1:], start=2):
-                if not row or len(row) < 5:
-                    continue
-
-                try:
-                    # A ustuni: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa
-                    telefon = str(row[0]).strip()
-                    ism = row[1].strip() if len(row) > 1 else ""
-
-                    # Summani olish va parse qilish
-                    raw_summa = row[4].strip() if len(row) > 4 else "0"
-
-                    # F ustunini tekshirish - onlik qism bo'lishi mumkin
-                    if len(row) > 5 and row[5].strip():
-                        raw_summa += "," + row[5].strip()
-
-                    # Summani clean_amount funksiyasi bilan tozalash
-                    summa = self.clean_amount(raw_summa)
-
-                    # Summa float ekanligini ta'minlash
-                    if isinstance(summa, str):
-                        try:
-                            summa = float(summa.replace(',', '.').replace(' ', ''))
-                        except (ValueError, TypeError):
-                            summa = 0.0
-                    elif not isinstance(summa, (int, float)):
-                        summa = 0.0
-
-                    # Faqat musbat balansga ega mijozlarni olish
-                    if summa > 0 and summa >= min_balance_amount:
-                        kod = row[3].strip() if len(row) > 3 else "N/A"
-                        print(f"💰 DEBUG musbat: {kod} = +{summa}")
-                        positive_users.append({
-                            'ism': ism,
-                            'telefon': telefon,
-                            'kod': kod,
-                            'balans': summa,
-                            'balans_formatted': f"{summa:,.2f} $".replace(',', ' ')
-                        })
-
-                except (IndexError, ValueError) as e:
-                    print(f"Qator {i} ni parse qilishda xatolik: {e}")
-                    continue
-
-            # Balans miqdori bo'yicha saralash (eng yuqoridan pastga)
-            positive_users.sort(key=lambda x: x['balans'], reverse=True)
+            for i in columns.positive_over(min_balance_amount):
+                user = columns.users[i]
+                positive_users.append({
+                    'ism': user.ism,
+                    'telefon': user.telefon,
+                    'kod': user.kod,
+                    'balans': user.summa,
+                    'balans_formatted': user.summa_formatted
+                })
 
             return positive_users
 
@@ -498,64 +360,20 @@ class GoogleSheetsManager:
     def get_debtors_over_amount(self, min_debt_amount=5.0):
         """Belgilangan miqdordan yuqori qarzi bo'lgan mijozlarni olish va tartibga solish"""
         try:
-            # Users sheet'dan ma'lumot olish
-            users_data = self.get_public_sheet_data()  # Default users sheet
-            if not users_data or len(users_data) <= 1:
-                return []
+            columns = self.get_balance_columns()
 
+            # Qarzdorlik miqdori bo'yicha saralangan (eng yuqoridan pastga)
             debtors = []
-
-            # Header qatorini o'tkazib yuborish
-            for i, row in enumerate(users_data[1:], start=2):
-                if not row or len(row) < 5:
-                    continue
-
-                try:
-                    # A ustuni: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa
-                    telefon = str(row[0]).strip()
-                    ism = row[1].strip() if len(row) > 1 else ""
-
-                    # Summani olish va parse qilish
-                    raw_summa = row[4].strip() if len(row) > 4 else "0"
-
-                    # F ustunini tekshirish - onlik qism bo'lishi mumkin
-                    if len(row) > 5 and row[5].strip():
-                        raw_summa += "," + row[5].strip()
-
-                    # Summani clean_amount funksiyasi bilan tozalash
-                    summa = self.clean_amount(raw_summa)
-
-                    # Summa float ekanligini ta'minlash
-                    if isinstance(summa, str):
-                        try:
-                            summa = float(summa.replace(',', '.').replace(' ', ''))
-                        except (ValueError, TypeError):
-                            summa = 0.0
-                    elif not isinstance(summa, (int, float)):
-                        summa = 0.0
-
-                    # Faqat manfiy balansga ega mijozlarni (qarzdorlarni) olish
-                    if summa < 0:
-                        debt_amount = abs(summa)  # Qarzdorlik miqdori (musbat qiymat)
-
-                        # Belgilangan miqdordan yuqori qarzi bor mijozlarni filtrlash
-                        if debt_amount >= min_debt_amount:
-                            kod = row[3].strip() if len(row) > 3 else "N/A"
-                            print(f"📊 DEBUG qarzdor: {kod} = -{summa} = +{debt_amount}")
-                            debtors.append({
-                                'ism': ism,
-                                'telefon': telefon,
-                                'kod': kod,
-                                'qarzdorlik': debt_amount,
-                                'qarzdorlik_formatted': f"{debt_amount:,.2f} $".replace(',', ' ')
-                            })
-
-                except (IndexError, ValueError) as e:
-                    print(f"Qator {i} ni parse qilishda xatolik: {e}")
-                    continue
-
-            # Qarzdorlik miqdori bo'yicha saralash (eng yuqoridan pastga)
-            debtors.sort(key=lambda x: x['qarzdorlik'], reverse=True)
+            for i in columns.debtors_over(min_debt_amount):
+                user = columns.users[i]
+                debt_amount = abs(user.summa)  # Qarzdorlik miqdori (musbat qiymat)
+                debtors.append({
+                    'ism': user.ism,
+                    'telefon': user.telefon,
+                    'kod': user.kod,
+                    'qarzdorlik': debt_amount,
+                    'qarzdorlik_formatted': format_amount(debt_amount)
+                })
 
             return debtors
 
@@ -566,221 +384,80 @@ class GoogleSheetsManager:
     def get_all_users_data(self):
         """Barcha mijozlar ma'lumotini olish (manager uchun)"""
         try:
-            # Users sheet'dan ma'lumot olish
-            users_data = self.get_public_sheet_data()  # Default users sheet
-
-            if not users_data or len(users_data) <= 1:
-                return [], 0.0
-
-            all_users = []
-            total_balance = 0.0
-
-            # Header qatorini o'tkazib yuborish
-            for i, row in enumerate(users_data[1:], start=2):
-                if not row or len(row) < 5:
-                    continue
-
-                try:
-                    # A ustuni: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa
-                    telefon = str(row[0]).strip()
-                    ism = row[1].strip() if len(row) > 1 else ""
-                    list_nomi = row[2].strip() if len(row) > 2 else ""
-                    kod = row[3].strip() if len(row) > 3 else ""
-
-                    # Summani olish va parse qilish
-                    raw_summa = row[4].strip() if len(row) > 4 else "0"
-
-                    # F ustunini tekshirish - onlik qism bo'lishi mumkin
-                    if len(row) > 5 and row[5].strip():
-                        raw_summa += "," + row[5].strip()
-
-                    # Summani clean_amount funksiyasi bilan tozalash
-                    summa = self.clean_amount(raw_summa)
-
-                    # Summa float ekanligini ta'minlash
-                    if isinstance(summa, str):
-                        try:
-                            summa = float(summa.replace(',', '.').replace(' ', ''))
-                        except (ValueError, TypeError):
-                            summa = 0.0
-                    elif not isinstance(summa, (int, float)):
-                        summa = 0.0
-
-                    total_balance += summa
-
-                    # Format qilish
-                    summa_formatted = f"{summa:,.2f} $".replace(',', ' ')
-
-                    all_users.append({
-                        'ism': ism,
-                        'telefon': telefon,
-                        'kod': kod,
-                        'summa': summa,
-                        'summa_formatted': summa_formatted
-                    })
-
-                except (IndexError, ValueError) as e:
-                    continue
+            columns = self.get_balance_columns()
+            if not len(columns):
+                return [], ZERO
 
             # Summa bo'yicha saralash (eng yuqoridan pastga)
-            all_users.sort(key=lambda x: x['summa'], reverse=True)
-
-            return all_users, total_balance
+            all_users = []
+            for i in columns.sorted_all():
+                user = columns.users[i]
+                all_users.append({
+                    'ism': user.ism,
+                    'telefon': user.telefon,
+                    'kod': user.kod,
+                    'summa': user.summa,
+                    'summa_formatted': user.summa_formatted
+                })
+
+            return all_users, columns.total()
 
         except Exception as e:
             print(f"Mijozlar ma'lumotini olishda xatolik: {e}")
-            return [], 0.0
-
-    def format_all_users_message(self, users_data, total_balance):
-        """Barcha mijozlar ro'yxatini formatlash (manager uchun)"""
-        if not users_data:
-            return "❌ Mijozlar ma'lumotini olishda xatolik yuz berdi."
-
-        # O'zbekiston vaqti
-        uzbekistan_tz = timezone(timedelta(hours=5))
-        now = datetime.now(uzbekistan_tz)
-        formatted_date = now.strftime("%d.%m.%Y")
-        formatted_time = now.strftime("%H:%M")
+            return [], ZERO
 
-        message = f"🛩️📋 Air mijozlari jadvali\n\n"
-        message += f"{'№':<3} {'Kod':<8} {'Summa':<15}\n"
-        message += f"{'─'*3} {'─'*8} {'─'*15}\n"
+    def format_positive_balances_message(self, positive_users, page_rows=None, stamped=True) -> List[str]:
+        """Musbat balanslar ro'yxatini Markdown formatida formatlash - sahifalarga bo'lingan.
 
-        # Faqat eng yuqori 30 ta mijozni ko'rsatish (jadval formatida)
-        displayed_users = users_data[:30]
-
-        for i, user in enumerate(displayed_users, 1):
-            kod = user['kod'][:8]  # Kod qisqartirish
-            summa = user['summa_formatted'].replace(' $', '$')
-            message += f"{i:<3} {kod:<8} {summa:<15}\n"
-
-        # Agar ko'proq mijozlar bo'lsa
-        if len(users_data) > 30:
-            message += f"... va yana {len(users_data) - 30} ta mijoz\n"
-
-        # Umumiy ma'lumotlar
-        total_formatted = f"{total_balance:,.2f} $".replace(',', ' ')
-        message += f"\n📊 Jami: {len(users_data)} ta mijoz\n"
-        message += f"💰 Umumiy: {total_formatted}\n"
-        message += f"🕐 {formatted_date} - {formatted_time}"
-
-        return message
-
-    def format_positive_balances_message(self, positive_users):
-        """Musbat balanslar ro'yxatini Markdown formatida formatlash"""
+        stamped=False - vaqt qatorisiz (keshlanadigan sahifalar, vaqt yuborishda stamp_page bilan qo'shiladi).
+        """
         if not positive_users:
-            return "✅ Hozirda $5 dan yuqori musbat balansga ega mijozlar yo'q."
-
-        # O'zbekiston vaqti
-        uzbekistan_tz = timezone(timedelta(hours=5))
-        now = datetime.now(uzbekistan_tz)
-        formatted_date = now.strftime("%d.%m.%Y")
-        formatted_time = now.strftime("%H:%M")
-
-        message = f"🛩️💰 Air balansi ($5+)\n\n"
-        message += f"```\n"
-        message += f"{'№':<3} {'Kod':<8} {'Balans':<12}\n"
-        message += f"{'─'*3} {'─'*8} {'─'*12}\n"
-
-        # Barcha mijozlarni ko'rsatish
-        displayed_users = positive_users
-
-        for i, user in enumerate(displayed_users, 1):
-            kod = user['kod'][:8] if len(user['kod']) <= 8 else user['kod'][:7] + '…'
-            balans = user['balans_formatted']
-            message += f"{i:<3} {kod:<8} {balans:<12}\n"
+            return ["✅ Hozirda $5 dan yuqori musbat balansga ega mijozlar yo'q."]
 
-        message += "```\n\n"
+        layout = POSITIVE_LAYOUT
+        rows = [layout.row(i, user['kod'], user['balans_formatted']) for i, user in enumerate(positive_users, 1)]
 
-        total_positive = sum(user['balans'] for user in positive_users)
-        total_formatted = f"{total_positive:,.2f} $".replace(',', ' ')
+        total_positive = sum((user['balans'] for user in positive_users), ZERO)
+        footer = [
+            f"📊 Jami: {len(positive_users)} ta mijoz",
+            f"💰 Umumiy: {format_amount(total_positive)}",
+        ]
+        return self._render_report("🛩️💰 Air balansi ($5+)", rows, footer, layout, page_rows, stamped)
 
-        message += f"📊 Jami: {len(positive_users)} ta mijoz\n"
-        message += f"💰 Umumiy: {total_formatted}\n"
-        message += f"🕐 {formatted_date} - {formatted_time}\n\n"
-
-        return message
-
-    def format_debtors_message(self, debtors):
-        """Qarzdorlar ro'yxatini Markdown formatida formatlash"""
+    def format_debtors_message(self, debtors) -> List[str]:
+        """Qarzdorlar ro'yxatini Markdown formatida formatlash - sahifalarga bo'lingan"""
         if not debtors:
-            return "✅ Hozirda $5 dan yuqori qarzi bo'lgan mijozlar yo'q."
-
-        # O'zbekiston vaqti
-        uzbekistan_tz = timezone(timedelta(hours=5))
-        now = datetime.now(uzbekistan_tz)
-        formatted_date = now.strftime("%d.%m.%Y")
-        formatted_time = now.strftime("%H:%M")
-
-        message = f"🛩️📋 Air qarzdorlari ($5+)\n\n"
-        message += f"```\n"
-        message += f"{'№':<3} {'Kod':<8} {'Qarzdorlik':<12}\n"
-        message += f"{'─'*3} {'─'*8} {'─'*12}\n"
-
-        for i, debtor in enumerate(debtors, 1):
-            kod = debtor.get('kod', 'N/A')[:8]  # Kod qisqartirish
-            qarzdorlik = debtor['qarzdorlik_formatted'].replace(' $', '$')
-            message += f"{i:<3} {kod:<8} {qarzdorlik:<12}\n"
-
-        message += f"```\n"
-        message += f"📊 Jami: {len(debtors)} ta qarzdor\n"
-        message += f"🕐 {formatted_date} - {formatted_time}"
-
-        return message
-
-    def get_container_data(self):
-        """Container sheet'dan ma'lumot olish - U list, D va E ustunlar"""
+            return ["✅ Hozirda $5 dan yuqori qarzi bo'lgan mijozlar yo'q."]
+
+        layout = DEBTORS_LAYOUT
+        rows = [
+            layout.row(i, debtor.get('kod', 'N/A'), debtor['qarzdorlik_formatted'].replace(' $', '$'))
+            for i, debtor in enumerate(debtors, 1)
+        ]
+        footer = [
+            f"📊 Jami: {len(debtors)} ta qarzdor",
+            timestamp_line(),
+        ]
+        return render_pages("🛩️📋 Air qarzdorlari ($5+)", rows, footer, head=layout.head(), code_block=True)
+
+    def get_container_snapshot(self):
+        """Container sheet snapshot'i (xatolik bo'lsa exception ko'tariladi)"""
+        return self.get_sheet_snapshot(self.CONTAINER_SHEET_ID, self.CONTAINER_GID)
+
+    def container_table_of(self, snapshot) -> ContainerTable:
+        """Berilgan snapshot uchun Container jadvali (bir marta quriladi)"""
+        return snapshot.derived("container_table", lambda snap: ContainerTable.from_rows(snap.rows, self.clean_amount))
+
+    def get_container_table(self) -> ContainerTable:
+        """Container sheet jadvalini olish (har snapshot uchun bir marta quriladi)"""
+        return self.container_table_of(self.get_container_snapshot())
+
+    def get_container_data(self, snapshot=None):
+        """Container sheet'dan ma'lumot olish - U list, D va E ustunlar (snapshot berilsa - undan)"""
         try:
-            # Container sheet URL ID
-            container_sheet_id = "1k7RMqNH75kTmw88pFGUh7Yg-kgxswz4q1616vxo2HBE"
-            container_gid = "267785141"  # U list gid
-
-            # CSV format'da olish
-            url = f"https://docs.google.com/spreadsheets/d/{container_sheet_id}/export?format=csv&gid={container_gid}"
-            response = requests.get(url)
-            response.raise_for_status()
-
-            # CSV ma'lumotlarini parse qilish
-            lines = response.text.strip().split('\n')
-            container_data = []
-
-            for i, line in enumerate(lines):
-                if line.strip():
-                    row = [cell.strip('"').strip() for cell in line.split(',')]
-
-                    # Skip header row
-                    if i == 0:
-                        continue
-
-                    # B ustun (index 1) - ism, D ustun (index 3) - kod, E ustun (index 4) - summa, F ustun (index 5) - onlik qism
-                    if len(row) > 4:
-                        ism = row[1].strip() if len(row) > 1 and row[1].strip() else "N/A"
-                        kod = row[3].strip() if row[3].strip() else None
-
-                        # E ustundan asosiy summani olish
-                        raw_summa = row[4].strip() if row[4].strip() else "0"
-
-                        # F ustunini tekshirish - onlik qism bo'lishi mumkin
-                        if len(row) > 5 and row[5].strip() and row[5].strip().isdigit():
-                            f_value = row[5].strip()
-                            # E va F ni vergul bilan birlashtirish
-                            full_summa = f"{raw_summa},{f_value}"
-                        else:
-                            full_summa = raw_summa
-
-                        # Summani tozalash va float'ga o'tkazish
-                        try:
-                            summa = self.clean_amount(full_summa)
-
-                            # Faqat 5$ dan yuqori summalar va kod mavjud bo'lganlar
-                            if kod and summa > 5.0:
-                                container_data.append({
-                                    'ism': ism,
-                                    'kod': kod,
-                                    'summa': summa
-                                })
-                        except (ValueError, TypeError):
-                            continue
+            # Faqat 5$ dan yuqori summalar va kod mavjud bo'lganlar
+            table = self.container_table_of(snapshot) if snapshot is not None else self.get_container_table()
+            container_data = [item.to_dict() for item in table.items]
 
             print(f"📦 Container: {len(container_data)} ta kod (5$+)")
             return container_data
@@ -792,13 +469,10 @@ class GoogleSheetsManager:
     def find_user_container_data(self, user_kod):
         """Mijoz kodiga ko'ra Container ma'lumotini topish"""
         try:
-            # Barcha Container ma'lumotlarini olish
-            container_data = self.get_container_data()
-
             # Foydalanuvchi kodiga mos keladigan ma'lumotni topish
-            for item in container_data:
-                if item['kod'] == user_kod and item['summa'] > 0:
-                    return item
+            item = self.get_container_table().by_kod.get(user_kod)
+            if item and item.summa > ZERO:
+                return item.to_dict()
 
             return None
 
@@ -827,8 +501,8 @@ class GoogleSheetsManager:
 
         # Summani formatlash
         summa = container_info.get('summa', 0)
-        if isinstance(summa, (int, float)):
-            summa_formatted = f"{summa:,.2f} $".replace(',', ' ')
+        if isinstance(summa, (Money, int, float)):
+            summa_formatted = format_amount(summa)
         else:
             summa_formatted = f"{summa} $"
 
@@ -845,24 +519,23 @@ class GoogleSheetsManager:
         formatted_date = now.strftime("%d.%m.%Y")
         formatted_time = now.strftime("%H:%M")
 
-        # Air balans hisoblash
-        air_balance = 0
+        # Air balans hisoblash (sentlarda, matn/float aylantirishsiz)
+        air_balance = ZERO
         if air_balance_info and air_balance_info.get('balance'):
             try:
-                air_balance_str = str(air_balance_info['balance']).replace(' ', '').replace(',', '.')
-                air_balance = float(air_balance_str)
-                air_formatted = f"{air_balance:,.2f} $".replace(',', ' ')
+                air_balance = Money.of(air_balance_info['balance'])
+                air_formatted = format_amount(air_balance)
             except (ValueError, TypeError):
                 air_formatted = f"{air_balance_info['balance']} $"
         else:
             air_formatted = "0,00 $"
 
         # Container balans hisoblash
-        container_balance = 0
+        container_balance = ZERO
         if container_info and container_info.get('summa'):
             try:
-                container_balance = float(container_info['summa'])
-                container_formatted = f"{container_balance:,.2f} $".replace(',', ' ')
+                container_balance = Money.of(container_info['summa'])
+                container_formatted = format_amount(container_balance)
             except (ValueError, TypeError):
                 container_formatted = f"{container_info['summa']} $"
         else:
@@ -870,7 +543,7 @@ class GoogleSheetsManager:
 
         # Umumiy summa
         total_balance = air_balance + container_balance
-        total_formatted = f"{total_balance:,.2f} $".replace(',', ' ')
+        total_formatted = format_amount(total_balance)
 
         # Ism va telefon
         ism = air_balance_info.get('ism', 'N/A') if air_balance_info else 'N/A'
@@ -893,41 +566,37 @@ class GoogleSheetsManager:
 
         return message
 
-    def format_container_message(self, container_data):
-        """Container ma'lumotlarini Markdown formatida formatlash (manager uchun)"""
-        if not container_data:
-            return "✅ Hozirda $5 dan yuqori Container balansga ega mijozlar yo'q."
+    def format_container_message(self, container_data, page_rows=None, stamped=True) -> List[str]:
+        """Container ma'lumotlarini Markdown formatida formatlash (manager uchun) - sahifalarga bo'lingan.
 
-        # O'zbekiston vaqti
-        uzbekistan_tz = timezone(timedelta(hours=5))
-        now = datetime.now(uzbekistan_tz)
-        formatted_date = now.strftime("%d.%m.%Y")
-        formatted_time = now.strftime("%H:%M")
-
-        message = f"📦💰 Container balanslari ($5+)\n\n"
-        message += f"```\n"
-        message += f"{'№':<3} {'Ism':<12} {'Kod':<8} {'Balans':<12}\n"
-        message += f"{'─'*3} {'─'*12} {'─'*8} {'─'*12}\n"
+        stamped=False - vaqt qatorisiz (keshlanadigan sahifalar, vaqt yuborishda stamp_page bilan qo'shiladi).
+        """
+        if not container_data:
+            return ["✅ Hozirda $5 dan yuqori Container balansga ega mijozlar yo'q."]
 
         # Container ma'lumotlarini balans bo'yicha saralash
         sorted_container = sorted(container_data, key=lambda x: x['summa'], reverse=True)
 
-        for i, item in enumerate(sorted_container, 1):
-            ism = item['ism'][:12] if len(item['ism']) <= 12 else item['ism'][:11] + '…'
-            kod = item['kod'][:8] if len(item['kod']) <= 8 else item['kod'][:7] + '…'
-            balans = f"{item['summa']:,.2f} $".replace(',', ' ')
-            message += f"{i:<3} {ism:<12} {kod:<8} {balans:<12}\n"
-
-        message += "```\n\n"
-
-        total_container = sum(item['summa'] for item in container_data)
-        total_formatted = f"{total_container:,.2f} $".replace(',', ' ')
-
-        message += f"📊 Jami: {len(container_data)} ta mijoz\n"
-        message += f"💰 Umumiy: {total_formatted}\n"
-        message += f"🕐 {formatted_date} - {formatted_time}\n\n"
-
-        return message
+        layout = CONTAINER_LAYOUT
+        rows = [
+            layout.row(i, item['ism'], item['kod'], format_amount(item['summa']))
+            for i, item in enumerate(sorted_container, 1)
+        ]
+
+        total_container = sum((item['summa'] for item in container_data), ZERO)
+        footer = [
+            f"📊 Jami: {len(container_data)} ta mijoz",
+            f"💰 Umumiy: {format_amount(total_container)}",
+        ]
+        return self._render_report("📦💰 Container balanslari ($5+)", rows, footer, layout, page_rows, stamped)
+
+    def _render_report(self, title, rows, footer, layout, page_rows, stamped) -> List[str]:
+        if stamped:
+            return render_pages(title, rows, footer + [timestamp_line()], head=layout.head(), code_block=True,
+                                max_rows=page_rows)
+        # Vaqt qatori keyin qo'shiladi - unga joy qoldiriladi
+        return render_pages(title, rows, footer, head=layout.head(), code_block=True, max_rows=page_rows,
+                            limit=MAX_MESSAGE_LENGTH - TIMESTAMP_RESERVE)
 
     def get_worksheet_gid_by_title(self, spreadsheet_id, worksheet_title):
         """Worksheet nomiga qarab GID ni olish"""
@@ -1017,16 +686,9 @@ class GoogleSheetsManager:
                 print(f"❌ Spreadsheet ochishda xatolik: {e}")
                 print("🔄 DEBUG: CSV fallback ishlatilmoqda...")
                 # Fallback: CSV usuli (agar fayl public bo'lsa)
-                url = f"https://docs.google.com/spreadsheets/d/{investor_sheet_id}/export?format=csv&gid=1601344247"
-                response = requests.get(url)
-                response.raise_for_status()
-                lines = response.text.strip().split('\n')
-                all_values = []
+                url = export_csv_url(investor_sheet_id, 1601344247)
                 # Faqat birinchi 8 qatorni olish (A1:F8 oralig'i)
-                for i, line in enumerate(lines[:8]):
-                    if line.strip():
-                        row = [cell.strip('"').strip() for cell in line.split(',')]
-                        all_values.append(row)
+                all_values = fetch_csv_rows(url, max_rows=8)
                 print(f"📋 DEBUG CSV: {len(all_values)} qator yuklanди")
 
             # Oy raqamiga qarab ustun indexini aniqlash
@@ -1073,7 +735,7 @@ class GoogleSheetsManager:
                         try:
                             # Agar summa bo'sh yoki "-" bo'lsa, 0 deb belgilash
                             if not summa_str or summa_str in ['-', '0', '0,00', '-,00', '  -     ', '  -  ,00   ']:
-                                summa = 0.0
+                                summa = ZERO
                             else:
                                 # Summani tozalash
                                 summa = self.clean_amount(summa_str)
@@ -1091,7 +753,7 @@ class GoogleSheetsManager:
                             profit_data.append({
                                 'sana': f"{year}.{month.zfill(2)}",
                                 'tavsif': tavsif,
-                                'summa': 0.0
+                                'summa': ZERO
                             })
 
             print(f"📊 Investor: {year}-{month} oy uchun {len(profit_data)} ta yozuv topildi")
@@ -1104,51 +766,31 @@ class GoogleSheetsManager:
             traceback.print_exc()
             return []
 
-    def format_investor_profit_message(self, profit_data, year, month):
-        """Investor foyda ma'lumotlarini formatlash"""
-        # Oy nomlarini olish
-        month_names = {
-            "01": "Yanvar", "02": "Fevral", "03": "Mart", "04": "Aprel",
-            "05": "May", "06": "Iyun", "07": "Iyul", "08": "Avgust",
-            "09": "Sentyabr", "10": "Oktyabr", "11": "Noyabr", "12": "Dekabr"
-        }
-        month_name = month_names.get(month, month)
+    def format_investor_profit_message(self, profit_data, year, month) -> List[str]:
+        """Investor foyda ma'lumotlarini formatlash - sahifalarga bo'lingan"""
+        month_name = MONTH_NAMES.get(month, month)
 
         if not profit_data:
-            return f"📊 {year} yil {month_name} oyi\n\n❌ Bu oy uchun foyda ma'lumotlari topilmadi."
-
-        # O'zbekiston vaqti
-        uzbekistan_tz = timezone(timedelta(hours=5))
-        now = datetime.now(uzbekistan_tz)
-        formatted_date = now.strftime("%d.%m.%Y")
-        formatted_time = now.strftime("%H:%M")
+            return [f"📊 {year} yil {month_name} oyi\n\n❌ Bu oy uchun foyda ma'lumotlari topilmadi."]
 
-        message = f"📊💰 {year} yil {month_name} oyi foydasi\n\n"
-        message += f"```\n"
-        message += f"{'Tavsif':<20} {'Summa':<12}\n"
-        message += f"{'─'*20} {'─'*12}\n"
-
-        total_profit = 0
+        layout = PROFIT_LAYOUT
+        total_profit = ZERO
+        rows = []
         for item in profit_data:
-            tavsif = item['tavsif'][:20] if len(item['tavsif']) <= 20 else item['tavsif'][:19] + '…'
-            summa = item['summa']
-            total_profit += summa
-            
-            summa_formatted = f"{summa:,.2f} $".replace(',', ' ')
-            message += f"{tavsif:<20} {summa_formatted:<12}\n"
-
-        message += f"{'─'*33}\n"
-        total_formatted = f"{total_profit:,.2f} $".replace(',', ' ')
-        message += f"{'JAMI:':<20} {total_formatted:<12}\n"
-        message += "```\n\n"
-
-        message += f"📈 Jami yozuvlar: {len(profit_data)} ta\n"
-        message += f"💰 Umumiy foyda: {total_formatted}\n"
-        message += f"🕐 {formatted_date} - {formatted_time}"
-
-        return message
+            total_profit += item['summa']
+            rows.append(layout.row(item['tavsif'], format_amount(item['summa'])))
+
+        # JAMI qatori jadval oxirida (oxirgi sahifada), umumiy foyda esa footer'da - har sahifada
+        total_formatted = format_amount(total_profit)
+        head = layout.head()
+        footer = [
+            f"📈 Jami yozuvlar: {len(profit_data)} ta",
+            f"💰 Umumiy foyda: {total_formatted}",
+            timestamp_line(),
+        ]
+        # Ajratgich va JAMI bitta qator sifatida - sahifalar orasida bo'linib qolmaydi
+        rows.append("─" * 33 + "\n" + layout.row("JAMI:", total_formatted))
+        return render_pages(f"📊💰 {year} yil {month_name} oyi foydasi", rows, footer, head=head, code_block=True)
 
 # Global instances
-sheets_manager = GoogleSheetsManager()
-# Oldingi balanslarni saqlash uchun
-previous_balances = {}
\ No newline at end of file
+sheets_manager = GoogleSheetsManager()
\ No newline at end of file
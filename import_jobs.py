@@ -0,0 +1,203 @@
+"""
+Excel importlarini fon vazifasi sifatida bajarish - id, progress xabari, holatni so'rash va bekor qilish
+"""
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from telegram.error import BadRequest, RetryAfter
+
+from config import get_import_max_concurrent, get_import_progress_interval
+
+logger = logging.getLogger(__name__)
+
+# Vazifa holatlari
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+STATUS_LABELS = {
+    STATUS_QUEUED: "🕐 Navbatda",
+    STATUS_RUNNING: "⏳ Bajarilmoqda",
+    STATUS_DONE: "✅ Tugadi",
+    STATUS_FAILED: "❌ Xatolik",
+    STATUS_CANCELLED: "🚫 Bekor qilindi",
+}
+
+
+class ImportJob:
+    """Bitta Excel import vazifasi"""
+
+    def __init__(self, job_id: int, owner_id: int, chat_id: int, file_name: str):
+        self.id = job_id
+        self.owner_id = owner_id
+        self.chat_id = chat_id
+        self.file_name = file_name
+        self.status = STATUS_QUEUED
+        self.stage = ""
+        self.done = 0
+        self.total = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.message_id: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+    def update(self, stage: Optional[str] = None, done: Optional[int] = None, total: Optional[int] = None):
+        """Progress'ni yangilash (xabar alohida, cheklangan tezlikda tahrirlanadi)"""
+        if stage is not None:
+            self.stage = stage
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+
+    def progress_text(self) -> str:
+        """Progress xabari matni"""
+        lines = [f"📥 Import #{self.id}: {self.file_name}", STATUS_LABELS.get(self.status, self.status)]
+        if self.stage and not self.is_finished:
+            lines.append(self.stage)
+        if self.total:
+            lines.append(f"📝 {self.done}/{self.total} kod yozildi")
+        if self.error:
+            lines.append(f"❗ {self.error}")
+        return "\n".join(lines)
+
+
+class ImportJobManager:
+    """Import vazifalarini boshqarish - bir vaqtda bajariladiganlar soni cheklangan"""
+
+    def __init__(self, max_concurrent: int = 2, progress_interval: float = 3.0, keep_finished: int = 20):
+        self.max_concurrent = max_concurrent
+        self.progress_interval = progress_interval
+        self.keep_finished = keep_finished
+        self.jobs: Dict[int, ImportJob] = {}
+        self._ids = itertools.count(1)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def submit(self, bot, chat_id: int, owner_id: int, file_name: str,
+                     runner: Callable[[ImportJob], Awaitable[Any]], reply_markup=None) -> ImportJob:
+        """Vazifani navbatga qo'yish - progress xabari yuboriladi va handler darhol qaytadi"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        job = ImportJob(next(self._ids), owner_id, chat_id, file_name)
+        self.jobs[job.id] = job
+        self._forget_old_jobs()
+
+        message = await bot.send_message(
+            chat_id=chat_id,
+            text=job.progress_text(),
+            reply_markup=reply_markup(job.id) if reply_markup else None
+        )
+        job.message_id = message.message_id
+
+        job.task = asyncio.create_task(self._run(bot, job, runner, reply_markup))
+        logger.info(f"📥 Import #{job.id} navbatga qo'yildi: {file_name}")
+        return job
+
+    def get(self, job_id: int) -> Optional[ImportJob]:
+        return self.jobs.get(job_id)
+
+    def active_jobs(self) -> List[ImportJob]:
+        """Tugamagan vazifalar"""
+        return [job for job in self.jobs.values() if not job.is_finished]
+
+    def recent_jobs(self, limit: int = 10) -> List[ImportJob]:
+        """Oxirgi vazifalar (yangilari birinchi)"""
+        return sorted(self.jobs.values(), key=lambda job: job.id, reverse=True)[:limit]
+
+    def cancel(self, job_id: int, owner_id: Optional[int] = None) -> bool:
+        """Navbatdagi yoki bajarilayotgan vazifani bekor qilish (owner_id berilsa - faqat o'z vazifasini)"""
+        job = self.jobs.get(job_id)
+        if job is None or job.is_finished or job.task is None:
+            return False
+        if owner_id is not None and job.owner_id != owner_id:
+            return False
+        job.task.cancel()
+        return True
+
+    async def shutdown(self):
+        """Bot to'xtaganda tugamagan vazifalarni bekor qilish"""
+        tasks = [job.task for job in self.active_jobs() if job.task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _forget_old_jobs(self):
+        finished = [job for job in self.jobs.values() if job.is_finished]
+        finished.sort(key=lambda job: job.id)
+        for job in finished[:-self.keep_finished or None]:
+            self.jobs.pop(job.id, None)
+
+    async def _run(self, bot, job: ImportJob, runner, reply_markup):
+        reporter = None
+        try:
+            async with self._semaphore:
+                job.status = STATUS_RUNNING
+                reporter = asyncio.create_task(self._report_progress(bot, job, reply_markup))
+                job.result = await runner(job)
+
+            if isinstance(job.result, dict) and not job.result.get("success", True):
+                job.status = STATUS_FAILED
+                job.error = job.result.get("error")
+            else:
+                job.status = STATUS_DONE
+        except asyncio.CancelledError:
+            job.status = STATUS_CANCELLED
+            logger.info(f"🚫 Import #{job.id} bekor qilindi")
+        except Exception as e:
+            job.status = STATUS_FAILED
+            job.error = str(e)
+            logger.error(f"Import #{job.id} xatoligi: {e}")
+        finally:
+            job.finished_at = time.time()
+            if reporter is not None:
+                reporter.cancel()
+                await asyncio.gather(reporter, return_exceptions=True)
+            # Yakuniy holat - tugma olib tashlanadi
+            await self._edit_progress(bot, job, None)
+
+    async def _report_progress(self, bot, job: ImportJob, reply_markup):
+        """Progress xabarini cheklangan tezlikda tahrirlash (faqat matn o'zgarganda)"""
+        last_text = None
+        while True:
+            text = job.progress_text()
+            if text != last_text:
+                await self._edit_progress(bot, job, reply_markup(job.id) if reply_markup else None)
+                last_text = text
+            await asyncio.sleep(self.progress_interval)
+
+    async def _edit_progress(self, bot, job: ImportJob, markup):
+        if job.message_id is None:
+            return
+        try:
+            await bot.edit_message_text(
+                chat_id=job.chat_id,
+                message_id=job.message_id,
+                text=job.progress_text(),
+                reply_markup=markup
+            )
+        except RetryAfter as e:
+            # Keyingi tahrirlashda yangi holat baribir ko'rsatiladi
+            logger.warning(f"Import #{job.id} progress: RetryAfter {e.retry_after}")
+        except BadRequest as e:
+            # "Message is not modified" va shunga o'xshashlar
+            logger.debug(f"Import #{job.id} progress tahrirlanmadi: {e}")
+        except Exception as e:
+            logger.error(f"Import #{job.id} progress xabarida xatolik: {e}")
+
+
+# Global instance
+import_jobs = ImportJobManager(max_concurrent=get_import_max_concurrent(),
+                               progress_interval=get_import_progress_interval())
@@ -0,0 +1,147 @@
+"""
+Qo'llangan import yozuvlari reestri (SQLite) - bir xil manifest ikki marta yozilmasligi uchun
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import get_import_ledger_path
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifests (
+    fingerprint TEXT PRIMARY KEY,
+    reys TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    first_seen_at REAL NOT NULL,
+    last_applied_at REAL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    reys TEXT NOT NULL,
+    code TEXT NOT NULL,
+    occurrence INTEGER NOT NULL,
+    list_nomi TEXT NOT NULL,
+    price REAL NOT NULL,
+    fingerprint TEXT NOT NULL,
+    applied_at REAL NOT NULL,
+    PRIMARY KEY (reys, code, occurrence)
+);
+"""
+
+
+def hash_stream(source) -> str:
+    """Fayl (yoki bufer) tarkibining sha256 xeshi - o'qilgandan keyin boshiga qaytariladi"""
+    hasher = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    source.seek(0)
+    return hasher.hexdigest()
+
+
+def manifest_fingerprint(content_hash: str, reys: str) -> str:
+    """Manifest izi: tarkib xeshi + reys nomi"""
+    return hashlib.sha256(f"{content_hash}\n{reys}".encode("utf-8")).hexdigest()
+
+
+def number_occurrences(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Bir manifestda takrorlangan kodlarga tartib raqami berish (1, 2, ...)"""
+    counts: Dict[str, int] = {}
+    numbered = []
+    for entry in entries:
+        counts[entry['code']] = counts.get(entry['code'], 0) + 1
+        numbered.append(dict(entry, occurrence=counts[entry['code']]))
+    return numbered
+
+
+class ImportLedger:
+    """(reys, kod, tartib raqami) bo'yicha qaysi qatorlar allaqachon yozilganini saqlaydi"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._active_reys = set()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def begin(self, reys: str) -> bool:
+        """Reys importini boshlash - shu reys hozir import qilinayotgan bo'lsa False"""
+        with self._lock:
+            if reys in self._active_reys:
+                return False
+            self._active_reys.add(reys)
+            return True
+
+    def end(self, reys: str):
+        with self._lock:
+            self._active_reys.discard(reys)
+
+    def register_manifest(self, fingerprint: str, reys: str, content_hash: str) -> bool:
+        """Manifestni ro'yxatga olish - avval ko'rilgan bo'lsa True"""
+        with self._lock:
+            conn = self._connection()
+            seen = conn.execute("SELECT 1 FROM manifests WHERE fingerprint = ?", (fingerprint,)).fetchone()
+            if seen is None:
+                conn.execute(
+                    "INSERT INTO manifests (fingerprint, reys, content_hash, first_seen_at) VALUES (?, ?, ?, ?)",
+                    (fingerprint, reys, content_hash, time.time())
+                )
+                conn.commit()
+            return seen is not None
+
+    def plan(self, reys: str, entries: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Yozuvlarni ajratish: new (yozilmagan), applied (xuddi shunday yozilgan),
+        conflicts (shu kod boshqa narx yoki list bilan yozilgan)"""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT code, occurrence, list_nomi, price FROM entries WHERE reys = ?", (reys,)
+            ).fetchall()
+        applied_map = {(code, occurrence): (list_nomi, price) for code, occurrence, list_nomi, price in rows}
+
+        plan = {"new": [], "applied": [], "conflicts": []}
+        for entry in entries:
+            previous = applied_map.get((entry['code'], entry['occurrence']))
+            if previous is None:
+                plan["new"].append(entry)
+            elif previous == (entry['list_nomi'], float(entry['price'])):
+                plan["applied"].append(entry)
+            else:
+                plan["conflicts"].append(dict(entry, old_list_nomi=previous[0], old_price=previous[1]))
+        return plan
+
+    def record_applied(self, fingerprint: str, reys: str, entries: List[Dict[str, Any]]):
+        """Sheets'ga muvaffaqiyatli yozilgan qatorlarni reestrga qo'shish"""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO entries (reys, code, occurrence, list_nomi, price, fingerprint, applied_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(reys, e['code'], e['occurrence'], e['list_nomi'], float(e['price']), fingerprint, now)
+                 for e in entries]
+            )
+            conn.execute("UPDATE manifests SET last_applied_at = ? WHERE fingerprint = ?", (now, fingerprint))
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Global reestr
+import_ledger = ImportLedger(get_import_ledger_path())
@@ -65,6 +65,30 @@ class BotKeyboards:
         ]
         return InlineKeyboardMarkup(keyboard)
     
+    @staticmethod
+    def import_job_keyboard(job_id):
+        """Import progress xabari uchun bekor qilish tugmasi"""
+        keyboard = [
+            [InlineKeyboardButton("🚫 Bekor qilish", callback_data=f"import_cancel_{job_id}")]
+        ]
+        return InlineKeyboardMarkup(keyboard)
+    
+    @staticmethod
+    def report_pages_keyboard(session_id, page, total, back_callback=None):
+        """Hisobot sahifalari orasida varaqlash klaviaturasi (⬅️ 2/5 ➡️)"""
+        keyboard = []
+        if total > 1:
+            row = []
+            if page > 0:
+                row.append(InlineKeyboardButton("⬅️", callback_data=f"report_{session_id}_{page - 1}"))
+            row.append(InlineKeyboardButton(f"{page + 1}/{total}", callback_data=f"report_{session_id}_{page}"))
+            if page < total - 1:
+                row.append(InlineKeyboardButton("➡️", callback_data=f"report_{session_id}_{page + 1}"))
+            keyboard.append(row)
+        if back_callback:
+            keyboard.append([InlineKeyboardButton("🔙 Orqaga", callback_data=back_callback)])
+        return InlineKeyboardMarkup(keyboard) if keyboard else None
+
     @staticmethod
     def super_user_role_selection_keyboard():
         """Super user uchun rol tanlash klaviaturasi"""
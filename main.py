@@ -1,13 +1,22 @@
-import os
-import telebot
-import logging
-import threading
 import asyncio
-from time import sleep
+import logging
+
+from telegram import Update
+from telegram.ext import (Application, ApplicationBuilder, CallbackQueryHandler, CommandHandler,
+                          MessageHandler, filters)
+
+from config import get_bot_token, restore_state, close_state
+from async_sheets import async_sheets
+from bot_handlers import (start_handler, button_handler, contact_handler,
+                          document_handler, text_handler, import_status_handler,
+                          import_cancel_handler, subscribe_handler, subscriptions_handler,
+                          unsubscribe_handler)
+from import_jobs import import_jobs
+from subscriptions import subscription_engine
 
 # BalanceMonitor import
 try:
-    from balance_monitor import BalanceMonitor
+    from balance_monitor import get_balance_monitor
     monitoring_enabled = True
 except ImportError:
     monitoring_enabled = False
@@ -18,63 +27,92 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-logger.info("Bot ishga tushirilmoqda...")
-
-# Telegram token
-BOT_TOKEN = os.environ.get("BOT_TOKEN")
-if not BOT_TOKEN:
-    logger.error("BOT_TOKEN topilmadi!")
-    exit(1)
 
-bot = telebot.TeleBot(BOT_TOKEN)
+# Monitoring vazifasi (bitta event loop ichida)
+monitor_task = None
 
 # ------------------------
-# Async BalanceMonitor uchun Thread wrapper
+# BalanceMonitor - Application bilan birga ishga tushadi va to'xtaydi
 # ------------------------
-def start_monitoring_thread(monitor):
-    try:
-        asyncio.run(monitor.start_monitoring())
-    except Exception as e:
-        logger.error(f"Monitoring xatosi: {e}")
+async def post_init(application: Application):
+    """Application initialize qilingandan keyin monitoringni ishga tushirish"""
+    global monitor_task
+    if monitoring_enabled:
+        monitor = get_balance_monitor(application)
+        monitor_task = asyncio.create_task(monitor.start_monitoring())
+        logger.info("Background monitoring ishga tushdi...")
 
-if monitoring_enabled:
-    monitor = BalanceMonitor(bot_application=bot)
-    threading.Thread(target=start_monitoring_thread, args=(monitor,), daemon=True).start()
-    logger.info("Background monitoring ishga tushdi...")
+async def post_stop(application: Application):
+    """Application to'xtaganda monitoringni to'xtatish"""
+    global monitor_task
+    if monitor_task is not None:
+        get_balance_monitor(application).stop_monitoring()
+        try:
+            await asyncio.wait_for(monitor_task, timeout=15)
+        except asyncio.TimeoutError:
+            monitor_task.cancel()
+        except Exception as e:
+            logger.error(f"Monitoring xatosi: {e}")
+        monitor_task = None
 
-# ------------------------
-# Start komandasi
-# ------------------------
-@bot.message_handler(commands=['start'])
-def send_welcome(message):
-    bot.reply_to(message, "Salom! Bot ishlamoqda.")
+    # Tugamagan importlarni bekor qilish
+    await import_jobs.shutdown()
 
-# ------------------------
-# Inline tugmalar uchun callback
-# ------------------------
-@bot.callback_query_handler(func=lambda call: True)
-def callback_inline(call):
-    if call.data == "air":
-        bot.send_message(call.message.chat.id, "Siz Air tugmasini bosdingiz")
-    elif call.data == "other":
-        bot.send_message(call.message.chat.id, "Siz Other tugmasini bosdingiz")
-    else:
-        bot.send_message(call.message.chat.id, f"Siz {call.data} tugmasini bosdingiz")
+    # Sheets thread pool'ini yopish
+    async_sheets.shutdown()
+
+    # Saqlanmagan holat o'zgarishlarini diskka yozish
+    close_state()
 
 # ------------------------
-# Oddiy echo handler
+# Handler'larni ro'yxatdan o'tkazish
 # ------------------------
-@bot.message_handler(func=lambda m: True)
-def echo_all(message):
-    bot.reply_to(message, message.text)
+def register_handlers(application: Application):
+    """bot_handlers.py dagi barcha handler'larni Application'ga ulash"""
+    application.add_handler(CommandHandler("start", start_handler))
+    application.add_handler(CommandHandler("import_status", import_status_handler))
+    application.add_handler(CommandHandler("import_cancel", import_cancel_handler))
+    application.add_handler(CommandHandler("subscribe", subscribe_handler))
+    application.add_handler(CommandHandler("subscriptions", subscriptions_handler))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe_handler))
+    application.add_handler(CallbackQueryHandler(button_handler))
+    application.add_handler(MessageHandler(filters.CONTACT, contact_handler))
+    application.add_handler(MessageHandler(filters.Document.ALL, document_handler))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
+
+def build_application(token: str) -> Application:
+    """Application yaratish"""
+    application = (
+        ApplicationBuilder()
+        .token(token)
+        .post_init(post_init)
+        .post_stop(post_stop)
+        .build()
+    )
+    register_handlers(application)
+    return application
 
 # ------------------------
 # Pollingni ishga tushirish
 # ------------------------
+def main():
+    logger.info("Bot ishga tushirilmoqda...")
+
+    # Telegram token
+    bot_token = get_bot_token()
+    if not bot_token:
+        logger.error("BOT_TOKEN topilmadi!")
+        exit(1)
+
+    # Saqlangan sessiyalarni tiklash - qayta ishga tushganda mijozlar qayta tasdiqlamaydi
+    restored = restore_state()
+    logger.info(f"Saqlangan holat tiklandi: {restored}")
+
+    # Obunalar indeksini saqlangan qoidalardan qurish
+    subscription_engine.rebuild()
+
+    application = build_application(bot_token)
+    application.run_polling(allowed_updates=Update.ALL_TYPES)
+
 if __name__ == "__main__":
-    while True:
-        try:
-            bot.polling(none_stop=True, timeout=60, long_polling_timeout=90)
-        except Exception as e:
-            logger.error(f"Xatolik yuz berdi: {e}")
-            sleep(10)
+    main()
@@ -0,0 +1,211 @@
+"""
+Reys manifest Excel faylini o'qish - faqat MARK va TOTAL PRICE ustunlari, ustun amallari bilan
+"""
+import numbers
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Rad etish sabablari
+REASON_EMPTY_CODE = "MARK bo'sh"
+REASON_BAD_CODE = "MARK raqam emas"
+REASON_BAD_PRICE = "TOTAL PRICE son emas"
+REASON_LONG_CODE = "MARK juda uzun (Excel son sifatida aniq saqlamaydi)"
+
+# float64 butun sonlarni faqat shu chegaragacha aniq saqlaydi - undan uzun kodlar buzilgan bo'lishi mumkin
+MAX_EXACT_FLOAT_CODE = 2 ** 53
+
+
+def find_mark_column(columns) -> Optional[int]:
+    """MARK ustunining o'rni (mark yoki mark... bilan boshlanadigan birinchi ustun)"""
+    for position, col in enumerate(columns):
+        col_name = str(col).lower().strip()
+        if col_name == 'mark' or col_name.startswith('mark'):
+            return position
+    return None
+
+
+def find_price_column(columns) -> Optional[int]:
+    """TOTAL PRICE (yoki xato yozilgan TOTAL PIRCE) ustunining o'rni"""
+    for position, col in enumerate(columns):
+        col_name = str(col).lower()
+        if 'total' in col_name and ('price' in col_name or 'pirce' in col_name):
+            return position
+    return None
+
+
+def _excel_engine(file_name: str) -> Optional[str]:
+    # .xlsx uchun openpyxl (pandas uni read-only rejimda ochadi), .xls uchun pandas o'zi tanlaydi
+    return "openpyxl" if str(file_name).lower().endswith(".xlsx") else None
+
+
+def _rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, numbers.Number)
+
+
+def _is_integral(value) -> bool:
+    return isinstance(value, numbers.Integral)
+
+
+def normalize_codes(codes: pd.Series):
+    """MARK qiymatlarini kodga aylantirish - (kodlar, rad etish sabablari) qaytaradi.
+
+    Son qiymatlar butun qismiga (123.0 -> "123"), matnlar esa faqat raqamlardan iborat bo'lsa qabul qilinadi.
+    Butun sonlar int64'ga o'tkazilmasdan to'g'ridan-to'g'ri matnga aylanadi; 2**53 dan katta float kodlar
+    aniq emas, shuning uchun rad etiladi.
+    """
+    result = pd.Series(None, index=codes.index, dtype=object)
+    reasons = pd.Series(None, index=codes.index, dtype=object)
+
+    missing = codes.isna()
+    reasons[missing] = REASON_EMPTY_CODE
+
+    if pd.api.types.is_numeric_dtype(codes.dtype) and not pd.api.types.is_bool_dtype(codes.dtype):
+        numeric_mask = ~missing
+        text_mask = pd.Series(False, index=codes.index)
+    else:
+        numeric_mask = ~missing & codes.map(_is_number).astype(bool)
+        text_mask = ~missing & ~numeric_mask
+
+    if numeric_mask.any():
+        values = codes[numeric_mask]
+
+        # Butun sonlar (int ustun yoki Python int) - Python int orqali, uzunligidan qat'i nazar aniq
+        if pd.api.types.is_integer_dtype(values.dtype):
+            integral = pd.Series(True, index=values.index)
+        else:
+            integral = values.map(_is_integral).astype(bool)
+        if integral.any():
+            result[values.index[integral]] = [str(int(value)) for value in values[integral].tolist()]
+
+        floats = values[~integral].astype(float)
+        if len(floats):
+            finite = np.isfinite(floats)
+            exact = finite & (floats.abs() < MAX_EXACT_FLOAT_CODE)
+            # Chegara ichidagi qiymatlar int64'ga sig'adi
+            result[floats.index[exact]] = np.trunc(floats[exact]).astype("int64").astype(str)
+            reasons[floats.index[~finite]] = REASON_BAD_CODE
+            reasons[floats.index[finite & ~exact]] = REASON_LONG_CODE
+
+    if text_mask.any():
+        texts = codes[text_mask].astype(str).str.strip()
+        valid = texts.str.isdigit()
+        result[texts.index[valid]] = texts[valid]
+        reasons[texts.index[~valid]] = REASON_BAD_CODE
+
+    return result, reasons
+
+
+def coerce_prices(prices: pd.Series):
+    """TOTAL PRICE qiymatlarini float'ga aylantirish - bo'sh katak 0.0, son bo'lmagan matn rad etiladi"""
+    reasons = pd.Series(None, index=prices.index, dtype=object)
+    missing = prices.isna()
+
+    if pd.api.types.is_numeric_dtype(prices.dtype):
+        result = prices.astype(float)
+    else:
+        result = pd.Series(np.nan, index=prices.index, dtype=float)
+        numeric_mask = ~missing & prices.map(_is_number).astype(bool)
+        text_mask = ~missing & prices.map(lambda value: isinstance(value, str)).astype(bool)
+
+        if numeric_mask.any():
+            result[numeric_mask] = prices[numeric_mask].astype(float)
+        if text_mask.any():
+            result[text_mask] = pd.to_numeric(prices[text_mask].str.strip(), errors="coerce")
+
+        # Na son, na matn bo'lgan, yoki songa aylanmagan qiymatlar
+        reasons[~missing & result.isna()] = REASON_BAD_PRICE
+
+    result[missing] = 0.0
+    return result, reasons
+
+
+def parse_manifest(source, file_name: str) -> Dict[str, Any]:
+    """Manifestni (fayl yo'li yoki xotiradagi bufer) o'qish: avval sarlavha, keyin faqat ikkita kerakli ustun.
+
+    Natija: success, error, items ([{'code', 'price'}]), rejected ([{'row', 'reason', 'value'}]),
+    rows_total, mark_column, price_column.
+    """
+    engine = _excel_engine(file_name)
+
+    # Xotiradagi bufer yuklab olingandan keyin oxirida turadi
+    _rewind(source)
+    header = pd.read_excel(source, nrows=0, engine=engine)
+    columns = list(header.columns)
+
+    mark_position = find_mark_column(columns)
+    if mark_position is None:
+        return {"success": False, "error": "MARK ustuni topilmadi", "columns": columns}
+
+    price_position = find_price_column(columns)
+    if price_position is None:
+        return {"success": False, "error": "TOTAL PRICE yoki TOTAL PIRCE ustuni topilmadi", "columns": columns}
+
+    _rewind(source)
+    df = pd.read_excel(source, usecols=sorted({mark_position, price_position}), engine=engine)
+
+    # usecols ustunlarni fayldagi tartibda qaytaradi
+    mark_series = df.iloc[:, 0 if mark_position <= price_position else 1]
+    price_series = df.iloc[:, 0 if price_position <= mark_position else -1]
+
+    codes, code_reasons = normalize_codes(mark_series)
+    prices, price_reasons = coerce_prices(price_series)
+
+    # Kod xatosi narx xatosidan ustun turadi
+    reasons = code_reasons.where(code_reasons.notna(), price_reasons)
+    accepted = reasons.isna()
+
+    items = [
+        {'code': code, 'price': float(price)}
+        for code, price in zip(codes[accepted].tolist(), prices[accepted].tolist())
+    ]
+
+    rejected_index = reasons.index[~accepted]
+    rejected: List[Dict[str, Any]] = [
+        {
+            # Excel qator raqami (1-qator sarlavha)
+            'row': int(position) + 2,
+            'reason': reason,
+            'value': mark if reason != REASON_BAD_PRICE else price,
+        }
+        for position, reason, mark, price in zip(
+            df.index.get_indexer(rejected_index),
+            reasons[~accepted].tolist(),
+            mark_series[~accepted].tolist(),
+            price_series[~accepted].tolist(),
+        )
+    ]
+
+    return {
+        "success": True,
+        "error": None,
+        "items": items,
+        "rejected": rejected,
+        "rows_total": len(df),
+        "mark_column": columns[mark_position],
+        "price_column": columns[price_position],
+    }
+
+
+def summarize_rejections(rejected: List[Dict[str, Any]], limit: int = 10) -> str:
+    """Rad etilgan qatorlarni sabab bo'yicha qisqa matnga aylantirish (bo'sh MARK qatorlari faqat sanaladi)"""
+    if not rejected:
+        return ""
+
+    counts: Dict[str, int] = {}
+    for item in rejected:
+        counts[item['reason']] = counts.get(item['reason'], 0) + 1
+
+    lines = [f"   {reason}: {count} ta" for reason, count in counts.items()]
+    details = [item for item in rejected if item['reason'] != REASON_EMPTY_CODE]
+    for item in details[:limit]:
+        lines.append(f"   • {item['row']}-qator: {item['reason']} ({item['value']})")
+    if len(details) > limit:
+        lines.append(f"   ... va yana {len(details) - limit} ta qator")
+    return "\n".join(lines)
@@ -0,0 +1,168 @@
+"""
+Hisobot xabarlarini yig'ish - oldindan tayyorlangan ustun maketlari, daqiqalik vaqt keshi va 4096 belgi bo'yicha sahifalash
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Telegram bitta xabar uchun maksimal uzunlik (UTF-16 birliklarida)
+MAX_MESSAGE_LENGTH = 4096
+
+# O'zbekiston vaqti (GMT+5)
+UZBEKISTAN_TZ = timezone(timedelta(hours=5))
+
+CODE_FENCE = "```"
+
+# Sahifa raqami uchun sarlavhada qoldiriladigan joy: " (99/99)"
+_PAGE_MARK_RESERVE = 10
+
+_stamp_minute: Optional[int] = None
+_stamp_text = ""
+
+
+def uz_timestamp() -> str:
+    """'dd.mm.YYYY - HH:MM' (O'zbekiston vaqti) - bir daqiqa ichida qayta hisoblanmaydi"""
+    global _stamp_minute, _stamp_text
+    minute = int(time.time() // 60)
+    if minute != _stamp_minute:
+        _stamp_text = datetime.fromtimestamp(minute * 60, UZBEKISTAN_TZ).strftime("%d.%m.%Y - %H:%M")
+        _stamp_minute = minute
+    return _stamp_text
+
+
+def text_length(text: str) -> int:
+    """Telegram hisoblaydigan uzunlik (emoji'lar 2 birlik)"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def timestamp_line() -> str:
+    return f"🕐 {uz_timestamp()}"
+
+
+# Keshlangan sahifaga yuborishda qo'shiladigan "\n🕐 ..." qatori uchun joy (UTF-16)
+TIMESTAMP_RESERVE = text_length("\n🕐 00.00.0000 - 00:00")
+
+
+def stamp_page(page: str) -> str:
+    """Keshlangan sahifaga yuborish paytidagi vaqt qatorini qo'shish"""
+    return f"{page}\n{timestamp_line()}"
+
+
+def clip_text(text: str, limit: int = MAX_MESSAGE_LENGTH) -> str:
+    """Matnni limit (UTF-16 birliklarida) gacha qisqartirish - emoji o'rtasidan bo'linmaydi"""
+    encoded = text.encode("utf-16-le")
+    if len(encoded) <= limit * 2:
+        return text
+    # Yarim qolgan surrogat juftligi tashlab yuboriladi
+    return encoded[:limit * 2].decode("utf-16-le", errors="ignore")
+
+
+class Column:
+    """Jadval ustuni: kenglik, tekislash va uzun qiymatni qisqartirish usuli"""
+
+    __slots__ = ("title", "width", "align", "ellipsis", "clip")
+
+    def __init__(self, title: str, width: int, align: str = "<", ellipsis: bool = False, clip: bool = True):
+        self.title = title
+        self.width = width
+        self.align = align
+        # True: "abcdefg…", False: shunchaki kesish
+        self.ellipsis = ellipsis
+        # False: qiymat (masalan, summa) kesilmaydi, faqat to'ldiriladi
+        self.clip = clip
+
+    def fit(self, value) -> str:
+        text = str(value)
+        if not self.clip or len(text) <= self.width:
+            return text
+        return text[:self.width - 1] + "…" if self.ellipsis else text[:self.width]
+
+
+class TableLayout:
+    """Ustunlar maketi - format satri, sarlavha va ajratgich bir marta quriladi"""
+
+    def __init__(self, *columns: Column):
+        self.columns = columns
+        self._template = " ".join(f"{{{i}:{column.align}{column.width}}}" for i, column in enumerate(columns))
+        self.header = self._template.format(*(column.title for column in columns))
+        self.separator = " ".join("─" * column.width for column in columns)
+
+    def row(self, *values) -> str:
+        return self._template.format(*(column.fit(value) for column, value in zip(self.columns, values)))
+
+    def head(self) -> Tuple[str, str]:
+        return self.header, self.separator
+
+
+def _page(title: str, head: Sequence[str], rows: Sequence[str], footer: Sequence[str], code_block: bool) -> str:
+    parts = [title, ""]
+    if code_block:
+        parts.append(CODE_FENCE)
+    parts.extend(head)
+    parts.extend(rows)
+    if code_block:
+        parts.append(CODE_FENCE)
+    if footer:
+        parts.append("")
+        parts.extend(footer)
+    return "\n".join(parts)
+
+
+def _split_row(row: str, budget: int) -> List[str]:
+    """Budget'ga sig'maydigan qatorni har biri (yangi qator bilan) budget'dan oshmaydigan qismlarga bo'lish"""
+    pieces: List[str] = []
+    while text_length(row) + 1 > budget:
+        piece = clip_text(row, budget - 1)
+        if not piece:
+            # Budget bitta belgiga ham yetmaydi - cheksiz siklga tushmaslik uchun bittadan olinadi
+            piece = row[0]
+        pieces.append(piece)
+        row = row[len(piece):]
+    if row:
+        pieces.append(row)
+    return pieces
+
+
+def chunk_rows(rows: Sequence[str], budget: int, max_rows: Optional[int] = None) -> List[List[str]]:
+    """Qatorlarni har biri budget (UTF-16) va max_rows dan oshmaydigan bo'laklarga ajratish.
+
+    Budget'dan uzun qator bir nechta qatorga bo'linadi - aks holda u bo'sh bo'lakka tushib, sahifa 4096 dan oshardi.
+    """
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for row in rows:
+        cost = text_length(row) + 1
+        pieces = [row] if cost <= budget else _split_row(row, budget)
+        for piece in pieces:
+            cost = text_length(piece) + 1
+            if current and (used + cost > budget or (max_rows and len(current) >= max_rows)):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(piece)
+            used += cost
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+
+def render_pages(title: str, rows: Sequence[str], footer: Iterable[str] = (), head: Sequence[str] = (),
+                 code_block: bool = False, max_rows: Optional[int] = None,
+                 limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Hisobotni sahifalarga bo'lish: har sahifada sarlavha, jadval boshi va yakuniy qatorlar takrorlanadi.
+
+    Bir nechta sahifa bo'lsa, sarlavhaga " (1/3)" qo'shiladi.
+    """
+    footer = list(footer)
+    fixed = text_length(_page(title, head, [], footer, code_block)) + _PAGE_MARK_RESERVE
+    chunks = chunk_rows(rows, max(1, limit - fixed), max_rows)
+
+    if len(chunks) == 1:
+        return [_page(title, head, chunks[0], footer, code_block)]
+
+    total = len(chunks)
+    return [
+        _page(f"{title} ({number}/{total})", head, chunk, footer, code_block)
+        for number, chunk in enumerate(chunks, 1)
+    ]
+
@@ -0,0 +1,234 @@
+"""
+Pul summalari uchun aniq (fixed-point) tur - butun sentlarda saqlanadi, float yaxlitlash shovqinisiz
+"""
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict
+
+# Odatiy katakcha bitta o'tishda: [belgilar] [-] [belgilar] 1 234.5 [,50] [belgilar] - ishora, butun qism
+# (bo'shliq/NBSP/nuqta bilan) va verguldan keyingi kasr. Belgilar orasida raqam, nuqta, vergul va '-' bo'lmaydi
+_AMOUNT_CELL = re.compile(r'[^\d.,\-]*+(?:(-)[^\d.,\-]*+)?((?:[0-9][0-9 \xa0.]*+)?)(?:,([0-9]*+))?[^\d.,\-]*+')
+# Qolgan (noodatiy) matnlar uchun: raqamlar, nuqta, vergul, bo'shliqlar qoladi
+_AMOUNT_JUNK = re.compile(r'[^\d\.,\s]')
+_AMOUNT_DIGITS = re.compile(r'\d+')
+# Oddiy "1234.50" ko'rinishi - Decimal'siz tez yo'l
+_PLAIN_DECIMAL = re.compile(r'([0-9]*)\.([0-9]*)')
+
+# Ko'p katakchalar poll'lar orasida o'zgarmaydi - natija xom matn bo'yicha eslab qolinadi
+AMOUNT_CACHE_SIZE = 65536
+
+_CENT = Decimal(100)
+
+
+def _decimal_to_cents(value: Decimal) -> int:
+    return int((value * _CENT).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def _text_to_cents(text: str) -> int:
+    """"1234.505" kabi matnni sentlarga aylantirish (yarim sent yuqoriga), noto'g'ri bo'lsa InvalidOperation"""
+    match = _PLAIN_DECIMAL.fullmatch(text)
+    if match is None or match.end() == 1:
+        return _decimal_to_cents(Decimal(text))
+    whole, fraction = match.groups()
+    cents = int(whole or 0) * 100 + int((fraction[:2] or '0').ljust(2, '0'))
+    if len(fraction) > 2 and fraction[2] >= '5':
+        cents += 1
+    return cents
+
+
+def to_cents(value) -> int:
+    """Money, int, float, Decimal yoki matnni sentlarga aylantirish (yarim sent yuqoriga yaxlitlanadi)"""
+    if isinstance(value, Money):
+        return value.cents
+    if isinstance(value, bool):
+        raise TypeError("bool summa emas")
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        # repr eng qisqa aniq ko'rinish beradi: 0.285 -> "0.285" -> 29 sent
+        return _decimal_to_cents(Decimal(repr(value)))
+    if isinstance(value, Decimal):
+        return _decimal_to_cents(value)
+    if isinstance(value, str):
+        try:
+            return _text_to_cents(value.strip().replace(' ', '').replace(',', '.'))
+        except InvalidOperation:
+            raise ValueError(f"Summa emas: {value!r}")
+    raise TypeError(f"Summa emas: {type(value).__name__}")
+
+
+class Money:
+    """Dollar summasi - butun sentlarda. Taqqoslash va ayirish aniq, format Decimal orqali"""
+
+    __slots__ = ("cents",)
+
+    def __init__(self, cents: int = 0):
+        self.cents = cents
+
+    @classmethod
+    def of(cls, value) -> "Money":
+        """Istalgan son/matndan Money (Money bo'lsa o'zi qaytariladi)"""
+        if isinstance(value, Money):
+            return value
+        return cls(to_cents(value))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.cents).scaleb(-2)
+
+    def _other_cents(self, other):
+        if isinstance(other, Money):
+            return other.cents
+        if isinstance(other, (int, float, Decimal)) and not isinstance(other, bool):
+            return to_cents(other)
+        return None
+
+    # Arifmetika (sonlar sentgacha yaxlitlanadi)
+    def __add__(self, other):
+        cents = self._other_cents(other)
+        return NotImplemented if cents is None else Money(self.cents + cents)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        cents = self._other_cents(other)
+        return NotImplemented if cents is None else Money(self.cents - cents)
+
+    def __rsub__(self, other):
+        cents = self._other_cents(other)
+        return NotImplemented if cents is None else Money(cents - self.cents)
+
+    def __neg__(self):
+        return Money(-self.cents)
+
+    def __abs__(self):
+        return Money(abs(self.cents))
+
+    def __bool__(self):
+        return self.cents != 0
+
+    def __float__(self):
+        return self.cents / 100
+
+    # Taqqoslash faqat Money bilan: hash sentlardan, int/float bilan teng deyilsa hash shartnomasi buziladi.
+    # Tartib ham shunga mos - Money va sonni solishtirish TypeError beradi (summa > ZERO deb yoziladi)
+    def __eq__(self, other):
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, Money):
+            return self.cents < other.cents
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, Money):
+            return self.cents <= other.cents
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, Money):
+            return self.cents > other.cents
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, Money):
+            return self.cents >= other.cents
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.cents)
+
+    # Ko'rinish
+    def __str__(self):
+        sign = "-" if self.cents < 0 else ""
+        whole, cents = divmod(abs(self.cents), 100)
+        return f"{sign}{whole}.{cents:02d}"
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+    def __format__(self, spec: str) -> str:
+        # ",.2f" kabi format'lar float'siz, Decimal orqali
+        return format(self.to_decimal(), spec) if spec else str(self)
+
+
+ZERO = Money(0)
+
+
+# Xom matn -> Money. To'lganda butunlay tozalanadi - lru_cache'ning har miss'dagi ro'yxat yangilashisiz
+_amount_cache: Dict[str, Money] = {}
+
+
+def parse_money(raw: str) -> Money:
+    """Summa matnini Money'ga aylantirish (natija xom matn bo'yicha keshlanadi)"""
+    money = _amount_cache.get(raw)
+    if money is None:
+        if len(_amount_cache) >= AMOUNT_CACHE_SIZE:
+            _amount_cache.clear()
+        money = _amount_cache[raw] = parse_money_uncached(raw)
+    return money
+
+
+def clear_amount_cache():
+    _amount_cache.clear()
+
+
+def parse_money_uncached(raw: str) -> Money:
+    """Summa matnini bitta regex o'tishida Money'ga aylantirish - manfiy qiymatlar, NBSP va 'Â' belgilari bilan.
+
+    Vergul bo'lsa kasr ajratgich deb olinadi ("1 234,50" -> 1234.50), aks holda barcha raqamlar
+    butun son sifatida birlashtiriladi ("1.234" -> 1234.00). Odatiy ko'rinishga tushmagan matnlar
+    umumiy (sekinroq) yo'l bilan ishlanadi.
+    """
+    match = _AMOUNT_CELL.fullmatch(raw)
+    if match is None:
+        return _parse_money_general(raw)
+
+    sign, whole, fraction = match.groups()
+    if not whole.isdigit():
+        if fraction is not None and '.' in whole:
+            # "1.234,5" - nuqta va vergul birga, umumiy yo'l hal qiladi
+            return _parse_money_general(raw)
+        # Vergulsiz matnda nuqta ham minglar ajratgichi ("1.234" -> 1234)
+        whole = whole.replace(' ', '').replace('\xa0', '').replace('.', '')
+
+    if fraction:
+        # Butun qism va kasrning ikki raqami bitta int() bilan ("1234" + "50" -> 123450 sent)
+        cents = int(whole + fraction[:2].ljust(2, '0'))
+        # Yarim sent yuqoriga
+        if len(fraction) > 2 and fraction[2] >= '5':
+            cents += 1
+    elif whole:
+        cents = int(whole) * 100
+    else:
+        return ZERO
+    return Money(-cents if sign else cents)
+
+
+def _parse_money_general(raw: str) -> Money:
+    """Noodatiy matnlar (harflar raqamlar orasida, bir nechta vergul, '-' oxirida va h.k.) uchun to'liq yo'l"""
+    text = raw.strip()
+    is_negative = '-' in text
+
+    # '-', 'Â' va boshqa belgilar bitta o'tishda olib tashlanadi, NBSP esa oddiy bo'shliqqa aylanadi
+    cleaned = _AMOUNT_JUNK.sub('', text.replace('\xa0', ' ')).strip()
+    if not cleaned:
+        return ZERO
+
+    if ',' in cleaned:
+        try:
+            cents = _text_to_cents(cleaned.replace(' ', '').replace(',', '.'))
+            return Money(-cents if is_negative else cents)
+        except InvalidOperation:
+            # Masalan "1,234,5" - raqamlarni birlashtirish usuliga o'tiladi
+            pass
+
+    number_str = ''.join(_AMOUNT_DIGITS.findall(cleaned))
+    if not number_str:
+        return ZERO
+    try:
+        amount = int(number_str)
+    except ValueError:
+        return ZERO
+    return Money((-amount if is_negative else amount) * 100)
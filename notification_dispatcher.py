@@ -0,0 +1,271 @@
+"""
+Telegram xabarlarini navbat orqali, tezlik cheklovi bilan yuborish
+"""
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram.error import NetworkError, RetryAfter
+
+from message_render import MAX_MESSAGE_LENGTH, clip_text, text_length
+
+logger = logging.getLogger(__name__)
+
+# Bo'sh turgan chatlarning bucket va lock'lari shu oraliqda tozalanadi (soniya)
+IDLE_SWEEP_INTERVAL = 60.0
+
+# To'xtashda navbatni yuborib bo'lish uchun ko'pi bilan shuncha kutiladi (main.py monitorni 15 soniya kutadi)
+DRAIN_TIMEOUT = 10.0
+
+
+class TokenBucket:
+    """Token bucket tezlik cheklovchisi (sekundiga rate ta, capacity gacha portlash)"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def is_idle(self, now: float) -> bool:
+        """Bucket to'lgan va hech kim kutmayapti - o'chirilsa tezlik cheklovi o'zgarmaydi"""
+        if self._lock.locked() or now < self.paused_until:
+            return False
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+    def pause(self, seconds: float):
+        """Telegram RetryAfter qaytarganda barcha yuborishlarni to'xtatib turish"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        """Bitta token olish - yetarli bo'lmasa kutish"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class _Outbox:
+    """Bitta chat uchun yuborilishi kutilayotgan xabarlar"""
+
+    __slots__ = ("texts", "follow_up", "enqueued_at")
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.follow_up: Optional[Tuple[str, Any]] = None
+        self.enqueued_at = time.monotonic()
+
+
+def _join_messages(texts: List[str], limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """Bir chat uchun to'plangan xabarlarni limitdan (UTF-16 birliklarida) oshmaydigan qilib birlashtirish"""
+    messages: List[str] = []
+    current = ""
+    current_length = 0
+    for text in texts:
+        text = clip_text(text, limit)
+        length = text_length(text)
+        if not current:
+            current, current_length = text, length
+        elif current_length + 2 + length > limit:
+            messages.append(current)
+            current, current_length = text, length
+        else:
+            # "\n\n" ajratgich - 2 birlik
+            current = f"{current}\n\n{text}"
+            current_length += 2 + length
+    if current:
+        messages.append(current)
+    return messages
+
+
+class NotificationDispatcher:
+    """Worker pool, global va chat bo'yicha tezlik cheklovi, bir chat xabarlarini birlashtirish"""
+
+    def __init__(self, bot, workers: int = 4, global_rate: float = 25.0,
+                 per_chat_rate: float = 1.0, max_retries: int = 3):
+        self.bot = bot
+        self.workers = workers
+        self.max_retries = max_retries
+        self.per_chat_rate = per_chat_rate
+        self.global_bucket = TokenBucket(global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, _Outbox] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._last_sweep = time.monotonic()
+
+        # Metrikalar
+        self.sent_count = 0
+        self.failed_count = 0
+        self.coalesced_count = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+        self._latency_samples = 0
+
+    def start(self):
+        """Worker'larni joriy event loop'da ishga tushirish"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"📮 Xabar dispetcheri ishga tushdi ({self.workers} worker)")
+
+    async def stop(self, drain: bool = True, timeout: float = DRAIN_TIMEOUT):
+        """Worker'larni to'xtatish (drain=True bo'lsa navbatdagilar ko'pi bilan timeout soniya yuboriladi).
+
+        Kutish tugamasa yoki stop o'zi bekor qilinsa ham worker'lar bekor qilinib, tugashi kutiladi.
+        """
+        if not self._tasks:
+            return
+        try:
+            if drain:
+                await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"📮 Navbat {timeout} soniyada bo'shamadi, {self.queue_depth()} ta chat xabari tashlab ketildi")
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+            # Yuborilmay qolganlar unutiladi - qayta start() yangi navbat bilan boshlanadi
+            self._pending.clear()
+            self._queue = None
+        logger.info(f"📮 Xabar dispetcheri to'xtatildi: {self.metrics()}")
+
+    def enqueue(self, chat_id: int, text: str, follow_up: Optional[Tuple[str, Any]] = None):
+        """Xabarni navbatga qo'yish - shu chat uchun kutilayotgan xabar bo'lsa, unga qo'shiladi"""
+        if self._queue is None:
+            self.start()
+
+        outbox = self._pending.get(chat_id)
+        if outbox is None:
+            outbox = _Outbox()
+            self._pending[chat_id] = outbox
+            self._queue.put_nowait(chat_id)
+        else:
+            self.coalesced_count += 1
+
+        outbox.texts.append(text)
+        if follow_up is not None:
+            outbox.follow_up = follow_up
+
+    def queue_depth(self) -> int:
+        """Yuborilishi kutilayotgan chatlar soni"""
+        return len(self._pending)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Navbat chuqurligi va yuborish kechikishi metrikalari"""
+        avg_latency = self._latency_total / self._latency_samples if self._latency_samples else 0.0
+        return {
+            "queue_depth": self.queue_depth(),
+            "tracked_chats": len(self._chat_buckets),
+            "sent": self.sent_count,
+            "failed": self.failed_count,
+            "coalesced": self.coalesced_count,
+            "latency_last": round(self.last_latency, 3),
+            "latency_avg": round(avg_latency, 3),
+            "latency_max": round(self.max_latency, 3),
+        }
+
+    async def _worker(self, index: int):
+        while True:
+            chat_id = await self._queue.get()
+            try:
+                outbox = self._pending.pop(chat_id, None)
+                if outbox is not None:
+                    await self._deliver(chat_id, outbox)
+            except Exception as e:
+                logger.error(f"Xabar dispetcheri worker {index} xatoligi: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.per_chat_rate, capacity=1.0)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _deliver(self, chat_id: int, outbox: _Outbox):
+        """Bir chat uchun to'plangan xabarlarni yuborish (tartib saqlanadi)"""
+        lock = self._chat_locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            delivered = True
+            for text in _join_messages(outbox.texts):
+                delivered = await self._send(chat_id, text) and delivered
+
+            if outbox.follow_up is not None:
+                follow_text, reply_markup = outbox.follow_up
+                await self._send(chat_id, follow_text, reply_markup=reply_markup)
+
+        latency = time.monotonic() - outbox.enqueued_at
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._latency_total += latency
+        self._latency_samples += 1
+        if delivered:
+            self.sent_count += 1
+        else:
+            self.failed_count += 1
+
+        if time.monotonic() - self._last_sweep >= IDLE_SWEEP_INTERVAL:
+            self._forget_idle_chats()
+
+    def _forget_idle_chats(self):
+        """Navbatda xabari yo'q, lock'i bo'sh va bucket'i to'lgan chatlarni unutish"""
+        now = time.monotonic()
+        self._last_sweep = now
+        for chat_id in list(self._chat_buckets):
+            if chat_id in self._pending:
+                continue
+            lock = self._chat_locks.get(chat_id)
+            if lock is not None and lock.locked():
+                continue
+            if self._chat_buckets[chat_id].is_idle(now):
+                del self._chat_buckets[chat_id]
+                self._chat_locks.pop(chat_id, None)
+
+        # Bucket'siz qolgan lock'lar (xabar yuborilmay turib tugagan chatlar)
+        for chat_id in list(self._chat_locks):
+            if chat_id not in self._chat_buckets and chat_id not in self._pending \
+                    and not self._chat_locks[chat_id].locked():
+                del self._chat_locks[chat_id]
+
+    async def _send(self, chat_id: int, text: str, reply_markup=None) -> bool:
+        """Bitta xabarni tezlik cheklovi va RetryAfter'ni hisobga olib yuborish"""
+        for attempt in range(self.max_retries + 1):
+            await self.global_bucket.acquire()
+            await self._chat_bucket(chat_id).acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, reply_markup=reply_markup)
+                return True
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                delay = retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+                logger.warning(f"Telegram RetryAfter: {delay} soniya kutilmoqda (chat {chat_id})")
+                self.global_bucket.pause(delay)
+                await asyncio.sleep(delay)
+            except NetworkError as e:
+                logger.warning(f"Xabar yuborishda tarmoq xatoligi (chat {chat_id}, urinish {attempt + 1}): {e}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+            except Exception as e:
+                logger.error(f"Xabar yuborishda xatolik (chat {chat_id}): {e}")
+                return False
+        return False
@@ -0,0 +1,131 @@
+"""
+Balans monitori uchun moslashuvchan polling jadvali - har bir sheet uchun alohida tezlik
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from config import get_monitor_intervals, get_monitor_max_backoff
+
+logger = logging.getLogger(__name__)
+
+# Qayta urinish kerak bo'lgan HTTP javoblari (kvota va server xatoliklari)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def http_status_of(error: BaseException) -> Optional[int]:
+    """requests.HTTPError ichidagi javob status kodi"""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Kvota/server/tarmoq xatoligimi (orqaga chekinish kerak)"""
+    status = http_status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError))
+
+
+class PollCadence:
+    """Bitta sheet uchun polling oralig'i: o'zgarishdan keyin tez, jim turganda sekinlashadi"""
+
+    def __init__(self, name: str, fast: float, slow: float, decay: float = 1.5,
+                 max_backoff: float = 300.0, jitter: float = 0.2):
+        self.name = name
+        self.fast = fast
+        self.slow = slow
+        self.decay = decay
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.interval = fast
+        self.failures = 0
+        self.next_due = time.monotonic()
+
+    def _schedule(self, delay: float):
+        self.next_due = time.monotonic() + delay
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def on_success(self, changed: bool):
+        """Muvaffaqiyatli poll: o'zgarish bo'lsa tez rejimga, bo'lmasa sekinlashtirish"""
+        self.failures = 0
+        if changed:
+            self.interval = self.fast
+        else:
+            self.interval = min(self.slow, self.interval * self.decay)
+        self._schedule(self.interval)
+
+    def on_error(self, error: BaseException):
+        """Xatolik: kvota/server xatoliklarida eksponensial orqaga chekinish (jitter bilan)"""
+        self.failures += 1
+        if is_retryable_error(error):
+            delay = min(self.max_backoff, self.fast * (2 ** self.failures))
+            delay = self._jittered(delay)
+            logger.warning(f"⏳ {self.name}: {http_status_of(error) or type(error).__name__}, "
+                           f"{delay:.1f} soniyadan keyin qayta urinish")
+        else:
+            delay = min(self.max_backoff, max(self.interval, self.fast * self.failures))
+        self._schedule(delay)
+
+    def poke(self):
+        """Tashqi hodisa (masalan, import) - darhol va tez rejimda tekshirish"""
+        self.interval = self.fast
+        if self.failures == 0:
+            self.next_due = time.monotonic()
+
+    def remaining(self) -> float:
+        return max(0.0, self.next_due - time.monotonic())
+
+
+class PollScheduler:
+    """Bir nechta sheet cadence'lari - navbatdagi poll vaqtini kutish va poke qilish"""
+
+    def __init__(self, cadences: List[PollCadence]):
+        self.cadences: Dict[str, PollCadence] = {cadence.name: cadence for cadence in cadences}
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def _event(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    def due(self) -> List[str]:
+        """Hozir tekshirilishi kerak bo'lgan sheet'lar"""
+        now = time.monotonic()
+        return [name for name, cadence in self.cadences.items() if cadence.next_due <= now]
+
+    async def wait(self):
+        """Keyingi poll vaqtigacha yoki poke qilinguncha kutish"""
+        timeout = min(cadence.remaining() for cadence in self.cadences.values())
+        if timeout <= 0:
+            return
+        event = self._event()
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        event.clear()
+
+    def poke(self, *names: str):
+        """Ko'rsatilgan (yoki barcha) sheet'larni darhol tekshirishga majburlash"""
+        for name in names or tuple(self.cadences):
+            cadence = self.cadences.get(name)
+            if cadence is not None:
+                cadence.poke()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+
+_fast, _air_slow, _container_slow = get_monitor_intervals()
+
+# Global jadval - monitor undan foydalanadi, import jarayoni esa poke qiladi
+poll_scheduler = PollScheduler([
+    PollCadence("air", fast=_fast, slow=_air_slow, max_backoff=get_monitor_max_backoff()),
+    PollCadence("container", fast=_fast, slow=_container_slow, max_backoff=get_monitor_max_backoff()),
+])
@@ -0,0 +1,98 @@
+"""
+Manager hisobotlari uchun sahifalangan sessiyalar - snapshot versiyasi bo'yicha keshlangan, tugmalar bilan varaqlanadi
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import get_report_page_rows
+
+# Hisobot turlari
+REPORT_AIR = "air"
+REPORT_CONTAINER = "container"
+
+
+class ReportSession:
+    """Bitta ochilgan hisobot: tayyor sahifalar va joriy sahifa"""
+
+    __slots__ = ("id", "kind", "version", "pages", "owner_id", "page", "created_at")
+
+    def __init__(self, session_id: int, kind: str, version, pages: List[str], owner_id: int):
+        self.id = session_id
+        self.kind = kind
+        self.version = version
+        self.pages = pages
+        self.owner_id = owner_id
+        self.page = 0
+        self.created_at = time.monotonic()
+
+    @property
+    def total(self) -> int:
+        return len(self.pages)
+
+
+class ReportSessionManager:
+    """Hisobot sahifalari keshi (tur + snapshot versiyasi) va ochilgan sessiyalar (eng eskilari o'chiriladi)"""
+
+    def __init__(self, page_rows: int = 30, max_sessions: int = 200, ttl: float = 3600.0):
+        self.page_rows = page_rows
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        # tur -> (snapshot versiyasi, sahifalar) - faqat oxirgi versiya saqlanadi
+        self._rendered: Dict[str, Tuple[object, List[str]]] = {}
+        self._sessions: "OrderedDict[int, ReportSession]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def pages_for(self, kind: str, version, build: Callable[[], List[str]]) -> List[str]:
+        """Shu snapshot versiyasi uchun sahifalar - avval qurilgan bo'lsa qayta saralanmaydi va formatlanmaydi.
+
+        Versiya 304 javoblarda o'zgarmaydi, shuning uchun sahifalarda vaqt bo'lmasligi kerak (stamp_page).
+        """
+        with self._lock:
+            cached = self._rendered.get(kind)
+        if version is not None and cached is not None and cached[0] == version:
+            return cached[1]
+
+        pages = build()
+        with self._lock:
+            self._rendered[kind] = (version, pages)
+        return pages
+
+    def open(self, owner_id: int, kind: str, version, pages: List[str]) -> ReportSession:
+        """Yangi sessiya ochish (birinchi sahifa ko'rsatiladi)"""
+        with self._lock:
+            session = ReportSession(next(self._ids), kind, version, pages, owner_id)
+            self._sessions[session.id] = session
+            self._forget_old_sessions()
+            return session
+
+    def get(self, session_id: Optional[int]) -> Optional[ReportSession]:
+        """Sessiyani olish (muddati o'tgan bo'lsa None)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if time.monotonic() - session.created_at > self.ttl:
+                del self._sessions[session_id]
+                return None
+            return session
+
+    def _forget_old_sessions(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+
+def parse_page_callback(data: str) -> Tuple[Optional[int], Optional[int]]:
+    """"report_<sessiya>_<sahifa>" -> (sessiya id, sahifa)"""
+    try:
+        _, session_id, page = data.split("_")
+        return int(session_id), int(page)
+    except ValueError:
+        return None, None
+
+
+# Global sessiyalar
+report_sessions = ReportSessionManager(page_rows=get_report_page_rows())
@@ -0,0 +1,165 @@
+"""
+Google Sheets eksportlari uchun umumiy snapshot keshi
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import get_sheet_cache_ttl
+
+logger = logging.getLogger(__name__)
+
+SheetKey = Tuple[str, str]
+
+
+class SheetSnapshot:
+    """Bitta (sheet_id, gid) uchun bir marta yuklangan ma'lumotlar"""
+
+    __slots__ = ("key", "rows", "version", "digest", "etag", "last_modified", "fetched_at",
+                 "_derived", "_derived_lock")
+
+    def __init__(self, key: SheetKey, rows: List[List[str]], version: int):
+        self.key = key
+        self.rows = rows
+        self.version = version
+        # Eksport tanasining xeshi (loader bergan bo'lsa) - o'zgarmagan ma'lumotni tez aniqlash uchun
+        self.digest: Optional[str] = getattr(rows, "digest", None)
+        # HTTP validatorlari - keyingi yuklashda shartli GET uchun
+        self.etag: Optional[str] = getattr(rows, "etag", None)
+        self.last_modified: Optional[str] = getattr(rows, "last_modified", None)
+        self.fetched_at = time.monotonic()
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.RLock()
+
+    def age(self) -> float:
+        """Snapshot yoshi (soniya)"""
+        return time.monotonic() - self.fetched_at
+
+    def touch(self):
+        """Server ma'lumot o'zgarmaganini tasdiqladi (304) - snapshot yana yangi hisoblanadi"""
+        self.fetched_at = time.monotonic()
+
+    def derived(self, name: str, builder: Callable[["SheetSnapshot"], Any]) -> Any:
+        """Snapshot'dan hosil qilinadigan strukturani (index, jadval) bir marta qurish"""
+        value = self._derived.get(name)
+        if value is not None:
+            return value
+        with self._derived_lock:
+            value = self._derived.get(name)
+            if value is None:
+                value = builder(self)
+                self._derived[name] = value
+        return value
+
+
+class _Flight:
+    """Davom etayotgan yuklash - parallel so'rovlar shu natijani kutadi"""
+
+    __slots__ = ("event", "snapshot", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.snapshot: Optional[SheetSnapshot] = None
+        self.error: Optional[BaseException] = None
+
+
+class SheetSnapshotCache:
+    """(sheet_id, gid) bo'yicha TTL'li, single-flight snapshot keshi"""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = get_sheet_cache_ttl() if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._snapshots: Dict[SheetKey, SheetSnapshot] = {}
+        self._inflight: Dict[SheetKey, _Flight] = {}
+        self._generations: Dict[SheetKey, int] = {}
+        self._versions = itertools.count(1)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(sheet_id, gid) -> SheetKey:
+        return (str(sheet_id), str(gid))
+
+    def get(self, sheet_id, gid, loader: Callable[[Optional[SheetSnapshot]], Optional[List[List[str]]]],
+            max_age: Optional[float] = None) -> SheetSnapshot:
+        """Snapshot'ni keshdan olish, eskirgan bo'lsa loader orqali yangilash.
+
+        loader oldingi (eskirgan) snapshot'ni oladi; ma'lumot o'zgarmagan bo'lsa None
+        qaytarishi mumkin - shunda oldingi snapshot versiyasi va indekslari bilan qayta ishlatiladi.
+        """
+        key = self.make_key(sheet_id, gid)
+        ttl = self.ttl if max_age is None else max_age
+
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and snapshot.age() < ttl:
+                self.hits += 1
+                return snapshot
+
+            flight = self._inflight.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+            generation = self._generations.get(key, 0)
+            previous = snapshot
+
+        if not is_leader:
+            # Boshqa handler allaqachon yuklayapti - uning natijasini kutish
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.snapshot
+
+        try:
+            rows = loader(previous)
+            if rows is None:
+                if previous is None:
+                    raise ValueError(f"Sheet {key} uchun oldingi snapshot yo'q, lekin loader ma'lumot qaytarmadi")
+                previous.touch()
+                snapshot = previous
+            else:
+                snapshot = SheetSnapshot(key, rows, next(self._versions))
+            with self._lock:
+                # Yuklash vaqtida invalidate qilingan bo'lsa, natijani saqlamaslik
+                if self._generations.get(key, 0) == generation:
+                    self._snapshots[key] = snapshot
+            flight.snapshot = snapshot
+            return snapshot
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def peek(self, sheet_id, gid) -> Optional[SheetSnapshot]:
+        """Keshdagi snapshot'ni yangilamasdan olish"""
+        with self._lock:
+            return self._snapshots.get(self.make_key(sheet_id, gid))
+
+    def invalidate(self, sheet_id=None, gid=None):
+        """Keshni tozalash - yozishdan keyin keyingi o'qish yangi ma'lumot oladi"""
+        with self._lock:
+            if sheet_id is None:
+                keys = list(self._snapshots.keys()) + list(self._inflight.keys())
+            elif gid is None:
+                keys = [k for k in list(self._snapshots.keys()) + list(self._inflight.keys())
+                        if k[0] == str(sheet_id)]
+            else:
+                keys = [self.make_key(sheet_id, gid)]
+
+            for key in keys:
+                self._snapshots.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+        if keys:
+            logger.debug(f"Sheet keshi tozalandi: {keys}")
+
+
+# Global kesh - barcha handler'lar va monitor uchun bitta
+sheet_cache = SheetSnapshotCache()
@@ -0,0 +1,89 @@
+"""
+Google Sheets CSV eksportini oqim (stream) tarzida o'qish va qatorlarga ajratish
+"""
+import codecs
+import csv
+import hashlib
+import itertools
+from typing import Iterable, Iterator, List, Optional
+
+from sheet_transport import sheet_transport
+
+CHUNK_SIZE = 64 * 1024
+
+
+def export_csv_url(sheet_id, gid) -> str:
+    """Sheet'ning CSV eksport URL manzili"""
+    return f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+
+
+class CsvRows(list):
+    """CSV qatorlari ro'yxati + javob tanasining xeshi va HTTP validatorlari (ETag/Last-Modified)"""
+
+    def __init__(self, rows=(), digest: Optional[str] = None):
+        super().__init__(rows)
+        self.digest = digest
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+
+
+def iter_hashed_chunks(response, hasher, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Javob tanasini bo'laklab o'qish va har bir bo'lakni xeshga qo'shish"""
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            hasher.update(chunk)
+            yield chunk
+
+
+def iter_text_lines(chunks: Iterable[bytes], encoding: Optional[str] = None) -> Iterator[str]:
+    """Bayt bo'laklarini dekodlash va qatorlarga (\\n bilan) ajratish"""
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    tail = ""
+
+    for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        # Oxirgi bo'lak to'liq qator bo'lmasligi mumkin - keyingi chunk bilan birlashtiriladi
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[List[str]]:
+    """RFC 4180 bo'yicha CSV qatorlarini o'qish (qo'shtirnoq ichidagi vergul bitta katak)"""
+    for row in csv.reader(lines):
+        # Bo'sh qatorlarni o'tkazib yuborish
+        if not row or (len(row) == 1 and not row[0].strip()):
+            continue
+        yield [cell.strip() for cell in row]
+
+
+def fetch_csv_rows(url: str, max_rows: Optional[int] = None, etag: Optional[str] = None,
+                   last_modified: Optional[str] = None) -> Optional[CsvRows]:
+    """CSV eksportni yuklab olish - javob to'liq matn sifatida xotirada yig'ilmaydi.
+
+    Validator berilgan va sheet o'zgarmagan bo'lsa (304), None qaytariladi.
+    """
+    response = sheet_transport.get(url, etag=etag, last_modified=last_modified)
+    try:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        hasher = hashlib.blake2b(digest_size=16)
+        lines = iter_text_lines(iter_hashed_chunks(response, hasher), response.encoding)
+        rows = iter_csv_rows(lines)
+        if max_rows is not None:
+            # Qisman o'qilgan javob uchun xesh to'liq tanani ifodalamaydi
+            return CsvRows(itertools.islice(rows, max_rows))
+        result = CsvRows(rows)
+        # Xesh faqat tana to'liq o'qilgandan keyin tayyor bo'ladi
+        result.digest = hasher.hexdigest()
+        # Validatorlar ham faqat to'liq o'qilgan javob uchun saqlanadi
+        result.etag = response.headers.get("ETag")
+        result.last_modified = response.headers.get("Last-Modified")
+        return result
+    finally:
+        response.close()
@@ -0,0 +1,70 @@
+"""
+Sheet qatorlari uchun ixcham (slots) yozuv modellari
+"""
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from money import Money
+
+
+def format_amount(summa) -> str:
+    """Summani '1 234.50 $' ko'rinishida formatlash"""
+    return f"{summa:,.2f} $".replace(',', ' ')
+
+
+@dataclass(slots=True)
+class UserRecord:
+    """Users sheet qatori - A: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa"""
+    telefon: str
+    ism: str
+    list_nomi: str
+    kod: str
+    summa: Money
+    row_number: int
+    clean_phone: str = ""
+
+    @property
+    def summa_formatted(self) -> str:
+        return format_amount(self.summa)
+
+    def to_user_info(self) -> Dict[str, Any]:
+        """find_user_by_* natijasi sifatida lug'at"""
+        return {
+            "telefon": self.telefon,
+            "ism": self.ism,
+            "list_nomi": self.list_nomi,
+            "kod": self.kod,
+            "summa": self.summa,
+            "row_number": self.row_number
+        }
+
+    def to_balance_info(self) -> Dict[str, Any]:
+        """Avtomatik kuzatish uchun balans lug'ati"""
+        return {
+            "telefon": self.telefon,
+            "ism": self.ism,
+            "list_nomi": self.list_nomi,
+            "kod": self.kod,
+            "balance": self.summa,
+            "currency": "$"
+        }
+
+
+@dataclass(slots=True)
+class ContainerRecord:
+    """Container sheet qatori - B: Ism, D: Kod, E: Summa"""
+    ism: str
+    kod: str
+    summa: Money
+    row_number: int
+
+    @property
+    def summa_formatted(self) -> str:
+        return format_amount(self.summa)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'ism': self.ism,
+            'kod': self.kod,
+            'summa': self.summa
+        }
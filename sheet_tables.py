@@ -0,0 +1,226 @@
+"""
+Users sheet snapshot'idan bir marta quriladigan indekslangan jadval
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from money import Money
+from sheet_records import ContainerRecord, UserRecord
+
+
+def clean_phone_digits(phone) -> str:
+    """Telefon raqamidan faqat raqamlarni qoldirish"""
+    return ''.join(filter(str.isdigit, str(phone)))
+
+
+def phone_matches(clean_phone: str, clean_sheet_phone: str) -> bool:
+    """Telefon raqamlarni turli formatlarda taqqoslash (998 prefiks va oxirgi 9 raqam)"""
+    if not clean_phone or not clean_sheet_phone:
+        return False
+
+    # To'liq taqqoslash
+    if clean_phone == clean_sheet_phone:
+        return True
+    # 998 bilan boshlanuvchi raqamlarni 9 raqamli raqam bilan taqqoslash
+    elif clean_phone.startswith('998') and len(clean_phone) >= 12:
+        local_part = clean_phone[3:]  # 998 dan keyingi qism
+        return local_part == clean_sheet_phone or clean_sheet_phone.endswith(local_part)
+    # 9 raqamli raqamni 998 bilan boshlanuvchi bilan taqqoslash
+    elif clean_sheet_phone.startswith('998') and len(clean_sheet_phone) >= 12:
+        sheet_local_part = clean_sheet_phone[3:]  # 998 dan keyingi qism
+        return clean_phone == sheet_local_part or clean_phone.endswith(sheet_local_part)
+    # Oxirgi 9 raqamni taqqoslash
+    elif len(clean_phone) >= 9 and len(clean_sheet_phone) >= 9:
+        return clean_phone[-9:] == clean_sheet_phone[-9:]
+
+    return False
+
+
+def canonical_code(code) -> str:
+    """Qidirilayotgan kodni normallashtirish (1111.0 -> 1111)"""
+    clean_code = str(code).strip()
+    if '.' in clean_code and clean_code.endswith('.0'):
+        clean_code = clean_code[:-2]
+    return clean_code
+
+
+def code_keys(kod: str) -> List[str]:
+    """Sheet'dagi kod qaysi qidiruv kalitlariga mos kelishini aniqlash"""
+    # Faqat raqamli kodlar (nuqta bilan bo'lishi mumkin) qidiruvda qatnashadi
+    if not kod.replace('.', '').isdigit():
+        return []
+
+    keys = [kod]
+    try:
+        numeric_kod = str(int(float(kod)))
+    except (ValueError, OverflowError):
+        return keys
+
+    if numeric_kod != kod:
+        keys.append(numeric_kod)
+    return keys
+
+
+class UsersTable:
+    """Users sheet yozuvlari - telefon va kod bo'yicha O(1) qidiruv indekslari bilan"""
+
+    def __init__(self):
+        # Summa ustuni (E) bor barcha qatorlar, sheet tartibida
+        self.users: List[UserRecord] = []
+        # Oxirgi 9 raqam -> shu raqam bilan tugaydigan yozuvlar (sheet tartibida)
+        self.by_last9: Dict[str, List[UserRecord]] = {}
+        # To'liq tozalangan raqam -> birinchi yozuv
+        self.by_phone: Dict[str, UserRecord] = {}
+        # Kanonik kod -> birinchi yozuv
+        self.by_code: Dict[str, UserRecord] = {}
+        # Kanonik kod -> shu kodli barcha yozuvlar (bir kod bir necha listda bo'lsa aniqlash uchun)
+        self.code_records: Dict[str, List[UserRecord]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: List[List[str]], clean_amount: Callable[[str], Money]) -> "UsersTable":
+        """Snapshot qatorlaridan jadval va indekslarni qurish"""
+        table = cls()
+        if not rows or len(rows) <= 1:
+            return table
+
+        # Header qatorini o'tkazib yuborish
+        for i, row in enumerate(rows[1:], start=2):
+            if not row or len(row) < 4:
+                continue
+
+            # A ustuni: Telefon, B: Ism, C: List nomi, D: Kod, E: Summa
+            telefon = str(row[0]).strip()
+            kod = str(row[3]).strip()
+
+            # E ustuni: Summa (qo'shtirnoqli "1 234,50" bitta katak bo'lib keladi)
+            raw_summa = row[4].strip() if len(row) > 4 else "0"
+
+            user = UserRecord(
+                telefon=telefon,
+                ism=row[1].strip(),
+                list_nomi=row[2].strip(),
+                kod=kod,
+                summa=clean_amount(raw_summa),
+                row_number=i,
+                clean_phone=clean_phone_digits(telefon)
+            )
+
+            for key in code_keys(kod):
+                table.by_code.setdefault(key, user)
+                table.code_records.setdefault(key, []).append(user)
+
+            # Balans va telefon qidiruvi faqat summa ustuni bor qatorlar uchun
+            if len(row) < 5:
+                continue
+
+            table.users.append(user)
+
+            if not user.clean_phone:
+                continue
+
+            table.by_phone.setdefault(user.clean_phone, user)
+            if len(user.clean_phone) >= 9:
+                table.by_last9.setdefault(user.clean_phone[-9:], []).append(user)
+
+        return table
+
+    def find_by_phone(self, phone_number: str) -> Optional[UserRecord]:
+        """Telefon raqam bo'yicha birinchi mos yozuvni topish"""
+        clean_phone = clean_phone_digits(phone_number)
+        if not clean_phone:
+            return None
+
+        # 9 tadan qisqa raqam faqat to'liq mos kelishi mumkin
+        if len(clean_phone) < 9:
+            return self.by_phone.get(clean_phone)
+
+        # Har qanday mos yozuv oxirgi 9 raqami bo'yicha bir xil guruhda bo'ladi
+        for user in self.by_last9.get(clean_phone[-9:], ()):
+            if phone_matches(clean_phone, user.clean_phone):
+                return user
+        return None
+
+    def find_by_code(self, code) -> Optional[UserRecord]:
+        """Kod bo'yicha birinchi mos yozuvni topish"""
+        return self.by_code.get(canonical_code(code))
+
+    def list_names_of_code(self, code) -> List[str]:
+        """Kod uchrashadigan turli list nomlari (sheet tartibida)"""
+        names: List[str] = []
+        for user in self.code_records.get(canonical_code(code), ()):
+            if user.list_nomi not in names:
+                names.append(user.list_nomi)
+        return names
+
+    def resolve_codes(self, codes: Iterable) -> Dict[str, Any]:
+        """Bir nechta kodni bitta jadvaldan aniqlash.
+
+        Natija: found (kod -> yozuv), not_found, duplicates (kod -> necha marta kelgani),
+        multi_list (kod -> bir nechta list nomi).
+        """
+        found: Dict[str, UserRecord] = {}
+        not_found: List[str] = []
+        counts: Dict[str, int] = {}
+        multi_list: Dict[str, List[str]] = {}
+
+        for code in codes:
+            counts[code] = counts.get(code, 0) + 1
+            if counts[code] > 1:
+                continue
+
+            user = self.find_by_code(code)
+            if user is None:
+                not_found.append(code)
+                continue
+
+            found[code] = user
+            names = self.list_names_of_code(code)
+            if len(names) > 1:
+                multi_list[code] = names
+
+        return {
+            "found": found,
+            "not_found": not_found,
+            "duplicates": {code: count for code, count in counts.items() if count > 1},
+            "multi_list": multi_list,
+        }
+
+
+class ContainerTable:
+    """Container sheet yozuvlari (kodi bor va 5$ dan yuqori) - kod indeksi bilan"""
+
+    MIN_AMOUNT = Money(500)  # 5$
+
+    def __init__(self):
+        self.items: List[ContainerRecord] = []
+        self.by_kod: Dict[str, ContainerRecord] = {}
+
+    @classmethod
+    def from_rows(cls, rows: List[List[str]], clean_amount: Callable[[str], Money]) -> "ContainerTable":
+        """Snapshot qatorlaridan Container jadvalini qurish"""
+        table = cls()
+
+        # Header qatorini o'tkazib yuborish
+        for i, row in enumerate(rows[1:], start=2):
+            # B ustun (index 1) - ism, D ustun (index 3) - kod, E ustun (index 4) - summa
+            if len(row) <= 4:
+                continue
+
+            kod = row[3].strip()
+            if not kod:
+                continue
+
+            raw_summa = row[4].strip() or "0"
+            summa = clean_amount(raw_summa)
+
+            # Faqat 5$ dan yuqori summalar
+            if summa > cls.MIN_AMOUNT:
+                item = ContainerRecord(
+                    ism=row[1].strip() or "N/A",
+                    kod=kod,
+                    summa=summa,
+                    row_number=i
+                )
+                table.items.append(item)
+                table.by_kod.setdefault(kod, item)
+
+        return table
@@ -0,0 +1,56 @@
+"""
+Sheet eksportlari uchun umumiy HTTP transport (keep-alive pool, timeout, gzip, shartli GET)
+"""
+import logging
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import get_http_timeouts, get_sheets_io_workers
+
+logger = logging.getLogger(__name__)
+
+
+class SheetTransport:
+    """Bitta pooled requests.Session - har so'rovda yangi TLS ulanish ochilmaydi"""
+
+    def __init__(self, timeout: Tuple[float, float] = (5.0, 20.0), pool_size: int = 8):
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.requests_count = 0
+        self.not_modified_count = 0
+
+    def _session(self) -> requests.Session:
+        # requests.Session thread-safe emas - har thread o'z session'iga ega, ulanish pool'i esa umumiy
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            stream: bool = True) -> requests.Response:
+        """GET so'rov - validator berilsa If-None-Match/If-Modified-Since yuboriladi (javob 304 bo'lishi mumkin)"""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        response = self._session().get(url, headers=headers, stream=stream, timeout=self.timeout)
+        self.requests_count += 1
+        if response.status_code == 304:
+            self.not_modified_count += 1
+            logger.debug(f"Sheet o'zgarmagan (304): {url}")
+        return response
+
+
+# Global transport - barcha CSV eksportlar uchun bitta ulanish pool'i
+sheet_transport = SheetTransport(timeout=get_http_timeouts(), pool_size=get_sheets_io_workers())
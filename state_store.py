@@ -0,0 +1,165 @@
+"""
+Foydalanuvchi holatini (rollar, telefonlar, sessiyalar) diskda saqlash - write-behind bufer bilan
+"""
+import json
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from money import Money
+
+logger = logging.getLogger(__name__)
+
+# O'chirilgan kalit belgisi (buferda)
+_DELETED = object()
+
+
+def _json_default(value):
+    # Sessiya ma'lumotidagi summalar (Money) "1234.50" ko'rinishida saqlanadi
+    if isinstance(value, Money):
+        return str(value)
+    raise TypeError(f"JSON'ga yozib bo'lmaydi: {type(value).__name__}")
+
+
+class MemoryStateBackend:
+    """Hech narsani saqlamaydigan backend (test yoki vaqtinchalik ishga tushirish uchun)"""
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+    def write_batch(self, items: Iterable[Tuple[str, str, Any]]):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteStateBackend:
+    """SQLite (WAL rejimi) backend - namespace/kalit/JSON qiymat"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+
+    def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """Barcha saqlangan holatni bitta so'rov bilan o'qish"""
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            rows = self._conn.execute("SELECT namespace, key, value FROM state").fetchall()
+        for namespace, key, value in rows:
+            try:
+                result.setdefault(namespace, {})[key] = json.loads(value)
+            except ValueError:
+                logger.warning(f"Buzilgan holat yozuvi o'tkazib yuborildi: {namespace}/{key}")
+        return result
+
+    def write_batch(self, items: Iterable[Tuple[str, str, Any]]):
+        """Bufer yozuvlarini bitta tranzaksiyada yozish (qiymat _DELETED bo'lsa o'chirish)"""
+        upserts = []
+        deletes = []
+        for namespace, key, value in items:
+            if value is _DELETED:
+                deletes.append((namespace, key))
+            else:
+                upserts.append((namespace, key, json.dumps(value, ensure_ascii=False, default=_json_default)))
+
+        with self._lock:
+            with self._conn:
+                if upserts:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)", upserts
+                    )
+                if deletes:
+                    self._conn.executemany("DELETE FROM state WHERE namespace = ? AND key = ?", deletes)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class StateStore:
+    """Write-behind holat ombori: o'zgarishlar buferga yoziladi va fon thread'ida diskka tushiriladi.
+
+    Tezkor o'qish uchun kesh - config.py dagi dict'larning o'zi; ombor faqat ularni saqlaydi va tiklaydi.
+    """
+
+    def __init__(self, backend, flush_interval: float = 1.0):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name="state-store", daemon=True)
+            self._thread.start()
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Saqlangan holatni o'qish (ishga tushishda bir marta)"""
+        return self.backend.load_all()
+
+    def put(self, namespace: str, key, value):
+        """Qiymatni saqlash uchun buferga qo'yish"""
+        with self._lock:
+            self._pending[(namespace, str(key))] = value
+        self._ensure_thread()
+
+    def delete(self, namespace: str, key):
+        """Kalitni o'chirish uchun buferga qo'yish"""
+        with self._lock:
+            self._pending[(namespace, str(key))] = _DELETED
+        self._ensure_thread()
+
+    def flush(self):
+        """Buferdagi barcha o'zgarishlarni darhol diskka yozish"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, {}
+            try:
+                self.backend.write_batch((ns, key, value) for (ns, key), value in batch.items())
+            except Exception as e:
+                logger.error(f"Holatni saqlashda xatolik: {e}")
+                # Yozilmagan o'zgarishlarni qaytarish (yangiroqlari ustun)
+                with self._lock:
+                    for item_key, value in batch.items():
+                        self._pending.setdefault(item_key, value)
+
+    def close(self):
+        """Buferni yozib, backend'ni yopish"""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
+        self.backend.close()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def create_state_store(kind: str, path: str, flush_interval: float = 1.0) -> StateStore:
+    """Backend turiga qarab holat omborini yaratish (sqlite yoki memory)"""
+    if kind == "memory":
+        backend = MemoryStateBackend()
+    else:
+        backend = SQLiteStateBackend(path)
+    return StateStore(backend, flush_interval=flush_interval)
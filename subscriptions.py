@@ -0,0 +1,201 @@
+"""
+Manager va super user'lar uchun balans o'zgarishlariga obuna - qoidalar indeksi va o'zgarishlar oqimi bo'yicha tekshirish
+"""
+import bisect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import USER_SUBSCRIPTIONS, get_user_subscriptions, set_user_subscriptions
+from money import Money, parse_money
+from sheet_records import format_amount
+
+logger = logging.getLogger(__name__)
+
+# Qoida turlari
+RULE_THRESHOLD = "qarz"  # balans chegaradan o'tdi (ikkala yo'nalishda)
+RULE_CODE = "kod"  # kod balansi o'zgardi
+
+# Kuzatiladigan sheet'lar ("all" - ikkalasi ham)
+SHEETS = ("air", "container")
+SHEET_LABELS = {"air": "🛩️ Air", "container": "📦 Container", "all": "🛩️📦 Air va Container"}
+
+# Bitta foydalanuvchi uchun maksimal qoidalar soni
+MAX_RULES_PER_USER = 20
+
+USAGE = (
+    "ℹ️ Foydalanish:\n"
+    "/subscribe qarz -500 [air|container] - balans -500 $ chegarasidan o'tganda\n"
+    "/subscribe kod 12345 [air|container] - 12345 kodli balans o'zgarganda\n"
+    "/subscriptions - obunalar ro'yxati\n"
+    "/unsubscribe <raqam> yoki /unsubscribe all - obunani bekor qilish"
+)
+
+
+def _rule_sheets(rule: Dict[str, Any]) -> Tuple[str, ...]:
+    return SHEETS if rule.get("sheet", "all") == "all" else (rule["sheet"],)
+
+
+def threshold_of(rule: Dict[str, Any]) -> Money:
+    """Qoida chegarasi - yangi qoidalarda "-500.00" matni, eski saqlanganlarida float"""
+    return Money.of(rule["threshold"])
+
+
+def _rule_key(rule: Dict[str, Any]) -> Tuple:
+    """Takroriy obunani aniqlash uchun kalit (-500.0 va "-500.00" chegaralari bir xil)"""
+    value = threshold_of(rule).cents if rule["type"] == RULE_THRESHOLD else rule["kod"]
+    return rule["type"], rule.get("sheet", "all"), value
+
+
+def parse_rule(args: List[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Buyruq argumentlaridan qoida yaratish - (qoida, xato matni) qaytaradi"""
+    if len(args) < 2:
+        return None, USAGE
+
+    kind = args[0].lower()
+    sheet = args[2].lower() if len(args) > 2 else "all"
+    if sheet not in SHEET_LABELS:
+        return None, "❌ Sheet nomi air yoki container bo'lishi kerak."
+
+    if kind == RULE_THRESHOLD:
+        text = args[1].replace('$', '')
+        # Buyruqda nuqta ham kasr ajratgich ("-500.5"), sheet katakchalaridagidek minglar ajratgichi emas
+        if not any(ch.isdigit() for ch in text) or text.count('.') + text.count(',') > 1:
+            return None, "❌ Chegara son bo'lishi kerak, masalan: /subscribe qarz -500"
+        threshold = parse_money(text.replace('.', ','))
+        # JSON'da aniq saqlanishi uchun matn ko'rinishida
+        return {"type": RULE_THRESHOLD, "sheet": sheet, "threshold": str(threshold)}, None
+
+    if kind == RULE_CODE:
+        kod = args[1].strip()
+        if not kod.isdigit():
+            return None, "❌ Kod faqat raqamlardan iborat bo'lishi kerak."
+        return {"type": RULE_CODE, "sheet": sheet, "kod": kod}, None
+
+    return None, USAGE
+
+
+def describe_rule(rule: Dict[str, Any]) -> str:
+    """Qoidani o'qiladigan matnga aylantirish"""
+    sheet = SHEET_LABELS.get(rule.get("sheet", "all"), rule.get("sheet"))
+    if rule["type"] == RULE_THRESHOLD:
+        return f"{sheet}: balans {format_amount(threshold_of(rule))} chegarasidan o'tganda"
+    return f"{sheet}: {rule['kod']} kodi o'zgarganda"
+
+
+class SubscriptionEngine:
+    """Obuna qoidalari indeksi: kodlar - lug'atda, chegaralar - har sheet uchun saralangan ro'yxatda.
+
+    Indeks obuna qo'shilganda/o'chirilganda qisman yangilanadi, har bir o'zgarish esa faqat indeks bo'yicha
+    tekshiriladi - sheet qatorlari qayta ko'rib chiqilmaydi.
+    """
+
+    def __init__(self):
+        # (sheet, kod) -> obuna bo'lgan user_id'lar
+        self._code_index: Dict[Tuple[str, str], set] = {}
+        # sheet -> saralangan [(chegara sentlarda, user_id)]
+        self._thresholds: Dict[str, List[Tuple[int, int]]] = {sheet: [] for sheet in SHEETS}
+
+    def rebuild(self):
+        """Saqlangan obunalardan indeksni qayta qurish (ishga tushishda)"""
+        self._code_index = {}
+        self._thresholds = {sheet: [] for sheet in SHEETS}
+        for user_id, rules in USER_SUBSCRIPTIONS.items():
+            for rule in rules:
+                self._index(user_id, rule)
+        return sum(len(rules) for rules in USER_SUBSCRIPTIONS.values())
+
+    def _index(self, user_id: int, rule: Dict[str, Any]):
+        for sheet in _rule_sheets(rule):
+            if rule["type"] == RULE_THRESHOLD:
+                bisect.insort(self._thresholds[sheet], (threshold_of(rule).cents, user_id))
+            else:
+                self._code_index.setdefault((sheet, rule["kod"]), set()).add(user_id)
+
+    def _unindex(self, user_id: int, rule: Dict[str, Any]):
+        for sheet in _rule_sheets(rule):
+            if rule["type"] == RULE_THRESHOLD:
+                entries = self._thresholds[sheet]
+                entry = (threshold_of(rule).cents, user_id)
+                position = bisect.bisect_left(entries, entry)
+                if position < len(entries) and entries[position] == entry:
+                    del entries[position]
+            else:
+                subscribers = self._code_index.get((sheet, rule["kod"]))
+                if subscribers is not None:
+                    subscribers.discard(user_id)
+                    if not subscribers:
+                        del self._code_index[(sheet, rule["kod"])]
+
+    def rules_of(self, user_id: int) -> List[Dict[str, Any]]:
+        return get_user_subscriptions(user_id)
+
+    def subscribe(self, user_id: int, rule: Dict[str, Any]) -> Optional[str]:
+        """Qoida qo'shish - xatolik bo'lsa matnini qaytaradi"""
+        rules = self.rules_of(user_id)
+        if _rule_key(rule) in {_rule_key(existing) for existing in rules}:
+            return "ℹ️ Bu obuna allaqachon mavjud."
+        if len(rules) >= MAX_RULES_PER_USER:
+            return f"❌ Ko'pi bilan {MAX_RULES_PER_USER} ta obuna bo'lishi mumkin."
+
+        set_user_subscriptions(user_id, rules + [rule])
+        self._index(user_id, rule)
+        return None
+
+    def unsubscribe(self, user_id: int, number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Qoidani tartib raqami bo'yicha (1 dan) yoki barchasini o'chirish - o'chirilganlarni qaytaradi"""
+        rules = self.rules_of(user_id)
+        if number is None:
+            removed, kept = rules, []
+        elif 1 <= number <= len(rules):
+            removed, kept = [rules[number - 1]], rules[:number - 1] + rules[number:]
+        else:
+            return []
+
+        for rule in removed:
+            self._unindex(user_id, rule)
+        set_user_subscriptions(user_id, kept)
+        return removed
+
+    def match(self, sheet: str, kod: str, old_value, new_value) -> Dict[int, List[Dict[str, Any]]]:
+        """Bitta o'zgarishga mos keladigan obunachilar: user_id -> ishlagan qoidalar"""
+        matches: Dict[int, List[Dict[str, Any]]] = {}
+
+        for user_id in self._code_index.get((sheet, kod), ()):
+            matches.setdefault(user_id, []).append({"type": RULE_CODE, "kod": kod})
+
+        # Diskdan tiklangan yoki birinchi ko'rilgan qiymat uchun chegara tekshirilmaydi
+        if old_value is None or new_value is None:
+            return matches
+
+        # old > chegara >= new (pastga) yoki new > chegara >= old (yuqoriga) - [min, max) oralig'i
+        low, high = min(old_value, new_value), max(old_value, new_value)
+        entries = self._thresholds.get(sheet, [])
+        start = bisect.bisect_left(entries, (low.cents,))
+        end = bisect.bisect_left(entries, (high.cents,))
+        for threshold, user_id in entries[start:end]:
+            matches.setdefault(user_id, []).append(
+                {"type": RULE_THRESHOLD, "threshold": Money(threshold), "down": new_value < old_value}
+            )
+        return matches
+
+    def has_rules(self) -> bool:
+        return bool(self._code_index) or any(self._thresholds.values())
+
+
+def format_subscription_alert(sheet: str, ism: str, kod: str, old_value, new_value,
+                              fired: List[Dict[str, Any]]) -> str:
+    """Obunachiga yuboriladigan xabar matni"""
+    lines = [f"🔔 {SHEET_LABELS.get(sheet, sheet)} obuna xabari", "", f"👤 {ism} ({kod})"]
+    for rule in fired:
+        if rule["type"] == RULE_THRESHOLD:
+            arrow = "📉 pastga" if rule["down"] else "📈 yuqoriga"
+            lines.append(f"⚠️ {format_amount(rule['threshold'])} chegarasidan {arrow} o'tdi")
+        else:
+            lines.append("🔄 Kuzatilayotgan kod balansi o'zgardi")
+    old_text = format_amount(old_value) if old_value is not None else "—"
+    lines.append(f"💰 {old_text} → {format_amount(new_value)}")
+    return "\n".join(lines)
+
+
+# Global obunalar indeksi
+subscription_engine = SubscriptionEngine()
@@ -0,0 +1,112 @@
+"""
+ChangeTracker: o'zgarmagan snapshot (versiya/tana xeshi), kalitlar bo'yicha farq va diskka saqlangan holat
+"""
+from typing import NamedTuple
+
+from change_tracker import ChangeTracker, load_tracker_states, save_tracker_states
+from money import Money
+
+
+class Row(NamedTuple):
+    kod: str
+    summa: Money
+
+
+def _tracker():
+    return ChangeTracker(key_fn=lambda row: row.kod, value_fn=lambda row: row.summa,
+                         encode_value=str, decode_value=Money.of)
+
+
+def _rows(**balances):
+    return [Row(kod, Money(cents)) for kod, cents in balances.items()]
+
+
+def test_first_snapshot_is_baseline():
+    tracker = _tracker()
+    assert tracker.update(_rows(a=100, b=-200), version=1, digest="d1") == []
+    assert tracker.dirty
+    assert set(tracker.state) == {"a", "b"}
+
+
+def test_unchanged_digest_yields_no_diff():
+    tracker = _tracker()
+    tracker.update(_rows(a=100, b=-200), version=1, digest="d1")
+    tracker.dirty = False
+
+    # Yangi versiya, lekin tana xeshi bir xil - qatorlar umuman ko'rib chiqilmaydi
+    assert tracker.update(_rows(a=999, b=999), version=2, digest="d1") == []
+    assert tracker.state["a"][0] == Money(100)
+    assert tracker.version == 2
+    assert not tracker.dirty
+
+    # Versiya bir xil (304) - xesh berilmasa ham
+    assert tracker.update(_rows(a=999), version=2) == []
+
+
+def test_changed_values_reported_per_key():
+    tracker = _tracker()
+    first = _rows(a=100, b=-200, c=0)
+    tracker.update(first, version=1, digest="d1")
+
+    second = _rows(a=100, b=-250, c=0, d=50)
+    changes = tracker.update(second, version=2, digest="d2")
+    assert [(change.key, change.old_value, change.new_value) for change in changes] == \
+           [("b", Money(-200), Money(-250))]
+    assert changes[0].old is first[1] and changes[0].new is second[1]
+    # Yangi kalit faqat boshlang'ich qiymat
+    assert tracker.state["d"][0] == Money(50)
+
+
+def test_duplicate_keys_last_wins():
+    tracker = _tracker()
+    tracker.update(_rows(a=100), version=1, digest="d1")
+    changes = tracker.update([Row("a", Money(300)), Row("a", Money(100))], version=2, digest="d2")
+    assert changes == []
+
+
+def test_saved_state_round_trips(tmp_path):
+    path = str(tmp_path / "monitor_state.json")
+    air, container = _tracker(), _tracker()
+    air.update(_rows(a=123456, b=-5), version=1, digest="air-1")
+    container.update(_rows(k=1), version=1, digest="cont-1")
+    save_tracker_states(path, {"air": air, "container": container})
+    assert not air.dirty and not container.dirty
+
+    restored_air, restored_container = _tracker(), _tracker()
+    assert load_tracker_states(path, {"air": restored_air, "container": restored_container})
+    assert restored_air.dump() == air.dump()
+    assert restored_container.dump() == container.dump()
+    assert restored_air.state["a"] == (Money(123456), None)
+    assert restored_air.version is None and not restored_air.dirty
+
+
+def test_restored_baseline_reports_changes_after_restart(tmp_path):
+    path = str(tmp_path / "monitor_state.json")
+    tracker = _tracker()
+    tracker.update(_rows(a=100, b=-200), version=1, digest="d1")
+    save_tracker_states(path, {"air": tracker})
+
+    restored = _tracker()
+    load_tracker_states(path, {"air": restored})
+    # Qayta ishga tushgandan keyin bir xil tana - o'zgarish yo'q
+    assert restored.update(_rows(a=100, b=-200), version=1, digest="d1") == []
+
+    restored = _tracker()
+    load_tracker_states(path, {"air": restored})
+    rows = _rows(a=100, b=-300)
+    changes = restored.update(rows, version=1, digest="d2")
+    # To'xtab turgan vaqtdagi o'zgarish ham topiladi; eski yozuv diskda saqlanmagan
+    assert [(change.key, change.old, change.old_value, change.new_value) for change in changes] == \
+           [("b", None, Money(-200), Money(-300))]
+    # Qolgan kalitlar yozuvlari to'ldirildi
+    assert restored.state["a"][1] is rows[0]
+
+
+def test_missing_or_corrupt_state_file(tmp_path):
+    tracker = _tracker()
+    assert not load_tracker_states(str(tmp_path / "yoq.json"), {"air": tracker})
+
+    corrupt = tmp_path / "buzilgan.json"
+    corrupt.write_text("{buzilgan", encoding="utf-8")
+    assert not load_tracker_states(str(corrupt), {"air": tracker})
+    assert tracker.state == {} and tracker.digest is None
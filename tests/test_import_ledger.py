@@ -0,0 +1,79 @@
+"""
+ImportLedger: manifest izi, yozuvlar rejasi (new / applied / conflicts) va bir vaqtda import qilishdan himoya
+"""
+import io
+
+import pytest
+
+from import_ledger import ImportLedger, hash_stream, manifest_fingerprint, number_occurrences
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = ImportLedger(str(tmp_path / "ledger.db"))
+    yield ledger
+    ledger.close()
+
+
+def _entries(*items):
+    return number_occurrences({'code': code, 'price': price, 'list_nomi': list_nomi} for code, price, list_nomi in items)
+
+
+def test_number_occurrences_counts_repeated_codes():
+    numbered = _entries(("1", 5.0, "A"), ("2", 6.0, "A"), ("1", 7.0, "A"))
+    assert [(e['code'], e['occurrence']) for e in numbered] == [("1", 1), ("2", 1), ("1", 2)]
+
+
+def test_fingerprint_depends_on_content_and_reys():
+    source = io.BytesIO(b"manifest")
+    content_hash = hash_stream(source)
+    assert source.tell() == 0
+    assert manifest_fingerprint(content_hash, "R1") == manifest_fingerprint(content_hash, "R1")
+    assert manifest_fingerprint(content_hash, "R1") != manifest_fingerprint(content_hash, "R2")
+
+
+def test_register_manifest_reports_second_upload(ledger):
+    assert ledger.register_manifest("fp", "R1", "hash") is False
+    assert ledger.register_manifest("fp", "R1", "hash") is True
+
+
+def test_plan_splits_new_applied_and_conflicts(ledger):
+    entries = _entries(("1", 5.0, "A"), ("2", 6.0, "B"), ("1", 7.0, "A"))
+    plan = ledger.plan("R1", entries)
+    assert plan["new"] == entries and not plan["applied"] and not plan["conflicts"]
+
+    # Faqat A list'i yozildi
+    ledger.record_applied("fp", "R1", [e for e in entries if e['list_nomi'] == "A"])
+
+    plan = ledger.plan("R1", entries)
+    assert [e['code'] for e in plan["new"]] == ["2"]
+    assert [(e['code'], e['occurrence']) for e in plan["applied"]] == [("1", 1), ("1", 2)]
+
+    # Shu kod boshqa narx bilan - ziddiyat, qayta yozilmaydi
+    changed = _entries(("1", 9.0, "A"))
+    plan = ledger.plan("R1", changed)
+    assert not plan["new"] and not plan["applied"]
+    assert plan["conflicts"][0]['old_price'] == 5.0 and plan["conflicts"][0]['price'] == 9.0
+
+    # Boshqa reys - hammasi yangi
+    assert ledger.plan("R2", entries)["new"] == entries
+
+
+def test_applied_entries_survive_reopen(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    entries = _entries(("1", 5.0, "A"))
+    first = ImportLedger(path)
+    first.record_applied("fp", "R1", entries)
+    first.close()
+
+    second = ImportLedger(path)
+    assert second.plan("R1", entries)["applied"] == entries
+    second.close()
+
+
+def test_begin_blocks_same_reys_until_end(ledger):
+    assert ledger.begin("R1") is True
+    assert ledger.begin("R1") is False
+    assert ledger.begin("R2") is True
+    ledger.end("R1")
+    assert ledger.begin("R1") is True
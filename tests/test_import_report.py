@@ -0,0 +1,113 @@
+"""
+Excel import: qayta yuklangan manifest hech narsa yozmaydi va manager'ga faqat ♻️ xabari boradi
+"""
+import asyncio
+import io
+
+import pandas as pd
+import pytest
+
+import bot_handlers
+from async_sheets import async_sheets
+from import_ledger import ImportLedger
+from money import parse_money
+from sheet_tables import UsersTable
+
+USERS_ROWS = [
+    ["Telefon", "Ism", "List", "Kod", "Summa"],
+    ["901111111", "Ali", "A", "101", "0"],
+    ["901111112", "Vali", "B", "102", "0"],
+]
+
+
+class FakeSheets:
+    """Users jadvali xotirada, list yozuvlari ro'yxatga yig'iladi"""
+
+    def __init__(self):
+        self.table = UsersTable.from_rows(USERS_ROWS, parse_money)
+        self.writes = []
+
+    def resolve_user_codes(self, codes):
+        resolution = self.table.resolve_codes(codes)
+        resolution["found"] = {code: user.to_user_info() for code, user in resolution["found"].items()}
+        return resolution
+
+    def write_rows_to_list_sheets(self, grouped_rows):
+        self.writes.append(grouped_rows)
+        return {name: {'success': True, 'rows': len(rows), 'error': None} for name, rows in grouped_rows.items()}
+
+
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        self.messages.append(text)
+
+
+def _manifest(rows) -> bytes:
+    # xlsx ichida yaratilgan vaqt (soniyagacha) bor - qayta import uchun bir xil baytlar ishlatiladi
+    buffer = io.BytesIO()
+    pd.DataFrame(rows, columns=["MARK", "TOTAL PRICE"]).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def sheets(monkeypatch, tmp_path):
+    fake = FakeSheets()
+    ledger = ImportLedger(str(tmp_path / "ledger.db"))
+    monkeypatch.setattr(async_sheets, "manager", fake)
+    monkeypatch.setattr(bot_handlers, "import_ledger", ledger)
+    yield fake
+    ledger.close()
+
+
+def _import(content):
+    return asyncio.run(bot_handlers.process_excel_file(io.BytesIO(content), "R1.xlsx"))
+
+
+def _report(result):
+    bot = FakeBot()
+    asyncio.run(bot_handlers.send_import_report(bot, 1, result))
+    return bot.messages
+
+
+def test_first_import_writes_and_reports_success(sheets):
+    result = _import(_manifest([[101, 10.5], [102, 20], [999, 1]]))
+
+    assert result["success"] and not result["already_imported"]
+    assert result["updated_records"] == 2
+    assert sorted(name for write in sheets.writes for name in write) == ["A", "B"]
+
+    messages = _report(result)
+    assert messages[0].startswith("✅ Excel fayl muvaffaqiyatli qayta ishlandi!")
+    assert not any(text.startswith("♻️") for text in messages)
+
+
+def test_reimport_writes_nothing_and_sends_only_recycle_message(sheets):
+    content = _manifest([[101, 10.5], [102, 20]])
+    _import(content)
+    sheets.writes.clear()
+
+    result = _import(content)
+    assert result["success"] and result["already_imported"]
+    assert result["updated_records"] == 0
+    assert result["skipped_records"] == 2
+    assert sheets.writes == []
+
+    messages = _report(result)
+    assert messages[0].startswith("♻️ Bu manifest allaqachon import qilingan")
+    assert messages[-1] == "🔄 Keyingi amal uchun tanlang:"
+    assert len(messages) == 2
+    assert not any("muvaffaqiyatli" in text or "Yangilangan yozuvlar" in text for text in messages)
+
+
+def test_changed_manifest_writes_only_new_rows(sheets):
+    _import(_manifest([[101, 10.5]]))
+    sheets.writes.clear()
+
+    # Boshqa tarkib (yangi kod qo'shildi) - faqat yangi qator yoziladi
+    result = _import(_manifest([[101, 10.5], [102, 20]]))
+    assert not result["already_imported"]
+    assert result["updated_records"] == 1 and result["skipped_records"] == 1
+    assert [list(write) for write in sheets.writes] == [["B"]]
@@ -0,0 +1,59 @@
+"""
+render_pages/chunk_rows: har bir sahifa Telegram limitidan (4096 UTF-16 birlik) oshmasligi
+"""
+import random
+
+import pytest
+
+from message_render import (MAX_MESSAGE_LENGTH, TIMESTAMP_RESERVE, Column, TableLayout, chunk_rows, render_pages,
+                            stamp_page, text_length)
+
+EMOJI = "🛩️📦💰🔥😀"
+
+
+def _random_row(rng):
+    size = rng.choice([5, 40, 200, 5000, 9000])
+    return "".join(rng.choice("abc 123" + EMOJI) for _ in range(size))
+
+
+def _assert_pages_fit(pages, limit=MAX_MESSAGE_LENGTH):
+    assert pages
+    for page in pages:
+        assert text_length(page) <= limit, text_length(page)
+
+
+def test_chunk_rows_splits_oversized_row():
+    row = "😀" * 3000  # 6000 birlik
+    chunks = chunk_rows([row, "qisqa"], budget=1000)
+    assert all(sum(text_length(piece) + 1 for piece in chunk) <= 1000 for chunk in chunks)
+    # Qator yo'qolmaydi, emoji o'rtasidan bo'linmaydi
+    assert "".join(piece for chunk in chunks for piece in chunk) == row + "qisqa"
+
+
+def test_chunk_rows_respects_max_rows():
+    chunks = chunk_rows([str(i) for i in range(25)], budget=1000, max_rows=10)
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunk_rows([], budget=1000) == [[]]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_render_pages_within_limit(seed):
+    rng = random.Random(seed)
+    rows = [_random_row(rng) for _ in range(30)]
+    layout = TableLayout(Column("Ism", 12, ellipsis=True), Column("Summa", 12, align=">", clip=False))
+    pages = render_pages("🛩️📋 Hisobot", rows, ["💰 JAMI: 100 $"], head=layout.head(), code_block=True)
+    _assert_pages_fit(pages)
+    assert len(pages) > 1
+
+
+def test_cached_pages_fit_after_timestamp():
+    # Keshlanadigan sahifalar yuborishda vaqt qatori bilan ham 4096 dan oshmaydi
+    rows = ["📦" * 3000, "oddiy qator"] + ["😀 qator " * 20] * 200
+    pages = render_pages("📦 Container", rows, ["💰 JAMI"], code_block=True, max_rows=30,
+                         limit=MAX_MESSAGE_LENGTH - TIMESTAMP_RESERVE)
+    _assert_pages_fit([stamp_page(page) for page in pages])
+
+
+def test_single_page_has_no_page_mark():
+    pages = render_pages("Sarlavha", ["bir", "ikki"], ["jami"])
+    assert pages == ["Sarlavha\n\nbir\nikki\n\njami"]
@@ -0,0 +1,148 @@
+"""
+parse_money'ni eski float clean_amount bilan taqqoslash (xususiyatga asoslangan, tasodifiy matnlar)
+"""
+import random
+import re
+
+import pytest
+
+from money import Money, ZERO, parse_money
+
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    given = None
+
+
+def legacy_clean_amount(amount_str):
+    """Eski GoogleSheetsManager.clean_amount (float qaytaradi)"""
+    if not amount_str:
+        return 0.0
+
+    amount_str = str(amount_str).strip()
+    is_negative = '-' in amount_str
+
+    cleaned = amount_str.replace('-', '')
+    cleaned = cleaned.replace('Â', '').replace('\u00A0', ' ').replace('\xa0', ' ')
+    cleaned = re.sub(r'[^\d\.,\s]', '', cleaned)
+    cleaned = cleaned.strip()
+
+    if not cleaned:
+        return 0.0
+
+    if ',' in cleaned:
+        try:
+            amount = float(cleaned.replace(' ', '').replace(',', '.'))
+            if is_negative:
+                amount = -amount
+            return amount
+        except (ValueError, TypeError):
+            pass
+
+    parts = re.findall(r'\d+', cleaned)
+    if not parts:
+        return 0.0
+
+    try:
+        amount = int(''.join(parts))
+        if is_negative:
+            amount = -amount
+        return float(amount)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+# Summa katakchalarida uchraydigan belgilar (NBSP, 'Â' artefakti, valyuta belgilari, harflar)
+ALPHABET = "0123456789" * 4 + ".,,  -\xa0Â$€so'mabc\t"
+
+
+def _random_amount(rng):
+    kind = rng.randrange(6)
+    whole = str(rng.randint(0, 10 ** rng.randint(1, 9)))
+    fraction = str(rng.randint(0, 999)).zfill(rng.randint(1, 3))
+    if kind == 0:
+        # "1 234,50" - bo'shliq/NBSP bilan ajratilgan minglar va vergulli kasr
+        grouped = f"{int(whole):,}".replace(',', rng.choice([' ', '\xa0', 'Â\xa0']))
+        return f"{rng.choice(['', '-', '- '])}{grouped},{fraction}{rng.choice(['', ' $', '$'])}"
+    if kind == 1:
+        return f"{rng.choice(['', '-'])}{whole}.{fraction}"
+    if kind == 2:
+        return f"{rng.choice(['', '-'])}{whole},{fraction}"
+    if kind == 3:
+        return f"{rng.choice(['', '-'])}{whole}"
+    # Tasodifiy axlat matnlar
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 14)))
+
+
+def assert_same_as_legacy(text):
+    money = parse_money(text)
+    legacy = legacy_clean_amount(text)
+    assert isinstance(money, Money)
+    # Money matndan aniq sentgacha yaxlitlaydi (yarim sent yuqoriga); float esa shu yaxlitlashdan
+    # yarim sentdan ko'p farq qilmasligi kerak (katta sonlarda float'ning o'z xatosi qo'shiladi)
+    tolerance = 0.005 + abs(legacy) * 1e-15
+    assert abs(money.cents / 100 - legacy) <= tolerance, (text, money, legacy)
+    if legacy == 0:
+        assert money == ZERO, (text, money)
+    else:
+        assert (money.cents < 0) == (legacy < 0) or money == ZERO, (text, money, legacy)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_parse_money_matches_legacy_random(seed):
+    rng = random.Random(seed)
+    for _ in range(5000):
+        assert_same_as_legacy(_random_amount(rng))
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("", 0),
+    ("   ", 0),
+    ("abc", 0),
+    ("-", 0),
+    ("1 234,50", 123450),
+    ("-1 234,50", -123450),
+    ("1\xa0234,5", 123450),
+    ("Â\xa01\xa0234,50 $", 123450),
+    ("1.234", 123400),
+    ("1,234,5", 1234500),
+    ("0,285", 29),
+    ("-0,005", -1),
+    ("12,3456", 1235),
+    ("1.2.3", 12300),
+    ("$ 500", 50000),
+    ("12a34", 123400),
+    (",", 0),
+    (".", 0),
+])
+def test_parse_money_known_values(text, cents):
+    assert parse_money(text).cents == cents
+    assert_same_as_legacy(text)
+
+
+if given is not None:
+    @settings(max_examples=2000, deadline=None)
+    @given(st.text(alphabet=ALPHABET, max_size=20))
+    def test_parse_money_matches_legacy_hypothesis(text):
+        assert_same_as_legacy(text)
+
+
+def test_money_equality_and_hash_agree():
+    assert Money(150) == Money(150)
+    assert hash(Money(150)) == hash(Money(150))
+    assert len({Money(150), Money(150), Money(-150)}) == 2
+    assert Money.of("1,50") == Money.of(1.5)
+
+    # Son bilan tenglik ham, tartib ham yo'q - noto'g'ri chaqiruvlar darhol TypeError beradi
+    assert Money(100) != 1
+    assert Money(100) != 1.0
+    assert Money(0) != 0
+    assert Money(-50) < ZERO < Money(50)
+    assert sorted([Money(5), Money(-5), ZERO]) == [Money(-5), ZERO, Money(5)]
+    for number in (0, 1, 1.5):
+        with pytest.raises(TypeError):
+            Money(100) < number
+        with pytest.raises(TypeError):
+            Money(100) >= number
+        with pytest.raises(TypeError):
+            number > Money(100)
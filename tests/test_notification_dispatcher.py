@@ -0,0 +1,117 @@
+"""
+NotificationDispatcher: bir chat xabarlarini birlashtirish va navbat to'la turganda to'xtatish
+"""
+import asyncio
+
+import pytest
+
+from notification_dispatcher import NotificationDispatcher
+
+
+class FakeBot:
+    def __init__(self, stuck: bool = False):
+        self.sent = []
+        self.stuck = stuck
+        self.cancelled = 0
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        if self.stuck:
+            # Telegram javob bermayapti
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        self.sent.append((chat_id, text, reply_markup))
+
+
+def _dispatcher(bot, **kwargs):
+    kwargs.setdefault("global_rate", 1000.0)
+    kwargs.setdefault("per_chat_rate", 1000.0)
+    return NotificationDispatcher(bot, **kwargs)
+
+
+def test_messages_for_one_chat_are_coalesced():
+    async def scenario():
+        bot = FakeBot()
+        dispatcher = _dispatcher(bot, workers=2)
+        # Worker'lar hali ishlamagan - hammasi bitta chat yozuviga qo'shiladi
+        dispatcher.enqueue(1, "birinchi")
+        dispatcher.enqueue(1, "ikkinchi")
+        dispatcher.enqueue(2, "boshqa chat")
+        dispatcher.enqueue(1, "uchinchi", follow_up=("menyu", "markup"))
+        assert dispatcher.queue_depth() == 2
+        await dispatcher.stop()
+        return bot, dispatcher
+
+    bot, dispatcher = asyncio.run(scenario())
+    chat_1 = [(text, markup) for chat_id, text, markup in bot.sent if chat_id == 1]
+    assert chat_1 == [("birinchi\n\nikkinchi\n\nuchinchi", None), ("menyu", "markup")]
+    assert [text for chat_id, text, _ in bot.sent if chat_id == 2] == ["boshqa chat"]
+    assert dispatcher.coalesced_count == 2
+    assert dispatcher.sent_count == 2
+    assert dispatcher.queue_depth() == 0
+
+
+def test_coalesced_messages_split_at_limit():
+    async def scenario():
+        bot = FakeBot()
+        dispatcher = _dispatcher(bot)
+        for _ in range(3):
+            dispatcher.enqueue(1, "x" * 2000)
+        await dispatcher.stop()
+        return bot
+
+    bot = asyncio.run(scenario())
+    assert [len(text) for _, text, _ in bot.sent] == [2000 + 2 + 2000, 2000]
+
+
+def test_stop_with_queued_items_and_stuck_bot():
+    async def scenario():
+        bot = FakeBot(stuck=True)
+        dispatcher = _dispatcher(bot, workers=2)
+        for chat_id in range(5):
+            dispatcher.enqueue(chat_id, f"xabar {chat_id}")
+        await asyncio.sleep(0)
+        tasks = list(dispatcher._tasks)
+        # Navbat bo'shamaydi - stop o'z vaqt chegarasidan keyin worker'larni bekor qiladi
+        await asyncio.wait_for(dispatcher.stop(timeout=0.05), 1)
+        return bot, dispatcher, tasks
+
+    bot, dispatcher, tasks = asyncio.run(scenario())
+    assert tasks and all(task.done() for task in tasks)
+    assert dispatcher._tasks == []
+    assert bot.cancelled == 2
+    assert bot.sent == []
+    assert dispatcher.queue_depth() == 0
+
+
+def test_cancelled_stop_still_stops_workers():
+    async def scenario():
+        bot = FakeBot(stuck=True)
+        dispatcher = _dispatcher(bot)
+        dispatcher.enqueue(1, "xabar")
+        await asyncio.sleep(0)
+        tasks = list(dispatcher._tasks)
+        # main.py dagidek - tashqi wait_for drain tugashini kutmay stop'ni bekor qiladi
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(dispatcher.stop(), 0.05)
+        return dispatcher, tasks
+
+    dispatcher, tasks = asyncio.run(scenario())
+    assert all(task.done() for task in tasks)
+    assert dispatcher._tasks == []
+
+
+def test_restart_after_stop():
+    async def scenario():
+        bot = FakeBot()
+        dispatcher = _dispatcher(bot)
+        dispatcher.enqueue(1, "birinchi")
+        await dispatcher.stop()
+        dispatcher.enqueue(1, "ikkinchi")
+        await dispatcher.stop()
+        return bot
+
+    bot = asyncio.run(scenario())
+    assert [text for _, text, _ in bot.sent] == ["birinchi", "ikkinchi"]
@@ -0,0 +1,127 @@
+"""
+PollCadence/PollScheduler: 429 va server xatoliklarida orqaga chekinish, sekinlashish va poke
+"""
+import asyncio
+import random
+import time
+
+import pytest
+import requests
+
+import poll_scheduler
+from poll_scheduler import PollCadence, PollScheduler, is_retryable_error
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(poll_scheduler.time, "monotonic", clock)
+    return clock
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status}", response=response)
+
+
+def _delay(cadence, clock):
+    return cadence.next_due - clock.now
+
+
+def test_retryable_errors():
+    assert is_retryable_error(_http_error(429))
+    assert is_retryable_error(_http_error(503))
+    assert not is_retryable_error(_http_error(403))
+    assert is_retryable_error(requests.ConnectionError())
+    assert is_retryable_error(asyncio.TimeoutError())
+    assert not is_retryable_error(ValueError())
+
+
+def test_quota_error_doubles_interval_up_to_cap(clock):
+    cadence = PollCadence("air", fast=10, slow=60, max_backoff=300, jitter=0)
+    delays = []
+    for _ in range(7):
+        cadence.on_error(_http_error(429))
+        delays.append(_delay(cadence, clock))
+    assert delays == [20, 40, 80, 160, 300, 300, 300]
+
+    # Muvaffaqiyatli poll'dan keyin hisob qaytadan boshlanadi
+    cadence.on_success(changed=True)
+    assert cadence.failures == 0 and _delay(cadence, clock) == 10
+    cadence.on_error(_http_error(429))
+    assert _delay(cadence, clock) == 20
+
+
+def test_backoff_jitter_stays_in_bounds(clock):
+    random.seed(3)
+    delays = set()
+    for _ in range(200):
+        cadence = PollCadence("air", fast=10, slow=60, max_backoff=300, jitter=0.2)
+        cadence.on_error(_http_error(429))
+        delay = _delay(cadence, clock)
+        assert 16 <= delay <= 24
+        delays.add(round(delay, 6))
+    # Bir vaqtda xato olgan sheet'lar bir paytda qayta urinmaydi
+    assert len(delays) > 100
+
+
+def test_other_errors_back_off_linearly(clock):
+    cadence = PollCadence("air", fast=10, slow=60, max_backoff=35, jitter=0)
+    delays = []
+    for _ in range(5):
+        cadence.on_error(ValueError("buzilgan javob"))
+        delays.append(_delay(cadence, clock))
+    assert delays == [10, 20, 30, 35, 35]
+
+
+def test_quiet_polls_slow_down_and_change_speeds_up(clock):
+    cadence = PollCadence("container", fast=10, slow=60, decay=2, jitter=0)
+    intervals = []
+    for _ in range(5):
+        cadence.on_success(changed=False)
+        intervals.append(cadence.interval)
+    assert intervals == [20, 40, 60, 60, 60]
+    cadence.on_success(changed=True)
+    assert cadence.interval == 10 and _delay(cadence, clock) == 10
+
+
+def test_poke_does_not_cut_backoff_short(clock):
+    cadence = PollCadence("air", fast=10, slow=60, jitter=0)
+    cadence.on_success(changed=False)
+    cadence.poke()
+    assert cadence.remaining() == 0 and cadence.interval == 10
+
+    cadence.on_error(_http_error(429))
+    cadence.poke()
+    # Kvota xatoligidan keyin poke darhol so'rov yubormaydi
+    assert _delay(cadence, clock) == 20
+
+
+def test_scheduler_due_and_wait_woken_by_poke():
+    air = PollCadence("air", fast=30, slow=60, jitter=0)
+    container = PollCadence("container", fast=30, slow=60, jitter=0)
+    scheduler = PollScheduler([air, container])
+    assert scheduler.due() == ["air", "container"]
+    air.on_success(changed=False)
+    container.on_success(changed=False)
+    assert scheduler.due() == []
+
+    async def scenario():
+        started = time.monotonic()
+        waiter = asyncio.create_task(scheduler.wait())
+        await asyncio.sleep(0.01)
+        scheduler.poke("container")
+        await asyncio.wait_for(waiter, 1)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 1
+    assert scheduler.due() == ["container"]
@@ -0,0 +1,138 @@
+"""
+Hisobot sessiyalari: muddati o'tishi, boshqa foydalanuvchi tugmasi va bir snapshot versiyasi sahifalarini qayta ishlatish
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import bot_handlers
+import report_sessions as sessions_module
+from report_sessions import REPORT_AIR, REPORT_CONTAINER, ReportSessionManager, parse_page_callback
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeMessage:
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+
+
+class FakeQuery:
+    def __init__(self, user_id):
+        self.from_user = SimpleNamespace(id=user_id)
+        self.message = FakeMessage()
+        self.edits = []
+
+    async def edit_message_text(self, text, reply_markup=None, parse_mode=None):
+        self.edits.append((text, reply_markup))
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = ReportSessionManager(page_rows=30, max_sessions=3, ttl=60.0)
+    monkeypatch.setattr(bot_handlers, "report_sessions", manager)
+    return manager
+
+
+def _press(user_id, data):
+    query = FakeQuery(user_id)
+    asyncio.run(bot_handlers.handle_report_page(query, data))
+    return query
+
+
+def test_parse_page_callback():
+    assert parse_page_callback("report_12_3") == (12, 3)
+    assert parse_page_callback("report_x_3") == (None, None)
+    assert parse_page_callback("report_12") == (None, None)
+
+
+def test_pages_reused_for_same_version(manager):
+    builds = []
+
+    def build(pages):
+        def run():
+            builds.append(pages)
+            return pages
+        return run
+
+    first = manager.pages_for(REPORT_AIR, "v1", build(["a1", "a2"]))
+    # Shu versiya (masalan, 304 javobdan keyin) - qayta qurilmaydi
+    assert manager.pages_for(REPORT_AIR, "v1", build(["boshqa"])) is first
+    # Boshqa tur o'z keshiga ega
+    assert manager.pages_for(REPORT_CONTAINER, "v1", build(["c1"])) == ["c1"]
+    # Yangi versiya - qayta quriladi va eski versiya unutiladi
+    assert manager.pages_for(REPORT_AIR, "v2", build(["b1"])) == ["b1"]
+    assert manager.pages_for(REPORT_AIR, "v1", build(["a3"])) == ["a3"]
+    # Versiyasiz snapshot keshlanmaydi
+    manager.pages_for(REPORT_AIR, None, build(["n1"]))
+    manager.pages_for(REPORT_AIR, None, build(["n2"]))
+    assert builds == [["a1", "a2"], ["c1"], ["b1"], ["a3"], ["n1"], ["n2"]]
+
+    # Bir versiyadagi ikki sessiya bir xil sahifalar ro'yxatini ulashadi
+    one = manager.open(1, REPORT_CONTAINER, "v1", manager.pages_for(REPORT_CONTAINER, "v1", build(["x"])))
+    two = manager.open(2, REPORT_CONTAINER, "v1", manager.pages_for(REPORT_CONTAINER, "v1", build(["x"])))
+    assert one.id != two.id and one.pages is two.pages
+
+
+def test_session_expires_after_ttl(manager, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(sessions_module.time, "monotonic", clock)
+    session = manager.open(1, REPORT_AIR, "v1", ["a", "b"])
+
+    clock.now += 59
+    assert manager.get(session.id) is session
+    clock.now += 2
+    assert manager.get(session.id) is None
+    # O'chirilgan - vaqt qaytsa ham topilmaydi
+    clock.now -= 10
+    assert manager.get(session.id) is None
+
+
+def test_oldest_sessions_forgotten(manager):
+    sessions = [manager.open(1, REPORT_AIR, "v1", ["a"]) for _ in range(5)]
+    assert [manager.get(session.id) is not None for session in sessions] == [False, False, True, True, True]
+
+
+def test_page_callback_switches_page(manager):
+    session = manager.open(7, REPORT_AIR, "v1", ["birinchi", "ikkinchi", "uchinchi"])
+
+    query = _press(7, f"report_{session.id}_2")
+    assert session.page == 2
+    (text, markup), = query.edits
+    assert text.startswith("uchinchi\n🕐 ")
+    buttons = [button.callback_data for row in markup.inline_keyboard for button in row]
+    assert buttons == [f"report_{session.id}_1", f"report_{session.id}_2", "manager_qarzdorlar"]
+
+    # Joriy sahifa tugmasi va chegaradan tashqari raqam - xabar o'zgarmaydi
+    assert _press(7, f"report_{session.id}_2").edits == []
+    assert _press(7, f"report_{session.id}_9").edits == []
+
+
+def test_other_users_callback_rejected(manager):
+    session = manager.open(7, REPORT_AIR, "v1", ["birinchi", "ikkinchi"])
+
+    query = _press(8, f"report_{session.id}_1")
+    assert query.edits == []
+    assert query.message.replies == ["⌛ Hisobot eskirgan - uni qaytadan oching."]
+    # Egasining sessiyasi o'zgarmagan
+    assert session.page == 0
+
+
+def test_expired_session_callback(manager, monkeypatch):
+    session = manager.open(7, REPORT_AIR, "v1", ["birinchi", "ikkinchi"])
+    monkeypatch.setattr(manager, "ttl", -1.0)
+
+    query = _press(7, f"report_{session.id}_1")
+    assert query.edits == []
+    assert query.message.replies == ["⌛ Hisobot eskirgan - uni qaytadan oching."]
+    assert _press(7, "report_yaroqsiz_1").message.replies == ["⌛ Hisobot eskirgan - uni qaytadan oching."]
@@ -0,0 +1,131 @@
+"""
+SheetSnapshotCache: parallel so'rovlarda bitta yuklash, invalidate va o'zgarmagan (304) javob
+"""
+import threading
+
+import pytest
+
+from sheet_cache import SheetSnapshotCache
+
+
+class SlowLoader:
+    """Birinchi chaqiruvda boshqa thread'lar kutib qolishi uchun to'xtab turadigan loader"""
+
+    def __init__(self, rows=None):
+        self.calls = 0
+        self.previous = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.rows = rows if rows is not None else [["Telefon"], ["998901234567"]]
+        self._lock = threading.Lock()
+
+    def __call__(self, previous):
+        with self._lock:
+            self.calls += 1
+        self.previous.append(previous)
+        self.started.set()
+        self.release.wait(5)
+        return [list(row) for row in self.rows]
+
+
+def _get_in_threads(cache, loader, count):
+    results = [None] * count
+    errors = []
+
+    def worker(index):
+        try:
+            results[index] = cache.get("sheet", 0, loader)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_get_fetches_once():
+    cache = SheetSnapshotCache(ttl=60)
+    loader = SlowLoader()
+    threads, results, errors = _get_in_threads(cache, loader, 8)
+    assert loader.started.wait(5)
+    loader.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == []
+    assert loader.calls == 1
+    assert all(result is results[0] for result in results)
+    assert cache.misses == 1
+    # Keyingi so'rov keshdan
+    assert cache.get("sheet", 0, loader) is results[0]
+    assert loader.calls == 1
+
+
+def test_loader_error_reaches_waiters():
+    cache = SheetSnapshotCache(ttl=60)
+    started, release = threading.Event(), threading.Event()
+
+    def failing(previous):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("Sheets javob bermadi")
+
+    threads, results, errors = _get_in_threads(cache, failing, 4)
+    assert started.wait(5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 4 and all(isinstance(e, RuntimeError) for e in errors)
+    assert cache.peek("sheet", 0) is None
+
+
+def test_invalidate_forces_refetch():
+    cache = SheetSnapshotCache(ttl=60)
+    loader = SlowLoader()
+    loader.release.set()
+    first = cache.get("sheet", 0, loader)
+
+    cache.invalidate("sheet", 0)
+    assert cache.peek("sheet", 0) is None
+    second = cache.get("sheet", 0, loader)
+    assert loader.calls == 2
+    assert second is not first and second.version > first.version
+    # Butun sheet bo'yicha invalidate ham
+    cache.invalidate("sheet")
+    cache.get("sheet", 0, loader)
+    assert loader.calls == 3
+
+
+def test_invalidate_during_load_discards_result():
+    cache = SheetSnapshotCache(ttl=60)
+    loader = SlowLoader()
+    threads, results, _ = _get_in_threads(cache, loader, 1)
+    assert loader.started.wait(5)
+    # Yuklash davomida yozish bo'ldi - eski natija keshga tushmasligi kerak
+    cache.invalidate("sheet", 0)
+    loader.release.set()
+    threads[0].join(5)
+
+    assert results[0] is not None
+    assert cache.peek("sheet", 0) is None
+
+
+def test_unchanged_data_keeps_snapshot_version():
+    cache = SheetSnapshotCache(ttl=0)
+    first = cache.get("sheet", 0, lambda previous: [["a"]])
+    first.derived("index", lambda snapshot: {"a": 1})
+
+    # 304 - loader None qaytaradi, oldingi snapshot (indekslari bilan) qayta ishlatiladi
+    second = cache.get("sheet", 0, lambda previous: None)
+    assert second is first and second.version == first.version
+    assert second.derived("index", lambda snapshot: pytest.fail("qayta qurilmasligi kerak")) == {"a": 1}
+
+    third = cache.get("sheet", 0, lambda previous: [["b"]])
+    assert third.version > first.version
+
+
+def test_unchanged_without_previous_snapshot_is_error():
+    cache = SheetSnapshotCache(ttl=60)
+    with pytest.raises(ValueError):
+        cache.get("sheet", 0, lambda previous: None)
@@ -0,0 +1,175 @@
+"""
+UsersTable indeksli qidiruvini eski chiziqli qidiruv (find_user_by_phone / find_user_by_code) bilan taqqoslash
+"""
+import random
+
+import pytest
+
+from money import parse_money
+from sheet_tables import UsersTable
+
+
+def legacy_find_by_phone(rows, phone_number):
+    """Eski GoogleSheetsManager.find_user_by_phone - qatorlarni birma-bir ko'rib chiqish (row_number qaytaradi)"""
+    clean_phone = ''.join(filter(str.isdigit, phone_number))
+    for i, row in enumerate(rows[1:], start=2):
+        if not row or len(row) < 5:
+            continue
+        telefon = str(row[0]).strip()
+        clean_sheet_phone = ''.join(filter(str.isdigit, telefon))
+
+        match_found = False
+        if clean_phone and clean_sheet_phone:
+            if clean_phone == clean_sheet_phone:
+                match_found = True
+            elif clean_phone.startswith('998') and len(clean_phone) >= 12:
+                local_part = clean_phone[3:]
+                if local_part == clean_sheet_phone or clean_sheet_phone.endswith(local_part):
+                    match_found = True
+            elif clean_sheet_phone.startswith('998') and len(clean_sheet_phone) >= 12:
+                sheet_local_part = clean_sheet_phone[3:]
+                if clean_phone == sheet_local_part or clean_phone.endswith(sheet_local_part):
+                    match_found = True
+            elif len(clean_phone) >= 9 and len(clean_sheet_phone) >= 9:
+                if clean_phone[-9:] == clean_sheet_phone[-9:]:
+                    match_found = True
+
+        if match_found:
+            return i
+    return None
+
+
+def legacy_find_by_code(rows, code):
+    """Eski GoogleSheetsManager.find_user_by_code (row_number qaytaradi)"""
+    clean_code = str(code).strip()
+    for i, row in enumerate(rows[1:], start=2):
+        if not row or len(row) < 4:
+            continue
+        try:
+            kod = str(row[3]).strip() if len(row) > 3 else ""
+            if '.' in clean_code and clean_code.endswith('.0'):
+                clean_code = clean_code[:-2]
+            if clean_code == kod or clean_code == str(int(float(kod))) if kod.replace('.', '').isdigit() else False:
+                return i
+        except (ValueError, IndexError):
+            continue
+    return None
+
+
+def _random_phone(rng):
+    local = ''.join(rng.choice('0123456789') for _ in range(9))
+    kind = rng.randrange(7)
+    if kind == 0:
+        return '998' + local
+    if kind == 1:
+        return f"+998 {local[:2]} {local[2:5]}-{local[5:7]}-{local[7:]}"
+    if kind == 2:
+        return local
+    if kind == 3:
+        # 9 tadan qisqa raqamlar
+        return ''.join(rng.choice('0123456789') for _ in range(rng.randint(1, 8)))
+    if kind == 4:
+        return ''
+    if kind == 5:
+        return '00998' + local
+    return rng.choice(['998', '998901', 'tel yo\'q', '+998'])
+
+
+def _random_code(rng):
+    kind = rng.randrange(7)
+    number = str(rng.randint(1, 3000))
+    if kind == 0:
+        return number + '.0'
+    if kind == 1:
+        return number + '.5'
+    if kind == 2:
+        return rng.choice(['AB12', 'kod', '12a', '1.2.3', '', '-5', ' 12 '])
+    if kind == 3:
+        return '0' + number
+    return number
+
+
+def _random_rows(rng, count):
+    rows = [["Telefon", "Ism", "List", "Kod", "Summa"]]
+    # Kichik qiymatlar oralig'i - takroriy telefon va kodlar ko'p bo'lishi uchun
+    pool_phones = [_random_phone(rng) for _ in range(count // 3 + 1)]
+    pool_codes = [_random_code(rng) for _ in range(count // 3 + 1)]
+    for n in range(count):
+        row = [rng.choice(pool_phones), f"User {n}", rng.choice(["A", "B", "C"]), rng.choice(pool_codes),
+               str(rng.randint(-1000, 1000))]
+        shape = rng.randrange(10)
+        if shape == 0:
+            row = row[:4]  # summa ustuni yo'q
+        elif shape == 1:
+            row = row[:3]  # kod ustuni ham yo'q
+        elif shape == 2:
+            row = []
+        rows.append(row)
+    return rows, pool_phones, pool_codes
+
+
+def _table(rows):
+    return UsersTable.from_rows(rows, parse_money)
+
+
+def _row_number(record):
+    return record.row_number if record is not None else None
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_find_by_phone_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    rows, phones, _ = _random_rows(rng, 300)
+    table = _table(rows)
+
+    queries = phones + [_random_phone(rng) for _ in range(200)]
+    # 998 prefiksli va prefikssiz ko'rinishlar
+    queries += ['998' + ''.join(filter(str.isdigit, phone))[-9:] for phone in phones]
+    queries += [''.join(filter(str.isdigit, phone))[-9:] for phone in phones]
+    for query in queries:
+        assert _row_number(table.find_by_phone(query)) == legacy_find_by_phone(rows, query), query
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_find_by_code_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    rows, _, codes = _random_rows(rng, 300)
+    table = _table(rows)
+
+    queries = codes + [_random_code(rng) for _ in range(200)]
+    queries += [code + '.0' for code in codes] + [' ' + code + ' ' for code in codes]
+    # Eski qidiruv "12.0.0" kabi so'rovdan har qatorda yana bir ".0" ni olib tashlardi (natija qator
+    # tartibiga bog'liq edi) - bunday so'rovlar taqqoslanmaydi
+    queries = [query for query in queries if not query.strip().endswith('.0.0')]
+    for query in queries:
+        assert _row_number(table.find_by_code(query)) == legacy_find_by_code(rows, query), query
+
+
+def test_phone_edge_cases():
+    rows = [
+        ["Telefon", "Ism", "List", "Kod", "Summa"],
+        ["12345", "Qisqa", "A", "1", "0"],
+        ["+998 90 123-45-67", "Prefiksli", "A", "2", "0"],
+        ["901234568", "Mahalliy", "A", "3", "0"],
+        ["998901234567", "Takror", "A", "4", "0"],
+    ]
+    table = _table(rows)
+    for query in ["12345", "2345", "123456", "998901234567", "901234567", "+998901234568", "998901234568",
+                  "00998901234567", "998", ""]:
+        assert _row_number(table.find_by_phone(query)) == legacy_find_by_phone(rows, query), query
+
+
+def test_code_edge_cases():
+    rows = [
+        ["Telefon", "Ism", "List", "Kod", "Summa"],
+        ["901111111", "Nol", "A", "1111.0", "0"],
+        ["901111112", "Butun", "A", "1111", "0"],
+        ["901111113", "Harfli", "A", "AB12", "0"],
+        ["901111114", "Kasr", "A", "22.5", "0"],
+        ["901111115", "Nolli", "A", "0042", "0"],
+        ["901111116", "Qisqa qator", "A", "777"],
+    ]
+    table = _table(rows)
+    for query in ["1111", "1111.0", "1111.00", "AB12", "ab12", "22", "22.5", "42", "0042", "0042.0", "777",
+                  "777.0", "", "1.2.3"]:
+        assert _row_number(table.find_by_code(query)) == legacy_find_by_code(rows, query), query
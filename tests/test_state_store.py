@@ -0,0 +1,64 @@
+"""
+Holat ombori: sessiya dict'laridagi Money summalari diskdan qayta o'qilganda Money bo'lib tiklanadi
+"""
+import pytest
+
+import config
+from money import Money
+from state_store import SQLiteStateBackend, StateStore
+
+
+@pytest.fixture
+def restored_state(monkeypatch):
+    # Tiklash config'dagi global dict'larni to'ldiradi - test oxirida avvalgi holatiga qaytariladi
+    targets = list(config._PERSISTED_STATE.values()) + [config.AUTH_PHONE_INDEX, config.AUTH_KOD_INDEX]
+    saved = [dict(target) for target in targets]
+    for target in targets:
+        target.clear()
+    yield
+    for target, items in zip(targets, saved):
+        target.clear()
+        target.update(items)
+
+
+def _reopen(path, monkeypatch):
+    store = StateStore(SQLiteStateBackend(path))
+    monkeypatch.setattr(config, "_state_store", store)
+    return store
+
+
+def test_session_summa_restored_as_money(tmp_path, monkeypatch, restored_state):
+    path = str(tmp_path / "state.db")
+    store = StateStore(SQLiteStateBackend(path))
+    store.put("auth", 42, {"telefon": "998901234567", "kod": "100", "summa": Money(-123450)})
+    store.put("pending", 43, {"telefon": "998901234568", "kod": "101", "summa": Money(5)})
+    store.put("roles", 42, "mijoz")
+    store.close()
+
+    store = _reopen(path, monkeypatch)
+    try:
+        counts = config.restore_state()
+    finally:
+        store.close()
+
+    assert counts["auth"] == 1 and counts["pending"] == 1
+    assert config.AUTHENTICATED_USERS[42]["summa"] == Money(-123450)
+    assert config.PENDING_CODE_VERIFICATION[43]["summa"] == Money(5)
+    # Tiklangan summa Money bilan solishtiriladi (matn bo'lib qolsa TypeError bo'lardi)
+    assert config.AUTHENTICATED_USERS[42]["summa"] < Money(0)
+    assert config.USER_ROLES[42] == "mijoz"
+    assert config.find_authenticated_user_by_kod("100") == 42
+
+
+def test_unreadable_summa_left_as_is(tmp_path, monkeypatch, restored_state):
+    path = str(tmp_path / "state.db")
+    store = StateStore(SQLiteStateBackend(path))
+    store.put("auth", 42, {"telefon": "998901234567", "kod": "100", "summa": "summa yo'q"})
+    store.close()
+
+    store = _reopen(path, monkeypatch)
+    try:
+        config.restore_state()
+    finally:
+        store.close()
+    assert config.AUTHENTICATED_USERS[42]["summa"] == "summa yo'q"
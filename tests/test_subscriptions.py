@@ -0,0 +1,113 @@
+"""
+SubscriptionEngine.match - chegaradan o'tish (yuqoriga/pastga, aynan chegarada) va obunani bekor qilish
+"""
+import pytest
+
+import subscriptions
+from money import Money
+from subscriptions import RULE_CODE, RULE_THRESHOLD, SubscriptionEngine, parse_rule
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    # Obunalar diskka yozilmaydi - xotiradagi lug'at bilan ishlanadi
+    stored = {}
+    monkeypatch.setattr(subscriptions, "get_user_subscriptions", lambda user_id: stored.get(user_id, []))
+
+    def set_rules(user_id, rules):
+        if rules:
+            stored[user_id] = rules
+        else:
+            stored.pop(user_id, None)
+
+    monkeypatch.setattr(subscriptions, "set_user_subscriptions", set_rules)
+    return SubscriptionEngine()
+
+
+def _subscribe(engine, user_id, *args):
+    rule, error = parse_rule(list(args))
+    assert error is None
+    assert engine.subscribe(user_id, rule) is None
+    return rule
+
+
+def _fired(engine, old, new, sheet="air", kod="100"):
+    return engine.match(sheet, kod, Money.of(old), Money.of(new))
+
+
+def test_parse_threshold_rule():
+    rule, error = parse_rule(["qarz", "-500,5", "air"])
+    assert error is None
+    assert rule == {"type": RULE_THRESHOLD, "sheet": "air", "threshold": "-500.50"}
+    assert parse_rule(["qarz", "-500.5"])[0]["threshold"] == "-500.50"
+    assert parse_rule(["qarz", "$1000"])[0]["threshold"] == "1000.00"
+    assert parse_rule(["qarz", "abc"])[0] is None
+    assert parse_rule(["qarz", "1.234,5"])[0] is None
+
+
+def test_crossing_down(engine):
+    _subscribe(engine, 1, "qarz", "-500")
+    fired = _fired(engine, "-400", "-600")
+    assert list(fired) == [1]
+    assert fired[1] == [{"type": RULE_THRESHOLD, "threshold": Money(-50000), "down": True}]
+
+
+def test_crossing_up(engine):
+    _subscribe(engine, 1, "qarz", "-500")
+    fired = _fired(engine, "-600", "-400")
+    assert fired[1] == [{"type": RULE_THRESHOLD, "threshold": Money(-50000), "down": False}]
+
+
+def test_no_crossing(engine):
+    _subscribe(engine, 1, "qarz", "-500")
+    assert _fired(engine, "-400", "-499.99") == {}
+    assert _fired(engine, "-600", "-500.01") == {}
+    assert _fired(engine, "-400", "-400") == {}
+
+
+def test_exact_threshold(engine):
+    _subscribe(engine, 1, "qarz", "-500")
+    # Pastga: chegaraga yetishning o'zi o'tish hisoblanadi
+    assert _fired(engine, "-400", "-500")[1][0]["down"] is True
+    # Chegaradan yuqoriga chiqish ham
+    assert _fired(engine, "-500", "-400")[1][0]["down"] is False
+    # Chegaradan pastga tushish - oldingi qiymat chegarada edi, o'tish allaqachon xabar qilingan
+    assert _fired(engine, "-500", "-600") == {}
+    # Yuqoriga chiqib chegarada to'xtash - hali o'tilmagan
+    assert _fired(engine, "-600", "-500") == {}
+
+
+def test_sheet_filter_and_code_rule(engine):
+    _subscribe(engine, 1, "qarz", "0", "container")
+    _subscribe(engine, 2, "kod", "100")
+    assert list(_fired(engine, "10", "-10", sheet="air")) == [2]
+    fired = _fired(engine, "10", "-10", sheet="container")
+    assert sorted(fired) == [1, 2]
+    assert fired[2] == [{"type": RULE_CODE, "kod": "100"}]
+
+
+def test_unsubscribe_removes_from_index(engine):
+    _subscribe(engine, 1, "qarz", "-500")
+    _subscribe(engine, 2, "qarz", "-500")
+    assert sorted(_fired(engine, "-400", "-600")) == [1, 2]
+
+    removed = engine.unsubscribe(1, 1)
+    assert removed == [{"type": RULE_THRESHOLD, "sheet": "all", "threshold": "-500.00"}]
+    assert list(_fired(engine, "-400", "-600")) == [2]
+
+    engine.unsubscribe(2)
+    assert _fired(engine, "-400", "-600") == {}
+    assert not engine.has_rules()
+
+
+def test_legacy_float_threshold(engine, monkeypatch):
+    # Oldin saqlangan qoidalarda chegara float edi
+    legacy = {"type": RULE_THRESHOLD, "sheet": "air", "threshold": -500.0}
+    monkeypatch.setattr(subscriptions, "USER_SUBSCRIPTIONS", {7: [legacy]})
+    monkeypatch.setattr(subscriptions, "get_user_subscriptions", lambda user_id: [legacy] if user_id == 7 else [])
+    assert engine.rebuild() == 1
+    assert list(_fired(engine, "-400", "-600")) == [7]
+
+    # Xuddi shu chegarani qayta qo'shish takror hisoblanadi
+    rule, _ = parse_rule(["qarz", "-500", "air"])
+    assert engine.subscribe(7, rule) == "ℹ️ Bu obuna allaqachon mavjud."